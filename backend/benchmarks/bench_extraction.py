@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF text extraction throughput (pages/sec) from 1 to N worker processes
+
+Usage (from the backend directory):
+    python benchmarks/bench_extraction.py path/to/large.pdf [--max-workers 8] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_processor import PDFProcessor
+
+def run(processor: PDFProcessor, file_path: str, parallel: bool, repeat: int) -> float:
+    """Return the best pages/sec over `repeat` runs"""
+    best = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        pages = sum(1 for _ in processor.iter_pages(file_path, parallel=parallel))
+        elapsed = time.perf_counter() - started
+        best = max(best, pages / elapsed if elapsed > 0 else 0.0)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", help="PDF file to extract")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = PDFProcessor()
+    baseline = run(processor, args.pdf, parallel=False, repeat=args.repeat)
+    print(f"{'workers':>8} {'pages/sec':>10} {'speedup':>8}")
+    print(f"{'serial':>8} {baseline:>10.1f} {1.0:>8.2f}")
+
+    for workers in range(1, args.max_workers + 1):
+        processor.shutdown()
+        processor.extraction_workers = workers
+        # First call spins up the pool; do not count it
+        run(processor, args.pdf, parallel=True, repeat=1)
+        rate = run(processor, args.pdf, parallel=True, repeat=args.repeat)
+        print(f"{workers:>8} {rate:>10.1f} {rate / baseline if baseline else 0:>8.2f}")
+
+    processor.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of per-query /chat answer formatting: the old regex cascade versus
+assembling snippets that TextNormalizer stored at ingest time
+
+Chunks come from a PDF when one is given, otherwise from synthetic resume-like
+text with page header/footer artifacts. Also reports how many answers are
+identical between the two paths; skills questions are left out of that count
+because they now list the skills tagged at ingest.
+
+Usage (from the backend directory):
+    python benchmarks/bench_formatting.py [path/to/file.pdf] [--queries 2000] [--k 2]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.schema import Document
+
+from config import Config
+
+Config.RESULT_CACHE_BACKEND = "none"
+
+from pdf_processor import PDFProcessor
+from vector_search_service import VectorSearchService
+
+QUESTIONS = [
+    "What skills does the candidate have?",
+    "Describe the work experience",
+    "What is the education background?",
+    "How can I contact them?",
+    "Give me a summary",
+    "Which projects are mentioned?"
+]
+
+SENTENCES = [
+    "Built a real-time collaboration platform with React, Node.js and WebSockets",
+    "Led a team of five engineers delivering microservices on AWS and Kubernetes",
+    "Bachelor of Technology in Computer Science with a focus on machine learning",
+    "Reduced API latency by forty percent through caching and query optimization",
+    "Contact me at jane.doe@example.com or through the portfolio website",
+    "Designed REST API and GraphQL endpoints consumed by mobile and web clients"
+]
+
+def legacy_format(service: VectorSearchService, documents, question: str) -> str:
+    """_format_relevant_content as it was before TextNormalizer"""
+    unique_contents, seen_content = [], set()
+    for doc in documents:
+        content = doc.page_content.strip()
+        if content and len(content) > 10:
+            cleaned_content = re.sub(r'Page \d+', '', content).strip()
+            cleaned_content = re.sub(r'Page \d+ Page \d+', '', cleaned_content).strip()
+            cleaned_content = cleaned_content.replace('\n', ' ').replace('  ', ' ')
+            if cleaned_content and len(cleaned_content) > 10:
+                simplified = ' '.join(cleaned_content.split()[:15]).lower()
+                if simplified not in seen_content:
+                    unique_contents.append(cleaned_content)
+                    seen_content.add(simplified)
+    if not unique_contents:
+        return "No relevant information found."
+
+    combined_content = unique_contents[0]
+    response_parts = []
+    question_lower = question.lower()
+    if "skill" in question_lower:
+        response_parts.append("Based on the document, here are the skills mentioned:")
+        combined_content = service._extract_skills_from_content(combined_content)
+    elif "experience" in question_lower or "work" in question_lower:
+        response_parts.append("Based on the document, here is the experience/work history:")
+    elif "education" in question_lower or "degree" in question_lower:
+        response_parts.append("Based on the document, here is the education background:")
+    elif "contact" in question_lower or "email" in question_lower or "phone" in question_lower:
+        response_parts.append("Based on the document, here is the contact information:")
+    elif "summary" in question_lower or "overview" in question_lower or "key points" in question_lower:
+        response_parts.append("Based on the document, here are the key points:")
+    else:
+        response_parts.append("Based on the document, here is the relevant information:")
+
+    if combined_content:
+        cleaned_content = ' '.join(combined_content.split())
+        cleaned_content = re.sub(r'Page \d+', '', cleaned_content).strip()
+        cleaned_content = re.sub(r'Page \d+ Page \d+', '', cleaned_content).strip()
+        cleaned_content = re.sub(r'Page\d+', '', cleaned_content).strip()
+        cleaned_content = re.sub(r'\bPage\b', '', cleaned_content).strip()
+        cleaned_content = re.sub(r'\s+', ' ', cleaned_content).strip()
+        meaningful_sentences = []
+        for s in cleaned_content.split('.'):
+            s = s.strip()
+            if (len(s) > 20 and not s.startswith('Page') and not s.lower().startswith('page')
+                    and not s.endswith('Page') and not s.lower().endswith('page') and 'Page' not in s):
+                meaningful_sentences.append(s)
+        if meaningful_sentences:
+            final_content = '. '.join(meaningful_sentences[:3]) + '.'
+            final_content = re.sub(r'\bPage\b', '', final_content).strip()
+            final_content = re.sub(r'\s+', ' ', final_content).strip()
+            response_parts.append(final_content)
+        else:
+            fallback_content = re.sub(r'\bPage\b', '', cleaned_content).strip()
+            fallback_content = re.sub(r'\s+', ' ', fallback_content).strip()
+            if fallback_content:
+                response_parts.append(fallback_content[:500] + '...')
+
+    final_response = "\n\n".join(response_parts)
+    final_response = re.sub(r'\bPage\b', '', final_response).strip()
+    final_response = re.sub(r'Page \d+', '', final_response).strip()
+    final_response = re.sub(r'Page\d+', '', final_response).strip()
+    final_response = re.sub(r'\s+', ' ', final_response).strip()
+    final_response = re.sub(r'\s*Page\s*$', '', final_response).strip()
+    final_response = re.sub(r'\s*Page\s*Page\s*$', '', final_response).strip()
+    return final_response
+
+def synthetic_chunks(rng: random.Random, count: int):
+    chunks = []
+    for i in range(count):
+        body = ". ".join(rng.sample(SENTENCES, 4)) + "."
+        chunks.append(f"Page {i % 9 + 1}\n{body}\n  Jane Doe - Resume  Page {i % 9 + 1} Page{i % 9 + 2}")
+    return chunks
+
+def pdf_chunks(processor: PDFProcessor, file_path: str):
+    stats = {"pages": 0, "num_chunks": 0}
+    return [doc.page_content for doc in processor.iter_chunks(file_path, {}, stats)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", help="PDF to take chunks from (synthetic text if omitted)")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=2)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    processor = PDFProcessor()
+    texts = pdf_chunks(processor, args.pdf) if args.pdf else synthetic_chunks(rng, 200)
+    processor.shutdown()
+
+    legacy_docs = [Document(page_content=text, metadata={"page": 1}) for text in texts]
+    service = VectorSearchService(None)
+    stored_docs = [
+        Document(page_content=text, metadata={
+            "page": 1,
+            **service.normalizer.normalize(text),
+            "skills": ", ".join(service.skill_matcher.find_labels(text)),
+            "skills_taxonomy": service.skill_matcher.fingerprint
+        })
+        for text in texts
+    ]
+
+    workload = [(rng.randrange(len(texts) - args.k + 1), rng.choice(QUESTIONS)) for _ in range(args.queries)]
+
+    def run(format_fn, docs):
+        started = time.perf_counter()
+        answers = [format_fn(docs[start:start + args.k], question) for start, question in workload]
+        return (time.perf_counter() - started) / len(workload) * 1e6, answers
+
+    legacy_us, legacy_answers = run(lambda docs, q: legacy_format(service, docs, q), legacy_docs)
+    fallback_us, _ = run(service._format_relevant_content, legacy_docs)
+    stored_us, stored_answers = run(service._format_relevant_content, stored_docs)
+
+    compared = [(a, b) for (_, question), a, b in zip(workload, legacy_answers, stored_answers)
+                if "skill" not in question.lower()]
+    identical = sum(a == b for a, b in compared)
+    print(f"{len(texts)} chunks, {len(workload)} queries, k={args.k}")
+    print(f"{'path':>32} {'us/query':>10} {'speedup':>8}")
+    print(f"{'regex cascade (before)':>32} {legacy_us:>10.1f} {1.0:>8.2f}")
+    print(f"{'normalizer, legacy chunks':>32} {fallback_us:>10.1f} {legacy_us / fallback_us:>8.2f}")
+    print(f"{'stored snippets (after)':>32} {stored_us:>10.1f} {legacy_us / stored_us:>8.2f}")
+    print(f"identical answers (non-skills questions): {identical}/{len(compared)}")
+
+if __name__ == "__main__":
+    main()
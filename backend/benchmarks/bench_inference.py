@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Compare the inference backends for the embedding model and the LLM: embed
+throughput, generation latency, RSS and agreement with the torch path
+
+Each (model, backend) pair loads in its own subprocess so RSS is not shared.
+Agreement is measured against the "torch" backend: mean cosine similarity and
+top-5 neighbour overlap for embeddings, exact-match rate and mean character
+similarity of greedy answers for the LLM.
+
+Chunks come from a PDF when one is given, otherwise from synthetic resume text.
+
+Usage (from the backend directory):
+    python benchmarks/bench_inference.py [path/to/file.pdf] [--chunks 512] [--prompts 8]
+        [--embedding-backends torch int8 onnx onnx_int8] [--llm-backends torch int8 onnx]
+        [--threads N] [--max-new-tokens 64]
+"""
+
+import argparse
+import difflib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+QUESTIONS = [
+    "What skills does the candidate have?",
+    "Describe the work experience",
+    "What is the education background?",
+    "Which projects are mentioned?"
+]
+
+SENTENCES = [
+    "Built a real-time collaboration platform with React, Node.js and WebSockets",
+    "Led a team of five engineers delivering microservices on AWS and Kubernetes",
+    "Bachelor of Technology in Computer Science with a focus on machine learning",
+    "Reduced API latency by forty percent through caching and query optimization",
+    "Designed REST API and GraphQL endpoints consumed by mobile and web clients",
+    "Mentored interns and ran weekly code reviews across three product teams",
+    "Migrated a monolith to event-driven services with Kafka and PostgreSQL"
+]
+
+def rss_mb() -> float:
+    from model_residency import process_rss_bytes
+    return process_rss_bytes() / 1e6
+
+def load_chunks(pdf_path: str, count: int):
+    if pdf_path:
+        from pdf_processor import PDFProcessor
+        processor = PDFProcessor()
+        stats = {"pages": 0, "num_chunks": 0}
+        texts = [doc.page_content for doc in processor.iter_chunks(pdf_path, {}, stats)]
+        processor.shutdown()
+        return (texts * (count // max(1, len(texts)) + 1))[:count]
+    rng = random.Random(0)
+    return [". ".join(rng.sample(SENTENCES, 5)) + "." for _ in range(count)]
+
+def percentile_ms(samples, q):
+    import numpy as np
+    return round(float(np.percentile(samples, q)) * 1000, 2)
+
+def embed_worker(backend: str, chunks, output_dir: str) -> dict:
+    import numpy as np
+    from inference_backends import create_embeddings
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    embeddings = create_embeddings(backend, Config)
+    load_seconds = time.perf_counter() - started
+    embeddings.embed_documents(chunks[:16])
+
+    started = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(chunks), dtype=np.float32)
+    embed_seconds = time.perf_counter() - started
+
+    query_latencies = []
+    for question in QUESTIONS * 10:
+        started = time.perf_counter()
+        embeddings.embed_query(question)
+        query_latencies.append(time.perf_counter() - started)
+
+    np.save(os.path.join(output_dir, f"embed-{backend}.npy"), vectors)
+    return {
+        "load_s": round(load_seconds, 1),
+        "chunks_per_s": round(len(chunks) / embed_seconds, 1),
+        "query_p50_ms": percentile_ms(query_latencies, 50),
+        "rss_mb": round(rss_mb() - rss_before, 1)
+    }
+
+def llm_worker(backend: str, chunks, prompts: int, max_new_tokens: int, output_dir: str) -> dict:
+    from transformers import AutoTokenizer
+    from inference_backends import load_seq2seq_model
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(Config.MODEL_NAME, token=Config.HUGGINGFACE_API_TOKEN)
+    model = load_seq2seq_model(backend, Config)
+    load_seconds = time.perf_counter() - started
+
+    # Same prompt layout as LLMService._build_prompt
+    texts = [
+        f"Question: {QUESTIONS[i % len(QUESTIONS)]}\n\nContext: {' '.join(chunks[i * 2:i * 2 + 2])[:1000]}\n\nAnswer:"
+        for i in range(prompts)
+    ]
+    answers, latencies, generated = [], [], 0
+    for i, text in enumerate([texts[0]] + texts):
+        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
+        started = time.perf_counter()
+        output = model.generate(
+            input_ids=inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            max_new_tokens=max_new_tokens,
+            do_sample=False
+        )
+        elapsed = time.perf_counter() - started
+        if i == 0:
+            continue  # warm-up
+        latencies.append(elapsed)
+        generated += output.shape[-1]
+        answers.append(tokenizer.decode(output[0], skip_special_tokens=True))
+
+    with open(os.path.join(output_dir, f"llm-{backend}.json"), "w") as f:
+        json.dump(answers, f)
+    return {
+        "load_s": round(load_seconds, 1),
+        "p50_ms": percentile_ms(latencies, 50),
+        "p99_ms": percentile_ms(latencies, 99),
+        "tokens_per_s": round(generated / sum(latencies), 1),
+        "rss_mb": round(rss_mb() - rss_before, 1)
+    }
+
+def embedding_agreement(output_dir: str, backend: str) -> str:
+    import numpy as np
+    reference_path = os.path.join(output_dir, "embed-torch.npy")
+    if backend == "torch" or not os.path.exists(reference_path):
+        return "-"
+    reference = np.load(reference_path)
+    vectors = np.load(os.path.join(output_dir, f"embed-{backend}.npy"))
+    cosine = float(np.mean(np.sum(reference * vectors, axis=1)))
+    queries = min(64, len(reference))
+    ref_top = np.argsort(-(reference[:queries] @ reference.T), axis=1)[:, 1:6]
+    top = np.argsort(-(vectors[:queries] @ vectors.T), axis=1)[:, 1:6]
+    overlap = np.mean([len(set(a) & set(b)) / 5 for a, b in zip(ref_top, top)])
+    return f"cos {cosine:.4f}, top5 {overlap:.2f}"
+
+def llm_agreement(output_dir: str, backend: str) -> str:
+    reference_path = os.path.join(output_dir, "llm-torch.json")
+    if backend == "torch" or not os.path.exists(reference_path):
+        return "-"
+    with open(reference_path) as f:
+        reference = json.load(f)
+    with open(os.path.join(output_dir, f"llm-{backend}.json")) as f:
+        answers = json.load(f)
+    exact = sum(a == b for a, b in zip(reference, answers))
+    similarity = sum(difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(reference, answers)) / len(answers)
+    return f"exact {exact}/{len(answers)}, sim {similarity:.2f}"
+
+def run_worker(kind: str, backend: str, output_dir: str, args) -> dict:
+    command = [sys.executable, __file__, "--worker", kind, backend, output_dir,
+               "--chunks", str(args.chunks), "--prompts", str(args.prompts),
+               "--max-new-tokens", str(args.max_new_tokens), "--threads", str(args.threads),
+               "--embedding-model", Config.EMBEDDING_MODEL_NAME, "--llm-model", Config.MODEL_NAME]
+    if args.pdf:
+        command.insert(2, args.pdf)
+    result = subprocess.run(command, capture_output=True, text=True)
+    lines = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not lines:
+        return {"error": (result.stderr.strip().splitlines() or ["no output"])[-1]}
+    return json.loads(lines[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", help="PDF to take chunks from (synthetic text if omitted)")
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--prompts", type=int, default=8)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--embedding-backends", nargs="*", default=["torch", "int8", "onnx", "onnx_int8"])
+    parser.add_argument("--llm-backends", nargs="*", default=["torch", "int8", "onnx"])
+    parser.add_argument("--embedding-model", default=Config.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--llm-model", default=Config.MODEL_NAME)
+    parser.add_argument("--worker", nargs=3, metavar=("KIND", "BACKEND", "OUTPUT_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    Config.EMBEDDING_MODEL_NAME = args.embedding_model
+    Config.MODEL_NAME = args.llm_model
+    Config.EMBEDDING_NUM_THREADS = Config.LLM_NUM_THREADS = args.threads
+
+    if args.worker:
+        import torch
+        torch.set_num_threads(args.threads)
+        kind, backend, output_dir = args.worker
+        chunks = load_chunks(args.pdf, args.chunks)
+        if kind == "embed":
+            print(json.dumps(embed_worker(backend, chunks, output_dir)))
+        else:
+            print(json.dumps(llm_worker(backend, chunks, args.prompts, args.max_new_tokens, output_dir)))
+        return
+
+    output_dir = tempfile.mkdtemp(prefix="bench-inference-")
+    try:
+        print(f"{args.chunks} chunks, {args.prompts} prompts, {args.threads} threads")
+        print(f"\n{Config.EMBEDDING_MODEL_NAME}")
+        print(f"{'backend':>10} {'load s':>7} {'chunks/s':>9} {'query p50 ms':>13} {'RSS MB':>8}  agreement")
+        for backend in args.embedding_backends:
+            row = run_worker("embed", backend, output_dir, args)
+            if "error" in row:
+                print(f"{backend:>10} failed: {row['error']}")
+                continue
+            print(f"{backend:>10} {row['load_s']:>7} {row['chunks_per_s']:>9} {row['query_p50_ms']:>13} "
+                  f"{row['rss_mb']:>8}  {embedding_agreement(output_dir, backend)}")
+
+        print(f"\n{Config.MODEL_NAME} (greedy, max {args.max_new_tokens} new tokens)")
+        print(f"{'backend':>10} {'load s':>7} {'p50 ms':>8} {'p99 ms':>8} {'tok/s':>7} {'RSS MB':>8}  agreement")
+        for backend in args.llm_backends:
+            row = run_worker("llm", backend, output_dir, args)
+            if "error" in row:
+                print(f"{backend:>10} failed: {row['error']}")
+                continue
+            print(f"{backend:>10} {row['load_s']:>7} {row['p50_ms']:>8} {row['p99_ms']:>8} "
+                  f"{row['tokens_per_s']:>7} {row['rss_mb']:>8}  {llm_agreement(output_dir, backend)}")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Measure recall@k and query latency of int8 / binary quantized search against exact search
+
+All modes share one vector file and docstore: the float32 NumpyBackend gives the
+exact top-k, then QuantizedBackend is opened on the same directory per mode and
+rescoring factor. Synthetic vectors are clustered unit vectors of MiniLM's width;
+pass --embeddings with a .npy of real chunk embeddings for numbers that transfer.
+
+Usage (from the backend directory):
+    python benchmarks/bench_quantization.py [--size 100000] [--k 4]
+        [--rescore-factors 0 4 10 50] [--embeddings vectors.npy]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_backends import NumpyBackend, QuantizedBackend
+
+DIM = 384
+INSERT_BATCH = 5000
+
+def clustered_unit_vectors(rng, count: int, centers: np.ndarray, noise: float = 0.6) -> np.ndarray:
+    assignment = rng.integers(0, len(centers), count)
+    vectors = centers[assignment] + noise * rng.standard_normal((count, centers.shape[1]), dtype=np.float32) / np.sqrt(centers.shape[1])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+def load_data(args, rng):
+    if args.embeddings:
+        data = np.load(args.embeddings).astype(np.float32)
+        data /= np.linalg.norm(data, axis=1, keepdims=True)
+        rng.shuffle(data)
+        return data[args.queries:], data[:args.queries]
+    centers = rng.standard_normal((max(1, args.size // 200), DIM), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    return clustered_unit_vectors(rng, args.size, centers), clustered_unit_vectors(rng, args.queries, centers)
+
+def run_queries(backend, queries: np.ndarray, k: int):
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        _, rows = backend._search_rows(query, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append(set(int(row) for row in rows))
+    return results, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[0, 4, 10, 50],
+                        help="0 ranks by the codes alone")
+    parser.add_argument("--modes", nargs="+", default=["int8", "binary"])
+    parser.add_argument("--embeddings", help=".npy array of real embeddings to use instead of synthetic data")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors, queries = load_data(args, rng)
+    directory = tempfile.mkdtemp(prefix="bench-quantization-")
+    try:
+        exact_backend = NumpyBackend(directory)
+        for start in range(0, len(vectors), INSERT_BATCH):
+            batch = vectors[start:start + INSERT_BATCH]
+            exact_backend.add([f"chunk-{start + i}" for i in range(len(batch))], batch, [""] * len(batch),
+                              [{} for _ in batch])
+        exact, exact_latencies = run_queries(exact_backend, queries, args.k)
+        float_mb = len(vectors) * vectors.shape[1] * 4 / 1e6
+        exact_backend.db.close()
+
+        print(f"{len(vectors)} vectors, {len(queries)} queries, recall@{args.k} against exact float32 search")
+        print(f"{'mode':>8} {'rescore':>8} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8} {'RAM MB':>8}")
+        print(f"{'float32':>8} {'-':>8} {1.0:>7.3f} {np.percentile(exact_latencies, 50):>8.2f} "
+              f"{np.percentile(exact_latencies, 99):>8.2f} {float_mb:>8.1f}")
+
+        for mode in args.modes:
+            backend = QuantizedBackend(directory, mode=mode)
+            code_mb = backend.codes.nbytes / 1e6
+            for factor in args.rescore_factors:
+                backend.rescore = factor > 0
+                backend.rescore_factor = max(1, factor)
+                run_queries(backend, queries[:10], args.k)
+                results, latencies = run_queries(backend, queries, args.k)
+                recall = np.mean([len(got & want) / len(want) for got, want in zip(results, exact)])
+                print(f"{mode:>8} {factor or 'none':>8} {recall:>7.3f} {np.percentile(latencies, 50):>8.2f} "
+                      f"{np.percentile(latencies, 99):>8.2f} {code_mb:>8.1f}")
+            backend.db.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
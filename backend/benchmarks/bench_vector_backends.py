@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Compare query latency (p50/p99) and RSS of the vector backends on synthetic data
+
+Each (backend, size) pair runs in its own subprocess so RSS numbers are not
+polluted by earlier runs. Vectors are random unit vectors of MiniLM's width.
+faiss-ivf uses up to 1024 lists, fewer on corpora too small to train that many;
+the index column shows what was actually built and searched.
+
+Usage (from the backend directory):
+    python benchmarks/bench_vector_backends.py [--sizes 10000 100000 1000000]
+        [--backends chroma faiss-flat faiss-hnsw faiss-ivf numpy] [--queries 200]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DIM = 384
+INSERT_BATCH = 5000
+
+def rss_mb() -> float:
+    """Current resident set size in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def ivf_nlist(size: int) -> int:
+    """IVF list count for a corpus: the backend's default, fewer when it has too few vectors to train that many"""
+    # FaissBackend builds a flat index instead below 39 vectors per list
+    return max(1, min(1024, size // 39))
+
+def build_backend(name: str, directory: str, size: int):
+    from vector_backends import ChromaBackend, FaissBackend, NumpyBackend
+    if name == "chroma":
+        return ChromaBackend(directory, None)
+    if name == "numpy":
+        return NumpyBackend(directory)
+    index_type = name.split("-", 1)[1]
+    return FaissBackend(directory, index_type=index_type, ivf_nlist=ivf_nlist(size))
+
+def built_index(backend) -> str:
+    """The index actually searched, which for FAISS can differ from the one asked for"""
+    built_type = getattr(backend, "built_type", None)
+    if built_type == "ivf":
+        return f"ivf{backend.ivf_nlist}"
+    return built_type or backend.name
+
+def random_unit_vectors(rng, count: int):
+    import numpy as np
+    vectors = rng.standard_normal((count, DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def worker(backend_name: str, size: int, queries: int, k: int) -> dict:
+    import numpy as np
+    rng = np.random.default_rng(42)
+    directory = tempfile.mkdtemp(prefix=f"bench-{backend_name}-")
+    try:
+        backend = build_backend(backend_name, directory, size)
+        started = time.perf_counter()
+        for start in range(0, size, INSERT_BATCH):
+            count = min(INSERT_BATCH, size - start)
+            vectors = random_unit_vectors(rng, count)
+            ids = [f"chunk-{start + i}" for i in range(count)]
+            backend.add(ids, vectors.tolist(), ["x"] * count, [{"file_id": str((start + i) % 100)} for i in range(count)])
+        backend.persist()
+        build_seconds = time.perf_counter() - started
+
+        # Reload so the steady-state (memory-mapped where supported) footprint is measured
+        del backend
+        backend = build_backend(backend_name, directory, size)
+        query_vectors = random_unit_vectors(rng, queries)
+        for vector in query_vectors[:10]:
+            backend.search(vector.tolist(), k)
+
+        latencies = []
+        for vector in query_vectors:
+            started = time.perf_counter()
+            backend.search(vector.tolist(), k)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        return {
+            "backend": backend_name,
+            "index": built_index(backend),
+            "size": size,
+            "build_s": round(build_seconds, 1),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+            "rss_mb": round(rss_mb(), 1)
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--backends", nargs="+", default=["chroma", "faiss-flat", "faiss-hnsw", "faiss-ivf", "numpy"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--worker", nargs=2, metavar=("BACKEND", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker[0], int(args.worker[1]), args.queries, args.k)))
+        return
+
+    print(f"{'backend':>12} {'index':>9} {'chunks':>9} {'build s':>8} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8}")
+    for size in args.sizes:
+        for backend_name in args.backends:
+            result = subprocess.run(
+                [sys.executable, __file__, "--worker", backend_name, str(size),
+                 "--queries", str(args.queries), "--k", str(args.k)],
+                capture_output=True, text=True
+            )
+            lines = result.stdout.strip().splitlines()
+            if result.returncode != 0 or not lines:
+                print(f"{backend_name:>12} {'':>9} {size:>9} failed: {result.stderr.strip().splitlines()[-1:]}")
+                continue
+            row = json.loads(lines[-1])
+            print(f"{row['backend']:>12} {row['index']:>9} {row['size']:>9} {row['build_s']:>8} "
+                  f"{row['p50_ms']:>8} {row['p99_ms']:>8} {row['rss_mb']:>8}")
+
+if __name__ == "__main__":
+    main()
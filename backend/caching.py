@@ -0,0 +1,181 @@
+import json
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?.!]+$")
+
+def normalize_query(text: str) -> str:
+    """Normalize question text so trivially different phrasings share a cache key"""
+    text = _WHITESPACE.sub(" ", text.strip().lower())
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an optional TTL per entry"""
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None, refreshing its LRU position"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Insert or replace a value, evicting the least recently used entries"""
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+class SQLiteCache:
+    """On-disk LRU cache with the same interface as LRUCache, shared across restarts"""
+
+    # Values are pickled; the file is written and read only by this service
+    def __init__(self, path: str, max_size: int, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL, accessed REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+        self.db.commit()
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return json.dumps(key, default=str)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None, refreshing its LRU position"""
+        db_key = self._key(key)
+        now = time.time()
+        with self._lock:
+            row = self.db.execute("SELECT value, expires_at FROM cache WHERE key = ?", (db_key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self.db.execute("DELETE FROM cache WHERE key = ?", (db_key,))
+                self.db.commit()
+                self.misses += 1
+                return None
+
+            self.db.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, db_key))
+            self.db.commit()
+            self.hits += 1
+        return pickle.loads(value)
+
+    def set(self, key: Hashable, value: Any):
+        """Insert or replace a value, evicting the least recently used entries"""
+        if self.max_size <= 0:
+            return
+
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed) VALUES (?, ?, ?, ?)",
+                (self._key(key), blob, expires_at, now)
+            )
+            excess = self.db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_size
+            if excess > 0:
+                self.db.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)", (excess,)
+                )
+                self.evictions += excess
+            self.db.commit()
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self.db.execute("DELETE FROM cache")
+            self.db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters"""
+        with self._lock:
+            size = self.db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "size": size,
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+def create_cache(backend: str, max_size: int, ttl_seconds: Optional[float] = None, path: Optional[str] = None):
+    """Build an in-memory ("memory") or on-disk ("sqlite") LRU cache"""
+    if backend == "memory":
+        return LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite cache backend needs a path")
+        return SQLiteCache(path, max_size=max_size, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown cache backend: {backend}")
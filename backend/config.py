@@ -12,6 +12,27 @@ class Config:
     
     # Vector Database Configuration
     CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # "chroma", "faiss" or "numpy"
+    VECTOR_INDEX_DIRECTORY = os.getenv("VECTOR_INDEX_DIRECTORY", "./vector_index")  # faiss/numpy backends
+    VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")  # numpy backend: "none", "int8" or "binary"
+    QUANTIZATION_RESCORE_FACTOR = int(os.getenv("QUANTIZATION_RESCORE_FACTOR", 10))  # candidates rescored = k * factor
+    QUANTIZATION_INT8_RANGE = float(os.getenv("QUANTIZATION_INT8_RANGE", 0.5))  # int8 clip range per component
+    FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "auto")  # "auto", "flat", "ivf" or "hnsw"
+    FAISS_FLAT_MAX_VECTORS = int(os.getenv("FAISS_FLAT_MAX_VECTORS", 50000))  # "auto" switches to ANN above this
+    FAISS_LARGE_INDEX_TYPE = os.getenv("FAISS_LARGE_INDEX_TYPE", "hnsw")  # ANN type used by "auto"
+    FAISS_IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", 1024))
+    FAISS_IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", 16))
+    FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", 32))
+    FAISS_HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", 200))
+    FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", 64))
+    KEYWORD_INDEX_PATH = os.getenv("KEYWORD_INDEX_PATH", os.path.join(CHROMA_PERSIST_DIRECTORY, "keyword_index.sqlite"))
+    SKILLS_TAXONOMY_PATH = os.getenv(
+        "SKILLS_TAXONOMY_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "taxonomies", "skills.json")
+    )  # Terms tagged on each chunk at ingest
+    COLLECTION_VERSION_PATH = os.getenv("COLLECTION_VERSION_PATH", os.path.join(CHROMA_PERSIST_DIRECTORY, "collection_version"))
+    CHAT_RETRIEVAL_MODE = os.getenv("CHAT_RETRIEVAL_MODE", "vector")  # "vector" or "hybrid"
+    HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", 60))  # Reciprocal-rank fusion damping constant
     
     # Server Configuration
     HOST = os.getenv("HOST", "0.0.0.0")
@@ -25,11 +46,83 @@ class Config:
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS = {".pdf"}
     
+    # Ingestion Configuration
+    INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", 2))  # Concurrent PDF ingestions
+    INGEST_JOBS_PATH = os.getenv("INGEST_JOBS_PATH", "./ingest_jobs.sqlite")  # Background jobs, shared by all workers
+    INGEST_JOB_RETENTION_SECONDS = float(os.getenv("INGEST_JOB_RETENTION_SECONDS", 86400))  # Finished jobs are forgotten after this (0 keeps them)
+    INGEST_STALE_SECONDS = float(os.getenv("INGEST_STALE_SECONDS", 3600))  # "processing" records untouched this long were abandoned by a dead worker
+    PARALLEL_EXTRACTION_WORKERS = int(os.getenv("PARALLEL_EXTRACTION_WORKERS", os.cpu_count() or 1))
+    PARALLEL_EXTRACTION_MIN_PAGES = int(os.getenv("PARALLEL_EXTRACTION_MIN_PAGES", 100))  # Below this, extract in-process
+    DOCUMENT_REGISTRY_PATH = os.getenv("DOCUMENT_REGISTRY_PATH", "./document_registry.sqlite")  # Per-file records and stats
+    DOCUMENTS_PAGE_MAX_LIMIT = int(os.getenv("DOCUMENTS_PAGE_MAX_LIMIT", 500))  # Largest page /documents serves
+    DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", 500))  # Chunk ids removed per delete call
+    UPLOAD_BACKGROUND_DEFAULT = os.getenv("UPLOAD_BACKGROUND_DEFAULT", "false").lower() == "true"
+    
+    # Retention Configuration (0 disables a limit)
+    RETENTION_TTL_SECONDS = float(os.getenv("RETENTION_TTL_SECONDS", 0))  # Delete documents older than this
+    RETENTION_MAX_BYTES = int(os.getenv("RETENTION_MAX_BYTES", 0))  # Delete oldest documents above this upload total
+    RETENTION_SWEEP_INTERVAL_SECONDS = float(os.getenv("RETENTION_SWEEP_INTERVAL_SECONDS", 3600))
+    ORPHAN_UPLOAD_GRACE_SECONDS = float(os.getenv("ORPHAN_UPLOAD_GRACE_SECONDS", 3600))  # Unreferenced uploads older than this are removed
+    
     # LLM Configuration
     TEMPERATURE = 0.7
     MAX_TOKENS = 512
     MAX_LENGTH = 1024  # Increased for better responses
+    # Generation policy: stop decoding early instead of trimming the output afterwards
+    LLM_MAX_NEW_TOKENS = int(os.getenv("LLM_MAX_NEW_TOKENS", 128))  # Answers keep at most a few sentences
+    LLM_NO_REPEAT_NGRAM_SIZE = int(os.getenv("LLM_NO_REPEAT_NGRAM_SIZE", 3))  # Never repeat an n-gram (0: off)
+    LLM_LOOP_MAX_PERIOD = int(os.getenv("LLM_LOOP_MAX_PERIOD", 8))  # Longest token span checked for loops
+    LLM_LOOP_MIN_REPEATS = int(os.getenv("LLM_LOOP_MIN_REPEATS", 3))  # Stop once a span repeats this many times back to back
+    LLM_ANSWER_MAX_SENTENCES = int(os.getenv("LLM_ANSWER_MAX_SENTENCES", 3))  # Distinct sentences an answer keeps; decoding stops there (0: no limit)
+    LLM_BATCHING_ENABLED = os.getenv("LLM_BATCHING_ENABLED", "true").lower() == "true"
+    LLM_MAX_BATCH_SIZE = int(os.getenv("LLM_MAX_BATCH_SIZE", 8))  # Prompts per generate() call
+    LLM_BATCH_MAX_WAIT_MS = float(os.getenv("LLM_BATCH_MAX_WAIT_MS", 20))  # Window to gather concurrent prompts
+    LLM_WARMUP_ON_STARTUP = os.getenv("LLM_WARMUP_ON_STARTUP", "false").lower() == "true"  # Load the model in the background at startup
+    LLM_LOAD_WAIT_SECONDS = float(os.getenv("LLM_LOAD_WAIT_SECONDS", 0))  # With warm-up: how long /chat/llm waits before a 503
+    LLM_RETRY_AFTER_SECONDS = int(os.getenv("LLM_RETRY_AFTER_SECONDS", 10))  # Retry-After sent with that 503
+    LLM_IDLE_UNLOAD_SECONDS = float(os.getenv("LLM_IDLE_UNLOAD_SECONDS", 0))  # Unload the LLM after this long unused (0: never)
+    MODEL_MEMORY_BUDGET_BYTES = int(os.getenv("MODEL_MEMORY_BUDGET_BYTES", 0))  # Unload the LLM while process RSS is above this (0: no budget)
+    MODEL_RESIDENCY_CHECK_INTERVAL_SECONDS = float(os.getenv("MODEL_RESIDENCY_CHECK_INTERVAL_SECONDS", 30))
+
+    # Shared model server (model_server.py): one process holds the models for every API worker
+    MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET", "")  # Unix socket path; empty: each worker loads its own models
+    MODEL_SERVER_TIMEOUT_SECONDS = float(os.getenv("MODEL_SERVER_TIMEOUT_SECONDS", 300))  # Per request; generation can be slow
+    MODEL_SERVER_CONNECT_TIMEOUT_SECONDS = float(os.getenv("MODEL_SERVER_CONNECT_TIMEOUT_SECONDS", 120))  # Workers wait this long for it at startup
+    MODEL_SERVER_QUERY_BATCH_SIZE = int(os.getenv("MODEL_SERVER_QUERY_BATCH_SIZE", 32))  # Queries per shared encoder call
+    MODEL_SERVER_QUERY_BATCH_WAIT_MS = float(os.getenv("MODEL_SERVER_QUERY_BATCH_WAIT_MS", 5))
+    MODEL_SERVER_BACKLOG = int(os.getenv("MODEL_SERVER_BACKLOG", 128))  # Pending connections before clients back off
     
     # Vector Database Configuration
     CHUNK_SIZE = 1000
-    CHUNK_OVERLAP = 200 
\ No newline at end of file
+    CHUNK_OVERLAP = 200
+    
+    # Embedding Configuration
+    EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 256))  # Chunks embedded and inserted per batch
+    EMBEDDING_ENCODE_BATCH_SIZE = int(os.getenv("EMBEDDING_ENCODE_BATCH_SIZE", 64))  # sentence-transformers forward batch
+    # torch's thread count is process-wide and every concurrent ingest embeds at once, so split the cores between them
+    EMBEDDING_NUM_THREADS = int(os.getenv("EMBEDDING_NUM_THREADS", max(1, (os.cpu_count() or 1) // max(1, INGEST_MAX_WORKERS))))
+    EMBEDDING_INFERENCE_BACKEND = os.getenv("EMBEDDING_INFERENCE_BACKEND", "torch")  # "torch", "int8", "onnx" or "onnx_int8"
+    
+    # Inference backends for the LLM; ONNX exports are cached under ONNX_MODEL_DIR
+    LLM_INFERENCE_BACKEND = os.getenv("LLM_INFERENCE_BACKEND", "torch")  # "torch", "int8" or "onnx" (needs optimum[onnxruntime])
+    LLM_NUM_THREADS = int(os.getenv("LLM_NUM_THREADS", os.cpu_count() or 1))  # ONNX Runtime intra-op threads for generation
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./onnx_models")
+    
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache")
+    
+    # Query Embedding Cache Configuration
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 1024))  # 0 disables the cache
+    QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", 3600)) 
+    
+    # /chat result cache, keyed by (normalized question, k, mode, collection version)
+    RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")  # "memory", "sqlite" or "none"
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 512))
+    RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", 0))  # 0: kept until evicted or the corpus changes
+    RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "./cache/results.sqlite")
+    
+    # Semantic answer cache for the LLM path
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", 256))
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))  # Cosine similarity needed for a hit
@@ -0,0 +1,147 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Columns callers may set through register()/update(); timings is stored as JSON
+_FIELDS = (
+    "filename", "file_path", "file_size", "file_hash", "status",
+    "pages", "num_chunks", "chunks_stored", "timings"
+)
+
+class DocumentRegistry:
+    """SQLite table of ingested files, so per-file lookups never touch the vector store"""
+
+    # One row per uploaded file: status goes processing -> ready (or failed).
+    # Several components open their own registry on the same file.
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "file_id TEXT PRIMARY KEY, filename TEXT, file_path TEXT, file_size INTEGER DEFAULT 0, "
+            "file_hash TEXT, status TEXT DEFAULT 'processing', pages INTEGER DEFAULT 0, "
+            "num_chunks INTEGER DEFAULT 0, chunks_stored INTEGER DEFAULT 0, timings TEXT DEFAULT '{}', "
+            "created_at REAL, updated_at REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS documents_hash ON documents (file_hash)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS documents_created ON documents (created_at)")
+        self.db.commit()
+
+    @staticmethod
+    def _row_to_dict(cursor: sqlite3.Cursor, row: tuple) -> Dict[str, Any]:
+        record = {column[0]: value for column, value in zip(cursor.description, row)}
+        record["timings"] = json.loads(record.get("timings") or "{}")
+        return record
+
+    def register(self, file_id: str, **fields):
+        """Insert a file record (or reset an existing one) in the processing state"""
+        now = time.time()
+        values = {"status": "processing", **fields}
+        columns = [key for key in _FIELDS if key in values]
+        params = [json.dumps(values[key]) if key == "timings" else values[key] for key in columns]
+        with self._lock:
+            self.db.execute(
+                f"INSERT OR REPLACE INTO documents (file_id, {', '.join(columns)}, created_at, updated_at) "
+                f"VALUES (?, {', '.join('?' * len(columns))}, ?, ?)",
+                [file_id, *params, now, now]
+            )
+            self.db.commit()
+
+    def update(self, file_id: str, timings: Optional[Dict[str, float]] = None, **fields):
+        """Set columns on a file record; timings are merged into the stored ones"""
+        unknown = set(fields) - set(_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown registry fields: {', '.join(sorted(unknown))}")
+        with self._lock:
+            if timings:
+                row = self.db.execute("SELECT timings FROM documents WHERE file_id = ?", (file_id,)).fetchone()
+                merged = {**json.loads(row[0] or "{}"), **timings} if row else dict(timings)
+                fields["timings"] = json.dumps(merged)
+            assignments = ", ".join(f"{key} = ?" for key in fields)
+            self.db.execute(
+                f"UPDATE documents SET {assignments}{', ' if assignments else ''}updated_at = ? WHERE file_id = ?",
+                [*fields.values(), time.time(), file_id]
+            )
+            self.db.commit()
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Get one file record"""
+        with self._lock:
+            cursor = self.db.execute("SELECT * FROM documents WHERE file_id = ?", (file_id,))
+            row = cursor.fetchone()
+            return self._row_to_dict(cursor, row) if row else None
+
+    def find_by_hash(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Get the ingested file with this content hash, if any"""
+        with self._lock:
+            cursor = self.db.execute(
+                "SELECT * FROM documents WHERE file_hash = ? AND status = 'ready' ORDER BY created_at LIMIT 1",
+                (file_hash,)
+            )
+            row = cursor.fetchone()
+            return self._row_to_dict(cursor, row) if row else None
+
+    def list(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        filename: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """List file records, oldest first"""
+        clauses, params = [], []
+        if filename:
+            clauses.append("filename = ?")
+            params.append(filename)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            cursor = self.db.execute(
+                f"SELECT * FROM documents {where} ORDER BY created_at, file_id LIMIT ? OFFSET ?",
+                [*params, limit, offset]
+            )
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+    def remove(self, file_id: str):
+        """Delete a file record"""
+        with self._lock:
+            self.db.execute("DELETE FROM documents WHERE file_id = ?", (file_id,))
+            self.db.commit()
+
+    def clear(self):
+        """Delete every file record"""
+        with self._lock:
+            self.db.execute("DELETE FROM documents")
+            self.db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get file, page, chunk and byte totals"""
+        with self._lock:
+            files, pages, chunks, size = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(pages), 0), COALESCE(SUM(num_chunks), 0), "
+                "COALESCE(SUM(file_size), 0) FROM documents WHERE status = 'ready'"
+            ).fetchone()
+            statuses = dict(self.db.execute("SELECT status, COUNT(*) FROM documents GROUP BY status").fetchall())
+            return {
+                "path": self.path,
+                "files": files,
+                "pages": pages,
+                "chunks": chunks,
+                "bytes": size,
+                "statuses": statuses
+            }
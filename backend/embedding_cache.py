@@ -0,0 +1,169 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+class EmbeddingCache:
+    """On-disk cache of chunk embeddings keyed by hash(model name, chunk text)"""
+
+    def __init__(self, directory: str, model_name: str):
+        self.directory = directory
+        self.model_name = model_name
+        
+        # Vectors are an append-only float32 file read through a memory map and
+        # index.tsv maps each key to its row. Both are only appended to, so a
+        # crash can at worst leave an unindexed trailing row. API workers may
+        # share the directory: appends hold an flock on "lock" and take their
+        # row numbers from the vectors file size, and every process picks up
+        # index lines the others appended.
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.index_path = os.path.join(directory, "index.tsv")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock_path = os.path.join(directory, "lock")
+
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._index_offset = 0
+        self._matrix: Optional[np.memmap] = None
+        self.dim: Optional[int] = None
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock across every process using this cache directory"""
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self):
+        """Read dimension, row count and index from disk"""
+        with self._lock, self._file_lock():
+            self._sync()
+            if self.dim is not None and os.path.exists(self.vectors_path):
+                # Drop a partially written trailing row so appends stay aligned
+                with open(self.vectors_path, "r+b") as f:
+                    f.truncate(self.rows * self.dim * 4)
+        if self._index:
+            print(f"Loaded embedding cache with {len(self._index)} vectors from {self.directory}")
+
+    def _sync(self):
+        """Pick up the dimension, rows and index lines written since the last call (caller holds _lock)"""
+        if self.dim is None:
+            if not os.path.exists(self.meta_path):
+                return
+            with open(self.meta_path) as f:
+                self.dim = json.load(f)["dim"]
+
+        if os.path.exists(self.vectors_path):
+            self.rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            data = f.read()
+        # Another process may be mid-append: only take complete lines
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].decode("utf-8", errors="replace").splitlines():
+            key, _, row = line.partition("\t")
+            # A crashed writer can leave a torn line; skip it
+            if row.isdigit() and int(row) < self.rows:
+                self._index[key] = int(row)
+        self._index_offset += complete
+
+    def _open_matrix(self) -> Optional[np.memmap]:
+        """(Re)map the vectors file after it has grown"""
+        if self.rows == 0:
+            return None
+        if self._matrix is None or self._matrix.shape[0] != self.rows:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+        return self._matrix
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return cached vectors in input order, None where missing"""
+        keys = [self._key(text) for text in texts]
+        with self._lock:
+            self._sync()
+            matrix = self._open_matrix()
+            results: List[Optional[List[float]]] = []
+            for key in keys:
+                row = self._index.get(key)
+                if row is None or matrix is None:
+                    results.append(None)
+                    self.misses += 1
+                else:
+                    results.append(matrix[row].tolist())
+                    self.hits += 1
+            return results
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]):
+        """Append new vectors and index them"""
+        if not texts:
+            return
+
+        array = np.asarray(vectors, dtype=np.float32)
+        with self._lock, self._file_lock():
+            # Rows other processes appended since our last look come first
+            self._sync()
+            if self.dim is None:
+                self.dim = int(array.shape[1])
+                with open(self.meta_path, "w") as f:
+                    json.dump({"dim": self.dim, "model_name": self.model_name}, f)
+            elif array.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {array.shape[1]} does not match cache dimension {self.dim}")
+
+            new_rows = []
+            index_lines = []
+            for text, vector in zip(texts, array):
+                key = self._key(text)
+                if key in self._index:
+                    continue
+                # self.rows was just taken from the vectors file size, under the file lock
+                self._index[key] = self.rows + len(new_rows)
+                index_lines.append(f"{key}\t{self._index[key]}\n")
+                new_rows.append(vector)
+
+            if not new_rows:
+                return
+
+            # Vectors first, then the index, so indexed rows always exist
+            with open(self.vectors_path, "r+b" if os.path.exists(self.vectors_path) else "wb") as f:
+                # Write at the row boundary, over any partial row a crashed writer left
+                f.seek(self.rows * self.dim * 4)
+                f.write(np.stack(new_rows).tobytes())
+                f.truncate()
+            with open(self.index_path, "a+b") as f:
+                # Start on a fresh line if a crashed writer left a torn one
+                if f.tell() and os.pread(f.fileno(), 1, f.tell() - 1) != b"\n":
+                    f.write(b"\n")
+                f.write("".join(index_lines).encode("utf-8"))
+            self.rows += len(new_rows)
+            self._index_offset = os.path.getsize(self.index_path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "vectors": len(self._index),
+                "dim": self.dim,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,100 @@
+from typing import Any, Dict, List, Optional
+
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+from config import Config
+
+def sentence_key(sentence: str) -> Optional[str]:
+    """Comparison key for a generated sentence, or None if it is too short to count"""
+    sentence = sentence.strip()
+    if len(sentence) <= 10:
+        return None
+    return ' '.join(sentence.split()[:10]).lower()
+
+def has_token_loop(tokens: List[int], max_period: int, min_repeats: int) -> bool:
+    """True if the sequence ends with some span of up to max_period tokens repeated min_repeats times"""
+    for period in range(1, max_period + 1):
+        span = period * min_repeats
+        if len(tokens) < span:
+            break
+        tail = tokens[-span:]
+        if all(tail[i] == tail[i % period] for i in range(period, span)):
+            return True
+    return False
+
+class LoopStoppingCriteria(StoppingCriteria):
+    """Stops each sequence once it loops, repeats a sentence or has all the sentences the answer keeps"""
+
+    # One instance per generate() call: it records why each row of the batch stopped
+    def __init__(self, tokenizer, max_period: int, min_repeats: int, max_sentences: int):
+        self.tokenizer = tokenizer
+        self.max_period = max_period
+        self.min_repeats = min_repeats
+        self.max_sentences = max_sentences
+        self.stop_reasons: Dict[int, str] = {}
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        done = []
+        for row, ids in enumerate(input_ids.tolist()):
+            if row not in self.stop_reasons:
+                reason = self._check(ids)
+                if reason is not None:
+                    self.stop_reasons[row] = reason
+            done.append(row in self.stop_reasons)
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+    def _check(self, ids: List[int]) -> Optional[str]:
+        # Rows that already emitted EOS are only padded from here on
+        if self.tokenizer.eos_token_id in ids:
+            return None
+        tokens = [token for token in ids if token != self.tokenizer.pad_token_id]
+        if not tokens:
+            return None
+        if self.min_repeats > 1 and has_token_loop(tokens, self.max_period, self.min_repeats):
+            return "token_loop"
+
+        # Sentence checks only run when the newest token closes a sentence
+        if "." not in self.tokenizer.decode(tokens[-1:], skip_special_tokens=True):
+            return None
+        text = self.tokenizer.decode(tokens, skip_special_tokens=True)
+        keys = [key for key in map(sentence_key, text.split('.')[:-1]) if key]
+        if len(keys) != len(set(keys)):
+            return "repeated_sentence"
+        if self.max_sentences and len(keys) >= self.max_sentences:
+            return "max_sentences"
+        return None
+
+def generation_kwargs(tokenizer) -> tuple:
+    """generate() arguments for the configured policy, and the criteria that will record stop reasons"""
+    criteria = LoopStoppingCriteria(
+        tokenizer,
+        max_period=Config.LLM_LOOP_MAX_PERIOD,
+        min_repeats=Config.LLM_LOOP_MIN_REPEATS,
+        max_sentences=Config.LLM_ANSWER_MAX_SENTENCES
+    )
+    kwargs = {
+        "max_new_tokens": Config.LLM_MAX_NEW_TOKENS,
+        "do_sample": True,
+        "temperature": Config.TEMPERATURE,
+        "stopping_criteria": StoppingCriteriaList([criteria])
+    }
+    if Config.LLM_NO_REPEAT_NGRAM_SIZE > 0:
+        kwargs["no_repeat_ngram_size"] = Config.LLM_NO_REPEAT_NGRAM_SIZE
+    return kwargs, criteria
+
+def generation_result(tokenizer, ids: List[int], criteria: LoopStoppingCriteria, row: int) -> Dict[str, Any]:
+    """Decoded text, tokens generated and why decoding stopped, for one row of generate() output"""
+    # The first position is the decoder start token, which is not generated
+    generated = [token for token in ids[1:] if token != tokenizer.pad_token_id]
+    if row in criteria.stop_reasons:
+        stop_reason = criteria.stop_reasons[row]
+    elif tokenizer.eos_token_id in generated:
+        stop_reason = "eos"
+    else:
+        stop_reason = "max_new_tokens"
+    return {
+        "text": tokenizer.decode(ids, skip_special_tokens=True),
+        "generated_tokens": len(generated),
+        "stop_reason": stop_reason
+    }
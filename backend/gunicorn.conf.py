@@ -0,0 +1,48 @@
+"""
+Gunicorn settings for multi-worker deployments:
+
+    gunicorn -c gunicorn.conf.py main:app
+
+When MODEL_SERVER_SOCKET is set, the master starts model_server.py before
+forking workers, so the models are loaded once per host instead of once per
+worker; the workers wait for its socket while they start.
+
+Workers share the models (through the model server), the document registry,
+background jobs, the embedding cache and the collection version. Each worker
+still loads its own copy of the vector index and keyword postings and keeps
+its own chat memory: documents ingested or deleted through one worker are not
+seen by the others' searches until they restart. Hence one worker by default;
+raise WEB_CONCURRENCY only when the corpus changes offline (e.g. ingest, then
+restart) or uploads go through a single dedicated worker.
+"""
+
+import os
+import subprocess
+import sys
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+# The first request in a worker can wait on the model server's initial load
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 180))
+
+model_server = None
+
+def on_starting(server):
+    global model_server
+    socket_path = os.getenv("MODEL_SERVER_SOCKET")
+    if not socket_path:
+        return
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_server.py")
+    server.log.info(f"Starting model server on {socket_path}")
+    model_server = subprocess.Popen([sys.executable, script], cwd=os.path.dirname(script))
+
+def on_exit(server):
+    if model_server is None or model_server.poll() is not None:
+        return
+    server.log.info("Stopping model server")
+    model_server.terminate()
+    try:
+        model_server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        model_server.kill()
@@ -0,0 +1,221 @@
+import json
+import os
+from typing import Any, List
+
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+try:
+    import onnxruntime as ort
+except ImportError:  # onnxruntime is optional; the torch backends need nothing extra
+    ort = None
+
+def quantize_int8(model):
+    """Replace nn.Linear layers with dynamically quantized int8 ones (activations quantized per call)"""
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+    return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def ort_session_options(num_threads: int):
+    """ONNX Runtime options for one CPU session: intra-op threads only, all graph optimizations"""
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = num_threads
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return options
+
+def _export_dir(config, model_name: str) -> str:
+    return os.path.join(config.ONNX_MODEL_DIR, model_name.replace("/", "--"))
+
+def _pooled_encoder(auto_model):
+    """Transformer + mean pooling + L2 normalization as one traceable module"""
+    import torch
+
+    class PooledEncoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            hidden = self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=torch.zeros_like(input_ids)
+            ).last_hidden_state
+            mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            return torch.nn.functional.normalize(pooled, dim=-1)
+
+    return PooledEncoder(auto_model).eval()
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence-transformers embeddings served by an ONNX Runtime session"""
+
+    # The model is exported once (and optionally int8-quantized) into export_dir;
+    # pooling and normalization are part of the graph, so a call is tokenize + one run().
+    def __init__(self, model_name: str, export_dir: str, quantize: bool, num_threads: int, batch_size: int):
+        if ort is None:
+            raise ImportError("onnxruntime is required for the onnx embedding backends")
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        model_path = self._export(model_name, export_dir)
+        if quantize:
+            model_path = self._quantize(model_path)
+
+        with open(os.path.join(export_dir, "export.json")) as f:
+            self.max_seq_length = json.load(f)["max_seq_length"]
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        self.session = ort.InferenceSession(
+            model_path,
+            sess_options=ort_session_options(num_threads),
+            providers=["CPUExecutionProvider"]
+        )
+        self.model_path = model_path
+        self.model_bytes = os.path.getsize(model_path)
+
+    @staticmethod
+    def _export(model_name: str, export_dir: str) -> str:
+        model_path = os.path.join(export_dir, "model.onnx")
+        if os.path.exists(model_path):
+            return model_path
+
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        print(f"Exporting {model_name} to ONNX...")
+        st_model = SentenceTransformer(model_name, device="cpu")
+        # Older sentence-transformers spell the pooling mode as pooling_mode_mean_tokens
+        pooling = st_model[1].get_config_dict()
+        if not (pooling.get("pooling_mode") == "mean" or pooling.get("pooling_mode_mean_tokens")):
+            raise ValueError(f"{model_name} does not use mean pooling; the ONNX export only covers mean-pooled models")
+        auto_model = st_model[0].auto_model
+        if hasattr(auto_model, "set_attn_implementation"):
+            # Eager attention exports to the MatMul/Softmax pattern ONNX Runtime optimizes best
+            auto_model.set_attn_implementation("eager")
+        encoder = _pooled_encoder(auto_model)
+
+        # A padded example so the attention-mask path is traced, not folded away
+        sample = st_model.tokenizer(["a short one", "a somewhat longer example sentence"], padding=True, return_tensors="pt")
+        os.makedirs(export_dir, exist_ok=True)
+        tmp_path = model_path + ".tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                encoder,
+                (sample["input_ids"], sample["attention_mask"]),
+                tmp_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["embedding"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "embedding": {0: "batch"}
+                },
+                opset_version=17,
+                dynamo=False
+            )
+        st_model.tokenizer.save_pretrained(export_dir)
+        with open(os.path.join(export_dir, "export.json"), "w") as f:
+            json.dump({"model_name": model_name, "max_seq_length": st_model.max_seq_length}, f)
+        os.replace(tmp_path, model_path)
+        return model_path
+
+    @staticmethod
+    def _quantize(model_path: str) -> str:
+        quantized_path = model_path.replace(".onnx", "_int8.onnx")
+        if not os.path.exists(quantized_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            print(f"Quantizing {model_path} to int8...")
+            quantize_dynamic(model_path, quantized_path + ".tmp", weight_type=QuantType.QInt8)
+            os.replace(quantized_path + ".tmp", quantized_path)
+        return quantized_path
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        # Longest first, like sentence-transformers, so each batch pads to similar lengths
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            tokens = self.tokenizer(
+                [texts[i] for i in rows],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            output = self.session.run(None, {
+                "input_ids": tokens["input_ids"].astype(np.int64),
+                "attention_mask": tokens["attention_mask"].astype(np.int64)
+            })[0]
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), output.shape[1]), dtype=np.float32)
+            vectors[rows] = output
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._encode([text.replace("\n", " ") for text in texts]).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+def create_embeddings(backend: str, config) -> Any:
+    """Build the embedding model for the inference backend selected in Config"""
+    if backend in ("torch", "int8"):
+        embeddings = HuggingFaceEmbeddings(
+            model_name=config.EMBEDDING_MODEL_NAME,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={
+                'normalize_embeddings': True,
+                'batch_size': config.EMBEDDING_ENCODE_BATCH_SIZE
+            }
+        )
+        if backend == "int8":
+            embeddings.client = quantize_int8(embeddings.client)
+        return embeddings
+    if backend in ("onnx", "onnx_int8"):
+        return OnnxEmbeddings(
+            config.EMBEDDING_MODEL_NAME,
+            _export_dir(config, config.EMBEDDING_MODEL_NAME),
+            quantize=backend == "onnx_int8",
+            num_threads=config.EMBEDDING_NUM_THREADS,
+            batch_size=config.EMBEDDING_ENCODE_BATCH_SIZE
+        )
+    raise ValueError(f"Unknown embedding inference backend: {backend}")
+
+def load_seq2seq_model(backend: str, config) -> Any:
+    """Load the generation model for the inference backend selected in Config"""
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError:
+            raise ImportError("optimum[onnxruntime] is required for the onnx LLM backend")
+        export_dir = _export_dir(config, config.MODEL_NAME)
+        options = ort_session_options(config.LLM_NUM_THREADS)
+        if os.path.exists(os.path.join(export_dir, "config.json")):
+            return ORTModelForSeq2SeqLM.from_pretrained(export_dir, session_options=options, provider="CPUExecutionProvider")
+        print(f"Exporting {config.MODEL_NAME} to ONNX...")
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            config.MODEL_NAME,
+            export=True,
+            token=config.HUGGINGFACE_API_TOKEN,
+            session_options=options,
+            provider="CPUExecutionProvider"
+        )
+        model.save_pretrained(export_dir)
+        return model
+    if backend in ("torch", "int8"):
+        from transformers import AutoModelForSeq2SeqLM
+        model = AutoModelForSeq2SeqLM.from_pretrained(
+            config.MODEL_NAME,
+            token=config.HUGGINGFACE_API_TOKEN,
+            low_cpu_mem_usage=True,
+            torch_dtype="auto",
+            device_map="cpu"
+        )
+        return quantize_int8(model) if backend == "int8" else model
+    raise ValueError(f"Unknown LLM inference backend: {backend}")
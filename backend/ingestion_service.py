@@ -0,0 +1,293 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable
+
+from config import Config
+from job_store import JobStore
+from pdf_processor import PDFProcessor
+from vector_store import VectorStore
+
+# Job stages are reported in this order: saved, extracted, chunked, embedded, persisted
+
+class IngestionService:
+    """Runs PDF parsing, chunking and embedding on a bounded worker pool"""
+
+    def __init__(self, pdf_processor: PDFProcessor, vector_store: VectorStore):
+        self.pdf_processor = pdf_processor
+        self.vector_store = vector_store
+
+        # PDF parsing is pure Python and holds the GIL; only the torch embedding
+        # calls release it, so concurrent ingests overlap their embedding and
+        # not their parsing. A small thread pool still keeps the event loop free
+        # without paying for process start-up (large PDFs are extracted in
+        # worker processes, see PARALLEL_EXTRACTION_MIN_PAGES).
+        self.max_workers = max(1, Config.INGEST_MAX_WORKERS)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="ingest"
+        )
+
+        self._lock = threading.Lock()
+        self._active = 0
+
+        # Background jobs live in SQLite so every worker can report them and
+        # queued work survives a restart; whichever worker claims a job runs it
+        self.jobs = JobStore(Config.INGEST_JOBS_PATH)
+        self.worker_id = os.getpid()
+        self._resume_jobs()
+
+    def ingest(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+        """Process a PDF and add its chunks to the vector store (blocking)"""
+        with self._lock:
+            self._active += 1
+        try:
+            file_hash = self.pdf_processor.compute_file_hash(file_content)
+            existing = self.vector_store.find_document_by_hash(file_hash)
+            if existing:
+                return self._duplicate_result(existing)
+            
+            file_path = self.pdf_processor.save_uploaded_file(file_content, filename)
+            return self._run_pipeline(file_path, filename, file_hash)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _run_pipeline(
+        self,
+        file_path: str,
+        filename: str,
+        file_hash: Optional[str],
+        progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Stream a stored PDF through extract -> chunk -> embed -> persist"""
+        result = self.pdf_processor.process_saved_pdf(
+            file_path, filename, progress_callback=progress_callback, file_hash=file_hash
+        )
+        file_id = result["metadata"]["file_id"]
+        try:
+            chunk_ids = self.vector_store.add_documents(result["chunks"], progress_callback=progress_callback)
+        except Exception:
+            # Batches inserted before the failure would otherwise be orphaned
+            try:
+                self.vector_store.delete_documents_by_metadata({"file_id": file_id})
+            except Exception as cleanup_error:
+                print(f"Error removing partial chunks: {cleanup_error}")
+            self.pdf_processor.cleanup_file(file_path)
+            self._set_file_status(file_id, "failed")
+            raise
+
+        # Files without extractable text add no chunks but are still done
+        self._set_file_status(file_id, "ready")
+
+        result["chunk_ids"] = chunk_ids
+        result["num_chunks"] = result["stats"]["num_chunks"]
+        result["num_pages"] = result["stats"]["pages"]
+        result["duplicate"] = False
+        return result
+
+    def _set_file_status(self, file_id: str, status: str):
+        """Set a file's registry status once its ingest has finished or failed"""
+        try:
+            self.vector_store.registry.update(file_id, status=status)
+        except Exception as e:
+            print(f"Error updating document registry for {file_id}: {e}")
+
+    def _duplicate_result(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Build an ingest result pointing at an already stored file's registry record"""
+        print(f"Skipping re-upload of {record.get('filename')} (file_id {record['file_id']})")
+        return {
+            "file_path": record.get("file_path") or "",
+            "chunks": [],
+            "chunk_ids": [],
+            "metadata": record,
+            "num_chunks": record.get("num_chunks", 0),
+            "num_pages": record.get("pages", 0),
+            "duplicate": True
+        }
+
+    async def ingest_async(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+        """Run ingest() on the worker pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.ingest, file_content, filename)
+
+    def submit_job(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+        """Save the upload and queue it for background ingestion"""
+        file_hash = self.pdf_processor.compute_file_hash(file_content)
+
+        # The same content is already queued or running: hand back that job
+        pending = self.jobs.find_pending(file_hash)
+        if pending:
+            return pending
+
+        job = {
+            "status": "queued",
+            "stage": "saved",
+            "filename": filename,
+            "file_path": "",
+            "file_hash": file_hash,
+            "file_size": len(file_content)
+        }
+
+        # Known content completes immediately without any parsing or embedding
+        existing = self.vector_store.find_document_by_hash(file_hash)
+        if existing:
+            duplicate = self._duplicate_result(existing)
+            job["status"] = "completed"
+            job["stage"] = "persisted"
+            job["file_path"] = duplicate["file_path"]
+            job["result"] = {
+                "file_id": existing["file_id"],
+                "num_chunks": duplicate["num_chunks"],
+                "file_path": duplicate["file_path"],
+                "duplicate": True
+            }
+        else:
+            job["file_path"] = self.pdf_processor.save_uploaded_file(file_content, filename)
+
+        job_id = str(uuid.uuid4())
+        self.jobs.create(job_id, **job)
+        if job["status"] == "queued":
+            self.executor.submit(self._run_job, job_id)
+        return self.jobs.get(job_id)
+
+    def delete_document(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Remove a file's chunks, its upload and its registry record"""
+        record = self.vector_store.registry.get(file_id)
+        if record is None:
+            return None
+        if record["status"] == "processing" and not self.is_abandoned(record):
+            raise RuntimeError(f"Document {file_id} is still being ingested")
+
+        chunks_deleted = self.vector_store.delete_documents_by_metadata({"file_id": file_id})
+        if record.get("file_path"):
+            self.pdf_processor.cleanup_file(record["file_path"])
+        self.vector_store.registry.remove(file_id)
+        return {**record, "chunks_deleted": chunks_deleted}
+
+    @staticmethod
+    def is_abandoned(record: Dict[str, Any]) -> bool:
+        """True for a "processing" record no ingest has touched for INGEST_STALE_SECONDS"""
+        # Ingests update the record every batch, so only a crashed worker leaves one this old
+        updated_at = record.get("updated_at") or record.get("created_at") or 0
+        return record["status"] == "processing" and time.time() - updated_at > Config.INGEST_STALE_SECONDS
+
+    def pending_file_paths(self) -> set:
+        """Uploads saved for jobs that have not finished yet, in any worker"""
+        return {os.path.abspath(job["file_path"]) for job in self.jobs.list_pending() if job.get("file_path")}
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a snapshot of a background ingestion job"""
+        return self.jobs.get(job_id)
+
+    def _run_job(self, job_id: str):
+        """Worker body for a queued ingestion job"""
+        # Every worker queues resumed jobs; only the one that claims a job runs it
+        if not self.jobs.claim(job_id, self.worker_id):
+            return
+        job = self.jobs.get(job_id)
+        with self._lock:
+            self._active += 1
+
+        stage_started = job["started_at"]
+        progress_so_far: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+
+        def on_progress(stage: str, progress: Dict[str, Any]):
+            nonlocal stage_started
+            now = time.time()
+            progress_so_far.update(progress)
+            # Batched stages report several times; accumulate their time
+            timings[stage] = round(timings.get(stage, 0) + now - stage_started, 3)
+            self.jobs.update(job_id, stage=stage, progress=progress_so_far, timings=timings)
+            stage_started = now
+
+        try:
+            result = self._run_pipeline(
+                job["file_path"], job["filename"], job.get("file_hash"), progress_callback=on_progress
+            )
+
+            timings["total"] = round(time.time() - job["started_at"], 3)
+            self.jobs.update(
+                job_id,
+                status="completed",
+                timings=timings,
+                result={
+                    "file_id": result["metadata"]["file_id"],
+                    "num_chunks": result["num_chunks"],
+                    "num_pages": result["num_pages"],
+                    "file_path": result["file_path"],
+                    "duplicate": False
+                }
+            )
+            print(f"Ingestion job {job_id} completed ({result['num_chunks']} chunks)")
+
+        except Exception as e:
+            print(f"Ingestion job {job_id} failed: {e}")
+            self.jobs.update(job_id, status="failed", error=str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._prune_jobs()
+
+    def _prune_jobs(self):
+        """Forget finished jobs older than INGEST_JOB_RETENTION_SECONDS"""
+        if Config.INGEST_JOB_RETENTION_SECONDS <= 0:
+            return
+        try:
+            self.jobs.prune(time.time() - Config.INGEST_JOB_RETENTION_SECONDS)
+        except Exception as e:
+            print(f"Error pruning ingestion jobs: {e}")
+
+    def _is_orphaned(self, job: Dict[str, Any]) -> bool:
+        """True for a running job whose worker is gone or has not reported for INGEST_STALE_SECONDS"""
+        if time.time() - (job["updated_at"] or 0) > Config.INGEST_STALE_SECONDS:
+            return True
+        owner = job.get("owner")
+        # This worker has only just started, so a job recorded under its pid is a previous process's
+        if not owner or owner == self.worker_id:
+            return True
+        try:
+            os.kill(owner, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def _resume_jobs(self):
+        """Re-queue work interrupted by a restart or a crashed worker"""
+        self._prune_jobs()
+        resumed: List[str] = []
+        for job in self.jobs.list_pending():
+            if not os.path.exists(job.get("file_path") or ""):
+                self.jobs.update(job["job_id"], status="failed", error="Uploaded file missing after restart")
+                continue
+            if job["status"] == "running":
+                if not self._is_orphaned(job) or not self.jobs.requeue(job["job_id"], job.get("owner")):
+                    continue
+            resumed.append(job["job_id"])
+
+        # Other workers queue the same jobs; the claim in _run_job picks one runner
+        for job_id in resumed:
+            self.executor.submit(self._run_job, job_id)
+        if resumed:
+            print(f"Resumed {len(resumed)} queued ingestion jobs")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker pool statistics"""
+        with self._lock:
+            active = self._active
+        return {
+            "max_workers": self.max_workers,
+            "active_jobs": active,
+            "jobs": self.jobs.count_by_status()
+        }
+
+    def shutdown(self):
+        """Stop accepting work and wait for running ingestions"""
+        # Queued jobs stay "queued" in the job store and are resumed on next start
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Columns stored as JSON text
+_JSON_FIELDS = ("progress", "timings", "result")
+# Columns callers may set through create()/update()
+_FIELDS = (
+    "status", "stage", "filename", "file_path", "file_hash", "file_size",
+    "progress", "timings", "result", "error", "owner", "started_at"
+)
+
+class JobStore:
+    """SQLite table of background ingestion jobs, shared by every worker process"""
+
+    # Status goes queued -> running -> completed (or failed). A job is run by
+    # whichever worker claims it first; owner is that worker's pid.
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, status TEXT, stage TEXT, filename TEXT, file_path TEXT, "
+            "file_hash TEXT, file_size INTEGER DEFAULT 0, progress TEXT DEFAULT '{}', "
+            "timings TEXT DEFAULT '{}', result TEXT, error TEXT, owner INTEGER, "
+            "created_at REAL, started_at REAL, updated_at REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, updated_at)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_hash ON jobs (file_hash)")
+        self.db.commit()
+
+    @staticmethod
+    def _row_to_dict(cursor: sqlite3.Cursor, row: tuple) -> Dict[str, Any]:
+        job = {column[0]: value for column, value in zip(cursor.description, row)}
+        for key in _JSON_FIELDS:
+            job[key] = json.loads(job[key]) if job.get(key) else ({} if key != "result" else None)
+        return job
+
+    @staticmethod
+    def _params(fields: Dict[str, Any]) -> List[Any]:
+        unknown = set(fields) - set(_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        return [json.dumps(value) if key in _JSON_FIELDS else value for key, value in fields.items()]
+
+    def create(self, job_id: str, **fields):
+        """Insert a new job record"""
+        now = time.time()
+        params = self._params(fields)
+        with self._lock:
+            self.db.execute(
+                f"INSERT INTO jobs (job_id, {', '.join(fields)}, created_at, updated_at) "
+                f"VALUES (?, {', '.join('?' * len(fields))}, ?, ?)",
+                [job_id, *params, now, now]
+            )
+            self.db.commit()
+
+    def update(self, job_id: str, **fields):
+        """Set columns on a job record"""
+        params = self._params(fields)
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self.db.execute(
+                f"UPDATE jobs SET {assignments}{', ' if assignments else ''}updated_at = ? WHERE job_id = ?",
+                [*params, time.time(), job_id]
+            )
+            self.db.commit()
+
+    def claim(self, job_id: str, owner: int) -> bool:
+        """Move a queued job to running for this owner; False if another worker got it first"""
+        now = time.time()
+        with self._lock:
+            cursor = self.db.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, started_at = ?, updated_at = ? "
+                "WHERE job_id = ? AND status = 'queued'",
+                (owner, now, now, job_id)
+            )
+            self.db.commit()
+            return cursor.rowcount == 1
+
+    def requeue(self, job_id: str, owner: Optional[int]) -> bool:
+        """Put a running job back in the queue, unless its owner changed meanwhile"""
+        with self._lock:
+            cursor = self.db.execute(
+                "UPDATE jobs SET status = 'queued', stage = 'saved', progress = '{}', timings = '{}', "
+                "owner = NULL, updated_at = ? WHERE job_id = ? AND status = 'running' AND owner IS ?",
+                (time.time(), job_id, owner)
+            )
+            self.db.commit()
+            return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get one job record"""
+        with self._lock:
+            cursor = self.db.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+            row = cursor.fetchone()
+            return self._row_to_dict(cursor, row) if row else None
+
+    def find_pending(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Get the queued or running job for this content hash, if any"""
+        with self._lock:
+            cursor = self.db.execute(
+                "SELECT * FROM jobs WHERE file_hash = ? AND status IN ('queued', 'running') "
+                "ORDER BY created_at LIMIT 1",
+                (file_hash,)
+            )
+            row = cursor.fetchone()
+            return self._row_to_dict(cursor, row) if row else None
+
+    def list_pending(self) -> List[Dict[str, Any]]:
+        """Queued and running jobs, oldest first"""
+        with self._lock:
+            cursor = self.db.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at, job_id"
+            )
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+    def prune(self, older_than: float) -> int:
+        """Delete completed and failed jobs last updated before this time"""
+        with self._lock:
+            cursor = self.db.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?",
+                (older_than,)
+            )
+            self.db.commit()
+            return cursor.rowcount
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        with self._lock:
+            return dict(self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
@@ -0,0 +1,159 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from langchain.schema import Document
+
+# Keeps identifiers such as "c++", "node.js", "v2.1.0" and "ci/cd" as single terms
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./_-]*")
+_TRAILING_PUNCTUATION = ".-/_"
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into index terms"""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        token = token.rstrip(_TRAILING_PUNCTUATION)
+        if token:
+            tokens.append(token)
+    return tokens
+
+class KeywordIndex:
+    """In-process BM25 inverted index over stored chunks, persisted next to Chroma"""
+
+    # Only term counts are kept (in memory and in SQLite); hit texts and metadata
+    # come from the vector store through fetch_chunks, so the corpus is not stored twice.
+    def __init__(
+        self,
+        path: str,
+        fetch_chunks: Callable[[List[str]], Dict[str, Any]],
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        self.path = path
+        self.fetch_chunks = fetch_chunks
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.RLock()
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.total_length = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS chunks (chunk_id TEXT PRIMARY KEY, terms TEXT)")
+        self.db.commit()
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _load(self):
+        """Rebuild postings from the stored term counts"""
+        try:
+            for chunk_id, terms in self.db.execute("SELECT chunk_id, terms FROM chunks"):
+                self._add_one(chunk_id, json.loads(terms))
+            if self.docs:
+                print(f"Loaded keyword index with {len(self.docs)} chunks from {self.path}")
+        except Exception as e:
+            print(f"Error loading keyword index, starting empty: {e}")
+            self.docs, self.postings, self.total_length = {}, {}, 0
+
+    def _add_one(self, chunk_id: str, term_counts: Dict[str, int]):
+        if chunk_id in self.docs:
+            self._remove_one(chunk_id)
+        length = sum(term_counts.values())
+        self.docs[chunk_id] = {"length": length, "terms": list(term_counts)}
+        self.total_length += length
+        for term, count in term_counts.items():
+            self.postings.setdefault(term, {})[chunk_id] = count
+
+    def _remove_one(self, chunk_id: str):
+        doc = self.docs.pop(chunk_id, None)
+        if doc is None:
+            return
+        self.total_length -= doc["length"]
+        for term in doc["terms"]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def add(self, ids: List[str], texts: List[str]):
+        """Index chunks (re-adding an id replaces it); only these rows are written"""
+        rows = [(chunk_id, dict(Counter(tokenize(text)))) for chunk_id, text in zip(ids, texts)]
+        with self._lock:
+            for chunk_id, term_counts in rows:
+                self._add_one(chunk_id, term_counts)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_id, terms) VALUES (?, ?)",
+                [(chunk_id, json.dumps(term_counts)) for chunk_id, term_counts in rows]
+            )
+            self.db.commit()
+
+    def remove(self, ids: Iterable[str]):
+        """Remove chunks by id"""
+        ids = list(ids)
+        with self._lock:
+            for chunk_id in ids:
+                self._remove_one(chunk_id)
+            self.db.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(chunk_id,) for chunk_id in ids])
+            self.db.commit()
+
+    def clear(self):
+        """Remove every chunk"""
+        with self._lock:
+            self.docs, self.postings, self.total_length = {}, {}, 0
+            self.db.execute("DELETE FROM chunks")
+            self.db.commit()
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """Rank chunks by BM25 score for the query terms"""
+        with self._lock:
+            num_docs = len(self.docs)
+            if num_docs == 0:
+                return []
+            avg_length = self.total_length / num_docs
+
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    length_norm = 1 - self.b + self.b * self.docs[chunk_id]["length"] / avg_length
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        if not ranked:
+            return []
+
+        stored = self.fetch_chunks([chunk_id for chunk_id, _ in ranked])
+        chunks = {
+            chunk_id: (text, metadata)
+            for chunk_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        }
+        return [
+            (Document(page_content=chunks[chunk_id][0], metadata=dict(chunks[chunk_id][1] or {})), score)
+            for chunk_id, score in ranked if chunk_id in chunks
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size"""
+        with self._lock:
+            return {
+                "path": self.path,
+                "chunks": len(self.docs),
+                "terms": len(self.postings)
+            }
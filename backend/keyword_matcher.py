@@ -0,0 +1,98 @@
+import hashlib
+import json
+from collections import deque
+from typing import Dict, List, Optional
+
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every taxonomy term in one pass over the text"""
+
+    # Text is lowercased and whitespace-collapsed before scanning. A match only
+    # counts when it is not glued to a letter or digit on either side, so "r"
+    # does not fire inside "react" and "go" does not fire inside "google".
+    def __init__(self, labels: Dict[str, str], name: str = "keywords", fingerprint: Optional[str] = None):
+        self.name = name
+        self.labels = {term.lower(): label for term, label in labels.items()}
+        self.fingerprint = fingerprint or hashlib.sha256(
+            json.dumps(sorted(self.labels.items())).encode("utf-8")
+        ).hexdigest()[:12]
+
+        # State 0 is the root; goto[state][char] -> state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for term in self.labels:
+            self._insert(term)
+        self._build_failure_links()
+
+    def _insert(self, term: str):
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(term)
+
+    def _build_failure_links(self):
+        """Breadth-first pass linking each state to its longest proper suffix state"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_terms(self, text: str) -> List[str]:
+        """Return the distinct terms found in the text, in order of first occurrence"""
+        text = " ".join(text.lower().split())
+        found: Dict[str, None] = {}
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for term in output[state]:
+                if term in found:
+                    continue
+                start = end - len(term) + 1
+                if term[0].isalnum() and start > 0 and text[start - 1].isalnum():
+                    continue
+                if term[-1].isalnum() and end + 1 < len(text) and text[end + 1].isalnum():
+                    continue
+                found[term] = None
+        return list(found)
+
+    def find_labels(self, text: str) -> List[str]:
+        """Return the sorted display labels of the terms found in the text"""
+        return sorted({self.labels[term] for term in self.find_terms(text)})
+
+def load_taxonomy(path: str) -> KeywordMatcher:
+    """Build a matcher from a taxonomy JSON file
+
+    The file holds {"name": ..., "terms": [...] or {"group": [...]}, "labels": {term: label}}.
+    Terms without an explicit label are shown title-cased.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    taxonomy = json.loads(raw)
+
+    terms = taxonomy.get("terms", [])
+    if isinstance(terms, dict):
+        terms = [term for group in terms.values() for term in group]
+    overrides = {term.lower(): label for term, label in taxonomy.get("labels", {}).items()}
+    labels = {term.lower(): overrides.get(term.lower(), term.title()) for term in terms}
+
+    return KeywordMatcher(
+        labels,
+        name=taxonomy.get("name", "keywords"),
+        fingerprint=hashlib.sha256(raw).hexdigest()[:12]
+    )
@@ -0,0 +1,113 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, List
+
+class MicroBatcher:
+    """Collects prompts arriving within a short window and generates them as one batch"""
+
+    def __init__(
+        self,
+        generate_fn: Callable[[List[str]], List[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        name: str = "llm-batcher"
+    ):
+        self.generate_fn = generate_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.prompts = 0
+        self.batch_size_counts: Dict[int, int] = {}
+        self.total_latency = 0.0
+        self.total_queue_wait = 0.0
+        self.last_batch: Dict[str, Any] = {}
+
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, prompt: str) -> Any:
+        """Queue a prompt and block until its batch has been generated"""
+        future: Future = Future()
+        self._queue.put((prompt, future, time.perf_counter()))
+        return future.result()
+
+    def _collect(self) -> List[tuple]:
+        """Block for the first prompt, then gather more until full or the window closes"""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch; the worker exits on the next collect
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        """Worker loop: one padded generate() call per collected batch"""
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            prompts = [item[0] for item in batch]
+            started = time.perf_counter()
+            try:
+                outputs = self.generate_fn(prompts)
+                if len(outputs) != len(prompts):
+                    raise RuntimeError(f"Expected {len(prompts)} generations, got {len(outputs)}")
+                for (_, future, _), output in zip(batch, outputs):
+                    future.set_result(output)
+            except Exception as e:
+                print(f"Error generating batch of {len(prompts)} prompts: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+            latency = time.perf_counter() - started
+            queue_wait = sum(started - item[2] for item in batch) / len(batch)
+            with self._stats_lock:
+                self.batches += 1
+                self.prompts += len(batch)
+                self.batch_size_counts[len(batch)] = self.batch_size_counts.get(len(batch), 0) + 1
+                self.total_latency += latency
+                self.total_queue_wait += queue_wait
+                self.last_batch = {
+                    "size": len(batch),
+                    "latency_ms": round(latency * 1000, 1),
+                    "avg_queue_wait_ms": round(queue_wait * 1000, 1)
+                }
+
+    def stop(self):
+        """Let the worker finish queued prompts, then exit"""
+        self._queue.put(None)
+        self._worker.join(timeout=30)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-batch size and latency metrics"""
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self.batches,
+                "prompts": self.prompts,
+                "queued": self._queue.qsize(),
+                "avg_batch_size": round(self.prompts / self.batches, 2) if self.batches else 0.0,
+                "avg_batch_latency_ms": round(self.total_latency / self.batches * 1000, 1) if self.batches else 0.0,
+                "avg_queue_wait_ms": round(self.total_queue_wait / self.batches * 1000, 1) if self.batches else 0.0,
+                "batch_size_histogram": dict(sorted(self.batch_size_counts.items())),
+                "last_batch": self.last_batch
+            }
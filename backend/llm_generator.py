@@ -0,0 +1,129 @@
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_community.llms import HuggingFacePipeline
+from transformers import pipeline, AutoTokenizer, TextIteratorStreamer
+
+from config import Config
+from llm_batcher import MicroBatcher
+from model_residency import module_bytes
+from inference_backends import load_seq2seq_model
+from generation_policy import generation_kwargs, generation_result
+
+class LocalGenerator:
+    """flan-t5 loaded in this process: batched generation, token streaming and token counts"""
+
+    def __init__(self):
+        # Load tokenizer and model with maximum memory optimization
+        print("Loading HuggingFace model...")
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            Config.MODEL_NAME,
+            token=Config.HUGGINGFACE_API_TOKEN,
+            low_cpu_mem_usage=True
+        )
+        self.model = load_seq2seq_model(Config.LLM_INFERENCE_BACKEND, Config)
+
+        # Force CPU usage (ONNX Runtime models are placed by their session provider)
+        device_kwargs = {} if Config.LLM_INFERENCE_BACKEND == "onnx" else {"device_map": "cpu"}
+
+        # Create pipeline for text generation with memory optimization
+        self.pipeline = pipeline(
+            "text2text-generation",
+            model=self.model,
+            tokenizer=self.tokenizer,
+            max_new_tokens=Config.LLM_MAX_NEW_TOKENS,
+            temperature=Config.TEMPERATURE,
+            do_sample=True,
+            **device_kwargs
+        )
+
+        # LangChain wrapper, used by the conversational QA chain
+        self.llm = HuggingFacePipeline(
+            pipeline=self.pipeline,
+            model_kwargs={"temperature": Config.TEMPERATURE, "max_new_tokens": Config.LLM_MAX_NEW_TOKENS}
+        )
+        print("HuggingFace model loaded successfully!")
+
+        # Concurrent requests share padded seq2seq batches
+        self.batcher = None
+        if Config.LLM_BATCHING_ENABLED:
+            self.batcher = MicroBatcher(
+                self.generate_batch,
+                max_batch_size=Config.LLM_MAX_BATCH_SIZE,
+                max_wait_ms=Config.LLM_BATCH_MAX_WAIT_MS
+            )
+
+    def generate_batch(self, prompts: List[str]) -> List[Dict[str, Any]]:
+        """Run several prompts through generate() as one padded batch"""
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, truncation=True, max_length=512)
+        kwargs, criteria = generation_kwargs(self.tokenizer)
+        output = self.model.generate(
+            input_ids=inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            **kwargs
+        )
+        return [generation_result(self.tokenizer, ids, criteria, row) for row, ids in enumerate(output.tolist())]
+
+    def generate(self, prompt: str) -> Dict[str, Any]:
+        """Generate for one prompt, through the micro-batcher when enabled
+
+        Returns the text, the number of tokens generated and why decoding stopped.
+        """
+        if self.batcher is not None:
+            return self.batcher.submit(prompt)
+        return self.generate_batch([prompt])[0]
+
+    def stream(self, prompt: str) -> Iterator[Dict[str, Any]]:
+        """Yield {"token": text} as generate() produces it, then {"generation": result without text}"""
+        inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=512)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        kwargs, criteria = generation_kwargs(self.tokenizer)
+        output, failure = [], []
+
+        def run_generation():
+            try:
+                output.append(self.model.generate(
+                    input_ids=inputs["input_ids"],
+                    attention_mask=inputs["attention_mask"],
+                    streamer=streamer,
+                    **kwargs
+                ))
+            except Exception as e:
+                # Unblock the consumer; the error is raised below
+                failure.append(e)
+                streamer.end()
+
+        # generate() pushes decoded text into the streamer from its own thread
+        generation = threading.Thread(target=run_generation, daemon=True)
+        generation.start()
+        for token_text in streamer:
+            if token_text:
+                yield {"token": token_text}
+        generation.join()
+        if failure:
+            raise failure[0]
+        result = generation_result(self.tokenizer, output[0][0].tolist(), criteria, 0)
+        del result["text"]
+        yield {"generation": result}
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def get_model_bytes(self) -> Optional[int]:
+        """Bytes held by the model's weights (None for ONNX Runtime models)"""
+        return module_bytes(self.model)
+
+    def get_batching_stats(self) -> Dict[str, Any]:
+        """Get micro-batching metrics"""
+        if self.batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.batcher.get_stats()}
+
+    def shutdown(self):
+        """Stop the batcher and drop model references so the memory can be reclaimed"""
+        if self.batcher is not None:
+            self.batcher.stop()
+            self.batcher = None
+        self.llm = None
+        self.pipeline = None
+        self.model = None
@@ -1,63 +1,40 @@
 import os
-from typing import List, Dict, Any, Optional
-from langchain_community.llms import HuggingFacePipeline
+import threading
+from typing import List, Dict, Any, Optional, Iterator
 from langchain.schema import Document, HumanMessage, SystemMessage
 from langchain.chains import ConversationalRetrievalChain
 from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
 
 from config import Config
 from vector_store import VectorStore
+from semantic_cache import SemanticCache
+from generation_policy import sentence_key
+from llm_generator import LocalGenerator
+from model_server import ModelServerClient, RemoteGenerator
 
 class LLMService:
-    def _initialize_huggingface_model(self):
-        """Initialize HuggingFace model locally with memory optimization"""
-        try:
-            # Load tokenizer and model with maximum memory optimization
-            tokenizer = AutoTokenizer.from_pretrained(
-                Config.MODEL_NAME, 
-                token=Config.HUGGINGFACE_API_TOKEN,
-                low_cpu_mem_usage=True
-            )
-            model = AutoModelForSeq2SeqLM.from_pretrained(
-                Config.MODEL_NAME,
-                token=Config.HUGGINGFACE_API_TOKEN,
-                low_cpu_mem_usage=True,
-                torch_dtype="auto",
-                device_map="cpu"
-            )
-            
-            # Create pipeline for text generation with memory optimization
-            text_generation_pipeline = pipeline(
-                "text2text-generation",
-                model=model,
-                tokenizer=tokenizer,
-                max_length=512,
-                temperature=Config.TEMPERATURE,
-                do_sample=True,
-                device_map="cpu"  # Force CPU usage
-            )
-            
-            # Create LangChain wrapper
-            llm = HuggingFacePipeline(
-                pipeline=text_generation_pipeline,
-                model_kwargs={"temperature": Config.TEMPERATURE, "max_length": 512}
-            )
-            
-            return llm
-            
-        except Exception as e:
-            print(f"Error loading HuggingFace model: {e}")
-            raise
-    
     def __init__(self, vector_store: VectorStore):
         self.vector_store = vector_store
         
-        # Initialize HuggingFace LLM
-        print("Loading HuggingFace model...")
-        self.llm = self._initialize_huggingface_model()
-        print("HuggingFace model loaded successfully!")
+        # Initialize HuggingFace LLM, in this process or behind the shared model server
+        if Config.MODEL_SERVER_SOCKET:
+            self.generator = RemoteGenerator(ModelServerClient(Config.MODEL_SERVER_SOCKET))
+        else:
+            self.generator = LocalGenerator()
+        self.llm = self.generator.llm
+        
+        # Tokens decoded versus tokens that survive into answers
+        self._generation_lock = threading.Lock()
+        self.generation_stats = {"responses": 0, "generated_tokens": 0, "kept_tokens": 0, "stop_reasons": {}}
+        
+        # Paraphrases of recently answered questions skip generation
+        self.semantic_cache = None
+        if Config.SEMANTIC_CACHE_ENABLED:
+            self.semantic_cache = SemanticCache(
+                max_size=Config.SEMANTIC_CACHE_SIZE,
+                threshold=Config.SEMANTIC_CACHE_THRESHOLD
+            )
         
         # Initialize conversation memory
         self.memory = ConversationBufferMemory(
@@ -76,6 +53,11 @@ class LLMService:
     
     def _create_qa_chain(self):
         """Create conversational retrieval chain"""
+        if self.llm is None:
+            raise ValueError("QA chain needs the LLM in this process, not available with the model server")
+        if self.vector_store.vector_store is None:
+            raise ValueError(f"QA chain needs a LangChain retriever, not available with the {Config.VECTOR_BACKEND} backend")
+        
         # Custom prompt template for T5 model - improved for better responses
         template = """Based on the context below, answer the question concisely. If the context doesn't contain relevant information, say "I don't have enough information to answer this question."
 
@@ -108,8 +90,20 @@ Answer:"""
     def get_response(self, question: str) -> Dict[str, Any]:
         """Get response for a question using RAG"""
         try:
+            cached, question_embedding, version = self._lookup_semantic_cache(question)
+            if cached is not None:
+                return {**cached, "question": question, "generation": {"generated_tokens": 0, "kept_tokens": 0, "stop_reasons": []}}
+            
             # Use the simple RAG approach directly for better reliability
-            return self._get_simple_rag_response(question)
+            response = self._get_simple_rag_response(question)
+            if self.semantic_cache is not None:
+                self.semantic_cache.set(
+                    question_embedding,
+                    version,
+                    {key: value for key, value in response.items() if key not in ("question", "generation")},
+                    tokens=response["generation"]["generated_tokens"]
+                )
+            return response
             
         except Exception as e:
             print(f"Error getting LLM response: {e}")
@@ -121,84 +115,145 @@ Answer:"""
                 "question": question
             }
     
-    def _get_simple_rag_response(self, question: str) -> Dict[str, Any]:
-        """Simple RAG response without conversation memory"""
-        try:
-            # Get relevant documents
-            relevant_docs = self.vector_store.similarity_search(question, k=3)
-            
-            # Debug: Print what documents were found
-            print(f"Found {len(relevant_docs)} relevant documents for question: {question}")
-            for i, doc in enumerate(relevant_docs):
-                print(f"Doc {i+1}: {doc.page_content[:200]}...")
-            
-            # Combine context
-            context = "\n".join([doc.page_content for doc in relevant_docs])
-            
-            # Limit context length to prevent token overflow
-            max_context_length = 1000  # characters
-            if len(context) > max_context_length:
-                context = context[:max_context_length] + "..."
-            
-            # Create a better prompt for T5 model
-            prompt = f"""Question: {question}
+    def _lookup_semantic_cache(self, question: str) -> tuple:
+        """Return (cached response or None, question embedding, corpus version)"""
+        if self.semantic_cache is None:
+            return None, None, None
+        # The query embedding is LRU-cached, so retrieval reuses it on a miss
+        question_embedding = self.vector_store.embed_query(question)
+        version = self.vector_store.collection_version
+        return self.semantic_cache.get(question_embedding, version), question_embedding, version
+    
+    def get_semantic_cache_stats(self) -> Dict[str, Any]:
+        """Get semantic answer cache counters"""
+        if self.semantic_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.semantic_cache.get_stats()}
+    
+    def _count_tokens(self, text: str) -> int:
+        return self.generator.count_tokens(text)
+    
+    def _generate(self, prompt: str) -> Dict[str, Any]:
+        """Generate for one prompt, through the micro-batcher when enabled"""
+        return self.generator.generate(prompt)
+    
+    def _record_generation(self, generations: List[Dict[str, Any]], answer: str) -> Dict[str, Any]:
+        """Summarize one response's generation passes and add them to the running totals"""
+        summary = {
+            "generated_tokens": sum(generation["generated_tokens"] for generation in generations),
+            "kept_tokens": self._count_tokens(answer),
+            "stop_reasons": [generation["stop_reason"] for generation in generations]
+        }
+        with self._generation_lock:
+            stats = self.generation_stats
+            stats["responses"] += 1
+            stats["generated_tokens"] += summary["generated_tokens"]
+            stats["kept_tokens"] += summary["kept_tokens"]
+            for reason in summary["stop_reasons"]:
+                stats["stop_reasons"][reason] = stats["stop_reasons"].get(reason, 0) + 1
+        return summary
+    
+    def get_generation_stats(self) -> Dict[str, Any]:
+        """Get tokens generated versus kept, and why decoding stopped"""
+        with self._generation_lock:
+            stats = {**self.generation_stats, "stop_reasons": dict(self.generation_stats["stop_reasons"])}
+        stats["wasted_tokens"] = max(0, stats["generated_tokens"] - stats["kept_tokens"])
+        stats["kept_ratio"] = round(stats["kept_tokens"] / stats["generated_tokens"], 3) if stats["generated_tokens"] else None
+        stats["policy"] = {
+            "max_new_tokens": Config.LLM_MAX_NEW_TOKENS,
+            "no_repeat_ngram_size": Config.LLM_NO_REPEAT_NGRAM_SIZE,
+            "loop_max_period": Config.LLM_LOOP_MAX_PERIOD,
+            "loop_min_repeats": Config.LLM_LOOP_MIN_REPEATS,
+            "answer_max_sentences": Config.LLM_ANSWER_MAX_SENTENCES
+        }
+        return stats
+    
+    def get_model_bytes(self) -> Optional[int]:
+        """Bytes held by the model's weights (None when they live elsewhere)"""
+        return self.generator.get_model_bytes()
+    
+    def shutdown(self):
+        """Stop the batcher and drop model references so the memory can be reclaimed"""
+        self.qa_chain = None
+        self.llm = None
+        self.generator.shutdown()
+    
+    def get_batching_stats(self) -> Dict[str, Any]:
+        """Get micro-batching metrics"""
+        return self.generator.get_batching_stats()
+    
+    def _retrieve_context(self, question: str) -> tuple:
+        """Retrieve relevant chunks and build a bounded context string"""
+        # Get relevant documents
+        relevant_docs = self.vector_store.similarity_search(question, k=3)
+        
+        # Debug: Print what documents were found
+        print(f"Found {len(relevant_docs)} relevant documents for question: {question}")
+        for i, doc in enumerate(relevant_docs):
+            print(f"Doc {i+1}: {doc.page_content[:200]}...")
+        
+        # Combine context
+        context = "\n".join([doc.page_content for doc in relevant_docs])
+        
+        # Limit context length to prevent token overflow
+        max_context_length = 1000  # characters
+        if len(context) > max_context_length:
+            context = context[:max_context_length] + "..."
+        
+        return relevant_docs, context
+    
+    def _build_prompt(self, question: str, context: str) -> str:
+        """Create a prompt suited to the T5 model"""
+        return f"""Question: {question}
 
 Context: {context}
 
 Answer:"""
+    
+    def _deduplicate_sentences(self, answer: str) -> Optional[str]:
+        """Keep up to LLM_ANSWER_MAX_SENTENCES unique sentences, or None if none are meaningful"""
+        sentences = answer.split('.')
+        unique_sentences = []
+        seen_sentences = set()
+        
+        for sentence in sentences:
+            # Same key the stopping criteria use, so decoding stops where this would cut
+            simplified = sentence_key(sentence)
+            if simplified and simplified not in seen_sentences:  # Only consider meaningful sentences
+                unique_sentences.append(sentence.strip())
+                seen_sentences.add(simplified)
+        
+        if unique_sentences:
+            limit = Config.LLM_ANSWER_MAX_SENTENCES or len(unique_sentences)
+            return '. '.join(unique_sentences[:limit]) + '.'
+        return None
+    
+    def _get_simple_rag_response(self, question: str) -> Dict[str, Any]:
+        """Simple RAG response without conversation memory"""
+        try:
+            relevant_docs, context = self._retrieve_context(question)
+            prompt = self._build_prompt(question, context)
             
             # Get response from LLM
-            answer = self.llm(prompt)
+            generations = [self._generate(prompt)]
+            answer = generations[0]["text"]
             
             # Debug: Print the raw response
             print(f"Raw LLM response: '{answer}'")
             
             # Clean up the response - remove repetitions and take only unique content
             answer = answer.strip()
-            
-            # Remove repetitions by finding unique sentences
-            sentences = answer.split('.')
-            unique_sentences = []
-            seen_sentences = set()
-            
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if sentence and len(sentence) > 10:  # Only consider meaningful sentences
-                    # Create a simplified version for comparison
-                    simplified = ' '.join(sentence.split()[:10]).lower()
-                    if simplified not in seen_sentences:
-                        unique_sentences.append(sentence)
-                        seen_sentences.add(simplified)
-            
-            # Reconstruct answer with only unique content
-            if unique_sentences:
-                answer = '. '.join(unique_sentences[:3]) + '.'  # Limit to 3 sentences max
-            else:
-                # Fallback if no unique sentences found
-                answer = answer[:300]  # Limit to 300 characters
+            deduplicated = self._deduplicate_sentences(answer)
+            # Fallback if no unique sentences found
+            answer = deduplicated if deduplicated else answer[:300]
             
             # If answer is too short or repetitive, try a different approach
             if len(answer) < 50 or self._is_repetitive(answer):
                 # Try a more specific prompt for T5
-                prompt2 = f"""Question: {question}
-
-Context: {context}
-
-Answer:"""
-                answer = self.llm(prompt2).strip()
+                generations.append(self._generate(self._build_prompt(question, context)))
+                answer = generations[-1]["text"].strip()
                 # Apply same deduplication
-                sentences = answer.split('.')
-                unique_sentences = []
-                seen_sentences = set()
-                for sentence in sentences:
-                    sentence = sentence.strip()
-                    if sentence and len(sentence) > 10:
-                        simplified = ' '.join(sentence.split()[:10]).lower()
-                        if simplified not in seen_sentences:
-                            unique_sentences.append(sentence)
-                            seen_sentences.add(simplified)
-                if unique_sentences:
-                    answer = '. '.join(unique_sentences[:3]) + '.'
+                answer = self._deduplicate_sentences(answer) or answer
             
             # Process citations
             citations = self._process_citations(relevant_docs)
@@ -207,13 +262,60 @@ Answer:"""
                 "answer": answer,
                 "citations": citations,
                 "source_documents": relevant_docs,
-                "question": question
+                "question": question,
+                "generation": self._record_generation(generations, answer)
             }
             
         except Exception as e:
             print(f"Error in simple RAG response: {e}")
             raise
     
+    def stream_response(self, question: str) -> Iterator[Dict[str, Any]]:
+        """Yield citations, then generated tokens, then the cleaned answer"""
+        try:
+            cached, question_embedding, version = self._lookup_semantic_cache(question)
+            if cached is not None:
+                yield {"event": "citations", "data": cached["citations"]}
+                yield {"event": "token", "data": cached["answer"]}
+                yield {
+                    "event": "done",
+                    "data": {"answer": cached["answer"], "citations": cached["citations"], "question": question}
+                }
+                return
+            
+            relevant_docs, context = self._retrieve_context(question)
+            citations = self._process_citations(relevant_docs)
+            yield {"event": "citations", "data": citations}
+            
+            prompt = self._build_prompt(question, context)
+            raw_answer = ""
+            generations = []
+            for event in self.generator.stream(prompt):
+                if "generation" in event:
+                    generations.append(event["generation"])
+                    continue
+                raw_answer += event["token"]
+                yield {"event": "token", "data": event["token"]}
+            
+            raw_answer = raw_answer.strip()
+            answer = self._deduplicate_sentences(raw_answer) or raw_answer[:300]
+            generation = self._record_generation(generations, answer)
+            if self.semantic_cache is not None:
+                self.semantic_cache.set(
+                    question_embedding,
+                    version,
+                    {"answer": answer, "citations": citations, "source_documents": relevant_docs},
+                    tokens=generation["generated_tokens"]
+                )
+            yield {
+                "event": "done",
+                "data": {"answer": answer, "citations": citations, "question": question, "generation": generation}
+            }
+            
+        except Exception as e:
+            print(f"Error streaming LLM response: {e}")
+            yield {"event": "error", "data": {"error": str(e)}}
+    
     def _process_citations(self, source_documents: List[Document]) -> List[Dict[str, Any]]:
         """Process source documents to create citations"""
         citations = []
@@ -241,8 +343,8 @@ Answer:"""
         try:
             # Simple prompt for HuggingFace API
             prompt = f"Question: {question}\nAnswer:"
-            response = self.llm(prompt)
-            return response.strip()
+            response = self._generate(prompt)
+            return response["text"].strip()
             
         except Exception as e:
             return f"I apologize, but I encountered an error: {str(e)}"
@@ -280,11 +382,11 @@ Answer:"""
         try:
             # Try a very simple approach for T5
             simple_prompt = f"Question: {question}\nAnswer:"
-            response = self.llm(simple_prompt).strip()
+            response = self._generate(simple_prompt)["text"].strip()
             if not response or len(response) < 10:
                 # If still empty, try with context
                 context_prompt = f"Question: {question}\nContext: {context}\nAnswer:"
-                response = self.llm(context_prompt).strip()
+                response = self._generate(context_prompt)["text"].strip()
             
             return response if response else f"I found relevant information in the document about: {question}"
         except:
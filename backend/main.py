@@ -1,20 +1,30 @@
 import os
+import json
 import uuid
-from typing import Dict, Any
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
+import base64
+import binascii
+from typing import Dict, Any, Union, Optional
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
 
 from config import Config
 from models import (
-    ChatRequest, ChatResponse, UploadResponse, 
-    HealthResponse, ErrorResponse, ClearMemoryResponse
+    ChatRequest, ChatResponse, UploadResponse, UploadJobResponse,
+    JobStatusResponse, HealthResponse, ErrorResponse, ClearMemoryResponse,
+    DocumentChunk, DocumentPageResponse, DocumentRecord, DocumentListResponse
 )
 from pdf_processor import PDFProcessor
 from vector_store import VectorStore
 from vector_search_service import VectorSearchService
 from llm_service import LLMService
+from ingestion_service import IngestionService
+from retention import RetentionSweeper
+from model_loader import ModelLoader, ModelNotReady
+from model_residency import ModelResidencyManager, process_rss_bytes
+from model_server import ModelServerError
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -36,7 +46,10 @@ app.add_middleware(
 pdf_processor = None
 vector_store = None
 vector_search_service = None
-llm_service = None
+ingestion_service = None
+retention_sweeper = None
+model_residency = None
+embeddings_rss_bytes = None
 
 def get_pdf_processor():
     global pdf_processor
@@ -45,9 +58,12 @@ def get_pdf_processor():
     return pdf_processor
 
 def get_vector_store():
-    global vector_store
+    global vector_store, embeddings_rss_bytes
     if vector_store is None:
+        rss_before = process_rss_bytes()
         vector_store = VectorStore()
+        # Mostly the MiniLM encoder, plus whatever the vector backend opens
+        embeddings_rss_bytes = max(0, process_rss_bytes() - rss_before)
     return vector_store
 
 def get_vector_search_service():
@@ -57,12 +73,56 @@ def get_vector_search_service():
         vector_search_service = VectorSearchService(vector_store)
     return vector_search_service
 
-def get_llm_service():
-    global llm_service
-    if llm_service is None:
-        vector_store = get_vector_store()
-        llm_service = LLMService(vector_store)
-    return llm_service
+def get_ingestion_service():
+    global ingestion_service
+    if ingestion_service is None:
+        ingestion_service = IngestionService(get_pdf_processor(), get_vector_store())
+    return ingestion_service
+
+def get_retention_sweeper():
+    global retention_sweeper
+    if retention_sweeper is None:
+        retention_sweeper = RetentionSweeper(
+            get_ingestion_service(),
+            ttl_seconds=Config.RETENTION_TTL_SECONDS,
+            max_bytes=Config.RETENTION_MAX_BYTES,
+            interval_seconds=Config.RETENTION_SWEEP_INTERVAL_SECONDS,
+            orphan_grace_seconds=Config.ORPHAN_UPLOAD_GRACE_SECONDS
+        )
+    return retention_sweeper
+
+# The LLM is built off the request path; see get_llm_service for how callers wait on it
+llm_loader = ModelLoader("LLM", lambda: LLMService(get_vector_store()))
+
+async def get_llm_service():
+    # Lazy mode waits for the load like before (on the threadpool, not the event loop);
+    # with warm-up enabled, requests during loading get a fast 503 instead
+    wait_seconds = Config.LLM_LOAD_WAIT_SECONDS if Config.LLM_WARMUP_ON_STARTUP else None
+    try:
+        llm_service = await run_in_threadpool(llm_loader.acquire, wait_seconds)
+    except ModelNotReady as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(Config.LLM_RETRY_AFTER_SECONDS)}
+        )
+    # Held until the response (streams included) has been sent, so it is never unloaded mid-request
+    try:
+        yield llm_service
+    finally:
+        llm_loader.release()
+
+def get_model_residency():
+    global model_residency
+    if model_residency is None:
+        model_residency = ModelResidencyManager(
+            idle_timeout_seconds=Config.LLM_IDLE_UNLOAD_SECONDS,
+            memory_budget_bytes=Config.MODEL_MEMORY_BUDGET_BYTES,
+            interval_seconds=Config.MODEL_RESIDENCY_CHECK_INTERVAL_SECONDS
+        )
+        model_residency.add_pinned("embeddings", embeddings_rss_bytes, get_vector_store().get_model_bytes)
+        model_residency.add_loader("llm", llm_loader)
+    return model_residency
 
 @app.on_event("startup")
 async def startup_event():
@@ -72,12 +132,30 @@ async def startup_event():
         get_pdf_processor()
         get_vector_store()
         get_vector_search_service()
-        # Note: LLM service is not initialized by default to save memory
+        get_ingestion_service()
+        get_retention_sweeper()
+        get_model_residency()
+        # Note: LLM service is not initialized by default to save memory; once loaded,
+        # the residency manager unloads it when idle or over the memory budget
+        if Config.LLM_WARMUP_ON_STARTUP:
+            llm_loader.start()
         print("All services initialized successfully")
     except Exception as e:
         print(f"Error during startup: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Wait for in-flight ingestions before exiting"""
+    if retention_sweeper is not None:
+        retention_sweeper.stop()
+    if model_residency is not None:
+        model_residency.stop()
+    if ingestion_service is not None:
+        ingestion_service.shutdown()
+    if pdf_processor is not None:
+        pdf_processor.shutdown()
+
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Health check endpoint"""
@@ -116,11 +194,38 @@ async def health_check():
             vector_store_stats={}
         )
 
-@app.post("/upload", response_model=UploadResponse)
+def _readiness(components: Dict[str, bool]) -> JSONResponse:
+    ready = all(components.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, **components}
+    )
+
+@app.get("/ready")
+async def readiness():
+    """Ready once embeddings are loaded, and the LLM too when it is warmed up at startup"""
+    components = {"embeddings": vector_store is not None}
+    if Config.LLM_WARMUP_ON_STARTUP:
+        # After an idle/budget unload the LLM reloads on demand; that does not make the instance unready
+        components["llm"] = llm_loader.is_ready or llm_loader.unloads > 0
+    return _readiness(components)
+
+@app.get("/ready/embeddings")
+async def embeddings_readiness():
+    """Ready once the embedding model and vector store are loaded (/chat, /upload)"""
+    return _readiness({"embeddings": vector_store is not None})
+
+@app.get("/ready/llm")
+async def llm_readiness():
+    """Ready once the LLM is loaded (/chat/llm); includes the load state"""
+    status = llm_loader.get_status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.post("/upload", response_model=Union[UploadResponse, UploadJobResponse])
 async def upload_pdf(
     file: UploadFile = File(...),
-    pdf_processor: PDFProcessor = Depends(get_pdf_processor),
-    vector_store: VectorStore = Depends(get_vector_store)
+    background: bool = Query(Config.UPLOAD_BACKGROUND_DEFAULT, description="Return a job id immediately and ingest in the background"),
+    ingestion_service: IngestionService = Depends(get_ingestion_service)
 ):
     """Upload and process a PDF file"""
     try:
@@ -133,18 +238,28 @@ async def upload_pdf(
         if len(file_content) > Config.MAX_FILE_SIZE:
             raise HTTPException(status_code=400, detail="File size too large")
         
-        # Process PDF
-        result = pdf_processor.process_pdf(file_content, file.filename)
+        if background:
+            # Queue the ingestion and let the client poll /jobs/{job_id}
+            job = ingestion_service.submit_job(file_content, file.filename)
+            return UploadJobResponse(
+                message="PDF uploaded and queued for processing",
+                job_id=job["job_id"],
+                filename=file.filename,
+                status=job["status"],
+                status_url=f"/jobs/{job['job_id']}"
+            )
         
-        # Add to vector store
-        chunk_ids = vector_store.add_documents(result["chunks"])
+        # Parse, chunk and embed on the ingestion pool so chat requests keep flowing
+        result = await ingestion_service.ingest_async(file_content, file.filename)
         
         return UploadResponse(
-            message="PDF uploaded and processed successfully",
+            message="PDF already uploaded, reusing existing document" if result["duplicate"]
+                else "PDF uploaded and processed successfully",
             file_id=result["metadata"]["file_id"],
             filename=file.filename,
             num_chunks=result["num_chunks"],
-            file_path=result["file_path"]
+            file_path=result["file_path"],
+            duplicate=result["duplicate"]
         )
         
     except HTTPException:
@@ -152,6 +267,17 @@ async def upload_pdf(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
 
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(
+    job_id: str,
+    ingestion_service: IngestionService = Depends(get_ingestion_service)
+):
+    """Get the status of a background ingestion job"""
+    job = ingestion_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return JobStatusResponse(**job)
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
@@ -160,13 +286,14 @@ async def chat(
     """Search and retrieve relevant content from the uploaded PDF"""
     try:
         # Use vector search by default (memory efficient)
-        response = vector_search_service.search_and_summarize(request.question)
+        response = vector_search_service.search_and_summarize(request.question, mode=request.mode)
         
         return ChatResponse(
             answer=response["answer"],
             citations=response["citations"],
             question=request.question,
-            session_id=request.session_id
+            session_id=request.session_id,
+            timings=response.get("timings", {})
         )
         
     except Exception as e:
@@ -179,19 +306,37 @@ async def chat_with_llm(
 ):
     """Chat with LLM about the uploaded PDF (uses more memory)"""
     try:
-        # Get response from LLM service
-        response = llm_service.get_response(request.question)
+        # Generate on the threadpool so concurrent requests can share a batch
+        response = await run_in_threadpool(llm_service.get_response, request.question)
         
         return ChatResponse(
             answer=response["answer"],
             citations=response["citations"],
             question=request.question,
-            session_id=request.session_id
+            session_id=request.session_id,
+            generation=response.get("generation")
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting LLM response: {str(e)}")
 
+@app.post("/chat/llm/stream")
+async def chat_with_llm_stream(
+    request: ChatRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
+    """Stream an LLM answer as Server-Sent Events (citations, token..., done)"""
+    def event_stream():
+        for event in llm_service.stream_response(request.question):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    
+    # Starlette iterates sync generators on its threadpool, off the event loop
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/clear-memory", response_model=ClearMemoryResponse)
 async def clear_memory(
     session_id: str = None,
@@ -209,33 +354,169 @@ async def clear_memory(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @app.get("/stats")
-async def get_stats(vector_store: VectorStore = Depends(get_vector_store)):
+async def get_stats(
+    vector_store: VectorStore = Depends(get_vector_store),
+    vector_search_service: VectorSearchService = Depends(get_vector_search_service),
+    ingestion_service: IngestionService = Depends(get_ingestion_service)
+):
     """Get vector store statistics"""
     try:
         stats = vector_store.get_collection_stats()
+        stats["result_cache"] = vector_search_service.get_cache_stats()
+        stats["ingestion"] = ingestion_service.get_stats()
+        if retention_sweeper is not None:
+            stats["retention"] = retention_sweeper.get_stats()
+        stats["llm"] = llm_loader.get_status()
+        if model_residency is not None:
+            stats["models"] = model_residency.get_stats()
+        if vector_store.model_server is not None:
+            try:
+                stats["model_server"] = vector_store.model_server.call("stats")
+            except ModelServerError as e:
+                stats["model_server"] = {"error": str(e)}
+        # A local reference: the residency manager may unload the LLM meanwhile
+        llm = llm_loader.current()
+        if llm is not None:
+            stats["llm_batching"] = llm.get_batching_stats()
+            stats["llm_semantic_cache"] = llm.get_semantic_cache_stats()
+            stats["llm_generation"] = llm.get_generation_stats()
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting stats: {str(e)}")
 
+DOCUMENT_FIELDS = {"id": None, "text": "documents", "metadata": "metadatas", "embedding": "embeddings"}
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded))["offset"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+@app.get("/documents", response_model=DocumentPageResponse, response_model_exclude_none=True)
+async def list_documents(
+    limit: int = Query(50, ge=1, le=Config.DOCUMENTS_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: str = Query("id,text,metadata", description="Comma-separated subset of id, text, metadata, embedding"),
+    file_id: Optional[str] = Query(None),
+    filename: Optional[str] = Query(None),
+    vector_store: VectorStore = Depends(get_vector_store)
+):
+    """Page through stored chunks, reading only one page from the store"""
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - DOCUMENT_FIELDS.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    include = tuple(DOCUMENT_FIELDS[field] for field in requested if DOCUMENT_FIELDS[field])
+    
+    where = {}
+    if file_id:
+        where["file_id"] = file_id
+    if filename:
+        where["filename"] = filename
+    offset = _decode_cursor(cursor) if cursor else 0
+    
+    try:
+        # One extra row tells us whether another page exists
+        page = await run_in_threadpool(
+            vector_store.get_documents, where or None, limit + 1, offset, include
+        )
+        total = None if where else await run_in_threadpool(vector_store.backend.count)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting documents: {str(e)}")
+    
+    ids = page.get("ids") or []
+    documents = []
+    for i, chunk_id in enumerate(ids[:limit]):
+        embedding = page["embeddings"][i] if "embedding" in requested and page.get("embeddings") is not None else None
+        documents.append(DocumentChunk(
+            id=chunk_id,
+            text=page["documents"][i] if "text" in requested else None,
+            metadata=page["metadatas"][i] if "metadata" in requested else None,
+            embedding=list(embedding) if embedding is not None else None
+        ))
+    
+    return DocumentPageResponse(
+        documents=documents,
+        limit=limit,
+        next_cursor=_encode_cursor(offset + limit) if len(ids) > limit else None,
+        total=total
+    )
+
+@app.get("/documents/files", response_model=DocumentListResponse)
+async def list_document_files(
+    limit: int = Query(50, ge=1, le=Config.DOCUMENTS_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    filename: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, description="Only files in this ingest status"),
+    vector_store: VectorStore = Depends(get_vector_store)
+):
+    """List uploaded files from the document registry"""
+    offset = _decode_cursor(cursor) if cursor else 0
+    records = vector_store.registry.list(limit=limit + 1, offset=offset, filename=filename, status=status)
+    return DocumentListResponse(
+        files=[DocumentRecord(**record) for record in records[:limit]],
+        limit=limit,
+        next_cursor=_encode_cursor(offset + limit) if len(records) > limit else None
+    )
+
+@app.get("/documents/summary")
+async def get_document_summary(
+    vector_search_service: VectorSearchService = Depends(get_vector_search_service)
+):
+    """Summarize the corpus from the document registry"""
+    return vector_search_service.get_document_summary()
+
+@app.get("/documents/{file_id}", response_model=DocumentRecord)
+async def get_document_file(file_id: str, vector_store: VectorStore = Depends(get_vector_store)):
+    """Get one uploaded file's registry record"""
+    record = vector_store.registry.get(file_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Document {file_id} not found")
+    return DocumentRecord(**record)
+
+@app.delete("/documents/{file_id}")
+async def delete_document_file(
+    file_id: str,
+    ingestion_service: IngestionService = Depends(get_ingestion_service)
+):
+    """Delete one uploaded file: its chunks, the stored PDF and its registry record"""
+    try:
+        deleted = await run_in_threadpool(ingestion_service.delete_document, file_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if deleted is None:
+        raise HTTPException(status_code=404, detail=f"Document {file_id} not found")
+    return {
+        "message": f"Deleted {deleted['filename']}",
+        "file_id": file_id,
+        "chunks_deleted": deleted["chunks_deleted"]
+    }
+
 @app.get("/debug/documents")
 async def get_documents(vector_store: VectorStore = Depends(get_vector_store)):
     """Get sample documents from vector store for debugging"""
     try:
-        # Get a few sample documents
-        sample_docs = vector_store.vector_store.get()
+        # Only the sample is read from the store; use /documents to page through the rest
+        sample_docs = vector_store.get_documents(limit=5)
         
         # Extract document content
         documents = []
-        if sample_docs and 'documents' in sample_docs:
-            for i, doc in enumerate(sample_docs['documents'][:5]):  # First 5 documents
-                documents.append({
-                    "id": i,
-                    "content": doc[:500] + "..." if len(doc) > 500 else doc,
-                    "metadata": sample_docs.get('metadatas', [{}])[i] if 'metadatas' in sample_docs else {}
-                })
+        for i, doc in enumerate(sample_docs.get('documents') or []):
+            documents.append({
+                "id": i,
+                "content": doc[:500] + "..." if len(doc) > 500 else doc,
+                "metadata": (sample_docs.get('metadatas') or [{}] * (i + 1))[i]
+            })
         
         return {
-            "total_documents": len(sample_docs.get('documents', [])) if sample_docs else 0,
+            "total_documents": vector_store.backend.count(),
             "sample_documents": documents
         }
     except Exception as e:
@@ -0,0 +1,154 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from model_residency import process_rss_bytes, release_freed_memory
+
+class ModelNotReady(Exception):
+    """Raised when a model is requested while it is still loading (or failed to load)"""
+
+    def __init__(self, name: str, state: str, error: Optional[str] = None):
+        self.name = name
+        self.state = state
+        self.error = error
+        super().__init__(f"{name} is not ready ({state})" + (f": {error}" if error else ""))
+
+class ModelLoader:
+    """Builds a heavy object on a background thread and hands it out once it is ready"""
+
+    # state: not_loaded -> loading -> ready, or loading -> failed (the next start() retries).
+    # A ready instance can be unloaded back to not_loaded while no request holds it.
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self.instance = None
+        self.state = "not_loaded"
+        self.error: Optional[str] = None
+        self.load_started_at: Optional[float] = None
+        self.load_seconds: Optional[float] = None
+        self.rss_bytes: Optional[int] = None
+        self.active = 0
+        self.last_used: Optional[float] = None
+        self.loads = 0
+        self.unloads = 0
+        self.last_unload_reason: Optional[str] = None
+
+    def start(self):
+        """Start loading in the background unless a load is running or done"""
+        with self._lock:
+            if self.state in ("loading", "ready"):
+                return
+            self.state = "loading"
+            self.error = None
+            self.load_started_at = time.time()
+            self._ready.clear()
+        threading.Thread(target=self._load, name=f"{self.name}-loader", daemon=True).start()
+
+    def _load(self):
+        print(f"Loading {self.name} in the background...")
+        started = time.perf_counter()
+        rss_before = process_rss_bytes()
+        try:
+            instance = self.factory()
+        except Exception as e:
+            print(f"Error loading {self.name}: {e}")
+            with self._lock:
+                self.state = "failed"
+                self.error = str(e)
+            self._ready.set()
+            return
+        with self._lock:
+            self.instance = instance
+            self.state = "ready"
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            # RSS growth across the load; other threads allocating at the same time skew it
+            self.rss_bytes = max(0, process_rss_bytes() - rss_before)
+            self.loads += 1
+            self.last_used = time.time()
+        self._ready.set()
+        print(f"{self.name} ready after {self.load_seconds}s")
+
+    def acquire(self, wait_seconds: Optional[float] = 0) -> Any:
+        """Return the instance (held until release()), loading it if needed; waits up to wait_seconds (None: forever)"""
+        self.start()
+        self._ready.wait(wait_seconds)
+        with self._lock:
+            if self.state != "ready":
+                raise ModelNotReady(self.name, self.state, self.error)
+            self.active += 1
+            self.last_used = time.time()
+            return self.instance
+
+    def release(self):
+        """End a use started by acquire()"""
+        with self._lock:
+            self.active -= 1
+            self.last_used = time.time()
+
+    def idle_seconds(self) -> Optional[float]:
+        """Seconds since last use, or None unless loaded and not in use"""
+        with self._lock:
+            if self.state != "ready" or self.active:
+                return None
+            return time.time() - self.last_used
+
+    def unload(self, reason: str) -> bool:
+        """Drop the instance if it is loaded and not in use; the next acquire() reloads it"""
+        with self._lock:
+            if self.state != "ready" or self.active:
+                return False
+            instance = self.instance
+            self.instance = None
+            self.state = "not_loaded"
+            self.unloads += 1
+            self.last_unload_reason = reason
+            self._ready.clear()
+        shutdown = getattr(instance, "shutdown", None)
+        if shutdown is not None:
+            shutdown()
+        del instance
+        release_freed_memory()
+        return True
+
+    def current(self) -> Optional[Any]:
+        """The loaded instance, or None; does not start a load or hold the instance against unloading"""
+        with self._lock:
+            return self.instance if self.state == "ready" else None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == "ready"
+
+    def get_status(self) -> Dict[str, Any]:
+        """Load state and timing"""
+        with self._lock:
+            status = {
+                "state": self.state,
+                "ready": self.state == "ready",
+                "load_seconds": self.load_seconds,
+                "error": self.error
+            }
+            if self.unloads:
+                status["last_unload_reason"] = self.last_unload_reason
+            if self.state == "loading":
+                status["loading_for_seconds"] = round(time.time() - self.load_started_at, 1)
+            return status
+
+    def get_residency(self) -> Dict[str, Any]:
+        """Sizes and usage for the residency manager"""
+        size_fn = getattr(self.current(), "get_model_bytes", None)
+        idle = self.idle_seconds()
+        with self._lock:
+            return {
+                "state": self.state,
+                "rss_bytes": self.rss_bytes if self.state == "ready" else None,
+                "param_bytes": size_fn() if size_fn is not None else None,
+                "active_requests": self.active,
+                "idle_seconds": round(idle, 1) if idle is not None else None,
+                "loads": self.loads,
+                "unloads": self.unloads,
+                "last_unload_reason": self.last_unload_reason
+            }
@@ -0,0 +1,126 @@
+import ctypes
+import gc
+import os
+import resource
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+def process_rss_bytes() -> int:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No procfs (macOS): fall back to the peak, which is what ru_maxrss reports
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+def module_bytes(module: Any) -> Optional[int]:
+    """Bytes held by a torch module's weights and buffers, or None if it is not one"""
+    if module is None or not hasattr(module, "state_dict"):
+        return None
+    # state_dict also covers int8 packed weights; tied weights are counted once
+    seen, total = set(), 0
+    pending = list(module.state_dict().values())
+    while pending:
+        value = pending.pop()
+        if isinstance(value, (tuple, list)):
+            pending.extend(value)
+        elif hasattr(value, "element_size") and value.data_ptr() not in seen:
+            seen.add(value.data_ptr())
+            total += value.numel() * value.element_size()
+    return total
+
+def release_freed_memory():
+    """Collect garbage and ask glibc to hand freed heap pages back to the OS"""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+class ModelResidencyManager:
+    """Tracks loaded models and unloads idle or over-budget ones"""
+
+    # Pinned models (the embedder) are only reported; unloadable models are ModelLoaders
+    # that come back on their next request.
+    def __init__(self, idle_timeout_seconds: float, memory_budget_bytes: int, interval_seconds: float):
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.memory_budget_bytes = memory_budget_bytes
+        self.interval_seconds = max(1.0, interval_seconds)
+
+        self.loaders: Dict[str, Any] = {}
+        self.pinned: Dict[str, Dict[str, Any]] = {}
+        self.budget_unloads = 0
+        self.idle_unloads = 0
+
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="model-residency", daemon=True)
+        self._worker.start()
+
+    def add_loader(self, name: str, loader):
+        """Manage a ModelLoader: it may be unloaded when idle or over budget"""
+        self.loaders[name] = loader
+
+    def add_pinned(self, name: str, rss_bytes: Optional[int], size_fn: Callable[[], Optional[int]]):
+        """Report a model that stays loaded; rss_bytes is the RSS growth measured around its load"""
+        self.pinned[name] = {"rss_bytes": rss_bytes, "size_fn": size_fn}
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error checking model residency: {e}")
+
+    def check(self) -> Dict[str, str]:
+        """Unload idle models, then the least recently used ones while RSS is over budget"""
+        unloaded = {}
+        if self.idle_timeout_seconds > 0:
+            for name, loader in self.loaders.items():
+                idle = loader.idle_seconds()
+                if idle is not None and idle > self.idle_timeout_seconds and loader.unload("idle"):
+                    self.idle_unloads += 1
+                    unloaded[name] = "idle"
+
+        if self.memory_budget_bytes > 0:
+            candidates = sorted(
+                (loader.idle_seconds(), name) for name, loader in self.loaders.items()
+                if loader.idle_seconds() is not None
+            )
+            while candidates and process_rss_bytes() > self.memory_budget_bytes:
+                _, name = candidates.pop()
+                if self.loaders[name].unload("memory_budget"):
+                    self.budget_unloads += 1
+                    unloaded[name] = "memory_budget"
+
+        for name, reason in unloaded.items():
+            print(f"Unloaded {name} ({reason}); process RSS now {process_rss_bytes() / 1e6:.0f} MB")
+        return unloaded
+
+    def stop(self):
+        """Stop the residency thread"""
+        self._stop.set()
+        self._worker.join(timeout=5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Process RSS, policy, and per-model residency and sizes"""
+        models = {}
+        for name, info in self.pinned.items():
+            models[name] = {
+                "resident": True,
+                "pinned": True,
+                "rss_bytes": info["rss_bytes"],
+                "param_bytes": info["size_fn"]()
+            }
+        for name, loader in self.loaders.items():
+            models[name] = {"resident": loader.is_ready, "pinned": False, **loader.get_residency()}
+        return {
+            "process_rss_bytes": process_rss_bytes(),
+            "memory_budget_bytes": self.memory_budget_bytes or None,
+            "idle_timeout_seconds": self.idle_timeout_seconds or None,
+            "idle_unloads": self.idle_unloads,
+            "budget_unloads": self.budget_unloads,
+            "models": models
+        }
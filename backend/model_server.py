@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Shared model server: one process owns the embedding model and the LLM, and
+every API worker on the host talks to it over a Unix socket
+
+Concurrent requests from all workers are micro-batched: single-query
+embeddings share one encoder call and prompts share one generate() batch.
+Set MODEL_SERVER_SOCKET for the API workers and start this first (the
+gunicorn config in this directory does that itself):
+
+    MODEL_SERVER_SOCKET=/tmp/pdf-chat-models.sock python model_server.py
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain.schema.embeddings import Embeddings
+
+from config import Config
+
+# Messages are length-prefixed JSON: a 4-byte big-endian size, then the body
+_HEADER = struct.Struct("!I")
+
+def send_message(sock: socket.socket, message: Dict[str, Any]):
+    body = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+def recv_message(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """Read one message, or None once the peer has closed the connection"""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    body = _recv_exact(sock, _HEADER.unpack(header)[0])
+    if body is None:
+        return None
+    return json.loads(body)
+
+class ModelServerError(RuntimeError):
+    """Raised by the client when the model server is unreachable or a request failed there"""
+
+class ModelServerClient:
+    """Talks to the model server; one short-lived connection per call, so it is thread-safe"""
+
+    def __init__(self, socket_path: str, timeout: float = Config.MODEL_SERVER_TIMEOUT_SECONDS):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _connect(self) -> socket.socket:
+        """Open a connection, backing off while the server's accept backlog is full"""
+        deadline = time.time() + self.timeout
+        delay = 0.01
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+                return sock
+            except BlockingIOError:
+                # EAGAIN: a burst from every worker filled the listen queue
+                sock.close()
+                if time.time() + delay > deadline:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+            except OSError:
+                sock.close()
+                raise
+
+    def _request(self, message: Dict[str, Any]) -> socket.socket:
+        try:
+            sock = self._connect()
+        except OSError as e:
+            raise ModelServerError(f"Model server at {self.socket_path} is unreachable: {e}")
+        try:
+            send_message(sock, message)
+        except OSError as e:
+            sock.close()
+            raise ModelServerError(f"Model server at {self.socket_path} is unreachable: {e}")
+        return sock
+
+    @staticmethod
+    def _reply(sock: socket.socket) -> Dict[str, Any]:
+        reply = recv_message(sock)
+        if reply is None:
+            raise ModelServerError("Model server closed the connection")
+        if "error" in reply:
+            raise ModelServerError(reply["error"])
+        return reply
+
+    def call(self, op: str, **params) -> Any:
+        """Send one request and return its result"""
+        sock = self._request({"op": op, **params})
+        try:
+            return self._reply(sock)["result"]
+        finally:
+            sock.close()
+
+    def stream(self, op: str, **params) -> Iterator[Any]:
+        """Send one request and yield its results until the server marks it done"""
+        sock = self._request({"op": op, **params})
+        try:
+            while True:
+                reply = self._reply(sock)
+                if reply.get("done"):
+                    return
+                yield reply["result"]
+        finally:
+            sock.close()
+
+    def wait_until_ready(self, timeout: float):
+        """Block until the server answers a ping; API workers may start before it"""
+        deadline = time.time() + timeout
+        while True:
+            try:
+                return self.call("ping")
+            except ModelServerError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.5)
+
+class RemoteEmbeddings(Embeddings):
+    """LangChain embeddings computed by the model server"""
+
+    def __init__(self, server: ModelServerClient):
+        self.server = server
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.server.call("embed_documents", texts=texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.server.call("embed_query", text=text)
+
+class RemoteGenerator:
+    """Same interface as LocalGenerator, with generation done by the model server"""
+
+    def __init__(self, server: ModelServerClient):
+        from transformers import AutoTokenizer
+        self.server = server
+        self.llm = None
+        # Only the tokenizer is loaded here, for token counts
+        self.tokenizer = AutoTokenizer.from_pretrained(Config.MODEL_NAME, token=Config.HUGGINGFACE_API_TOKEN)
+
+    def generate(self, prompt: str) -> Dict[str, Any]:
+        return self.server.call("generate", prompt=prompt)
+
+    def stream(self, prompt: str) -> Iterator[Dict[str, Any]]:
+        return self.server.stream("stream", prompt=prompt)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def get_model_bytes(self) -> Optional[int]:
+        return None
+
+    def get_batching_stats(self) -> Dict[str, Any]:
+        """The server's micro-batching metrics; its batches mix prompts from every worker"""
+        try:
+            return {"model_server": True, **self.server.call("stats").get("llm_batching", {"enabled": False})}
+        except ModelServerError as e:
+            return {"model_server": True, "error": str(e)}
+
+    def shutdown(self):
+        pass
+
+class ModelServer:
+    """Serves embeddings and generation for every API worker on this host"""
+
+    def __init__(self, socket_path: str):
+        from inference_backends import create_embeddings
+        from llm_batcher import MicroBatcher
+        from llm_generator import LocalGenerator
+        from model_loader import ModelLoader
+        from model_residency import ModelResidencyManager, module_bytes, process_rss_bytes
+
+        self.socket_path = socket_path
+        self.started_at = time.time()
+        self._stats_lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+
+        try:
+            import torch
+            torch.set_num_threads(Config.EMBEDDING_NUM_THREADS)
+        except Exception as e:
+            print(f"Could not set torch thread count: {e}")
+
+        rss_before = process_rss_bytes()
+        self.embeddings = create_embeddings(Config.EMBEDDING_INFERENCE_BACKEND, Config)
+        embeddings_rss = max(0, process_rss_bytes() - rss_before)
+
+        # Single queries arriving from different workers share one encoder call
+        self.query_batcher = MicroBatcher(
+            self.embeddings.embed_documents,
+            max_batch_size=Config.MODEL_SERVER_QUERY_BATCH_SIZE,
+            max_wait_ms=Config.MODEL_SERVER_QUERY_BATCH_WAIT_MS,
+            name="query-batcher"
+        )
+
+        # LocalGenerator's own micro-batcher now batches prompts across workers
+        self.llm_loader = ModelLoader("LLM", LocalGenerator)
+        self.residency = ModelResidencyManager(
+            idle_timeout_seconds=Config.LLM_IDLE_UNLOAD_SECONDS,
+            memory_budget_bytes=Config.MODEL_MEMORY_BUDGET_BYTES,
+            interval_seconds=Config.MODEL_RESIDENCY_CHECK_INTERVAL_SECONDS
+        )
+        self.residency.add_pinned(
+            "embeddings",
+            embeddings_rss,
+            lambda: getattr(self.embeddings, "model_bytes", None) or module_bytes(getattr(self.embeddings, "client", None))
+        )
+        self.residency.add_loader("llm", self.llm_loader)
+        if Config.LLM_WARMUP_ON_STARTUP:
+            self.llm_loader.start()
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        directory = os.path.dirname(socket_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    message = recv_message(self.request)
+                    if message is None:
+                        return
+                    server.handle(self.request, message)
+
+        class Server(socketserver.ThreadingUnixStreamServer):
+            daemon_threads = True
+            # Every worker's requests arrive here; the default listen queue of 5 overflows
+            request_queue_size = Config.MODEL_SERVER_BACKLOG
+
+        # Only processes running as the same user (or group) may connect. The socket
+        # is created with these permissions, so it is never reachable by anyone else.
+        previous_umask = os.umask(0o117)
+        try:
+            self.server = Server(socket_path, Handler)
+        finally:
+            os.umask(previous_umask)
+
+    def handle(self, sock: socket.socket, message: Dict[str, Any]):
+        """Answer one request; errors are sent back instead of closing the connection"""
+        op = message.get("op")
+        with self._stats_lock:
+            self.requests[op] = self.requests.get(op, 0) + 1
+        try:
+            if op == "ping":
+                send_message(sock, {"result": "pong"})
+            elif op == "embed_documents":
+                send_message(sock, {"result": self.embeddings.embed_documents(message["texts"])})
+            elif op == "embed_query":
+                send_message(sock, {"result": self.query_batcher.submit(message["text"])})
+            elif op == "generate":
+                generator = self.llm_loader.acquire(None)
+                try:
+                    send_message(sock, {"result": generator.generate(message["prompt"])})
+                finally:
+                    self.llm_loader.release()
+            elif op == "stream":
+                generator = self.llm_loader.acquire(None)
+                try:
+                    for event in generator.stream(message["prompt"]):
+                        send_message(sock, {"result": event})
+                    send_message(sock, {"done": True})
+                finally:
+                    self.llm_loader.release()
+            elif op == "stats":
+                send_message(sock, {"result": self.get_stats()})
+            else:
+                send_message(sock, {"error": f"Unknown model server operation: {op}"})
+        except OSError:
+            raise  # the worker went away; nothing left to reply to
+        except Exception as e:
+            print(f"Error handling model server {op} request: {e}")
+            send_message(sock, {"error": str(e)})
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Request counts, batching and model residency"""
+        stats = {
+            "socket": self.socket_path,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "requests": dict(self.requests),
+            "query_batching": self.query_batcher.get_stats(),
+            "llm": self.llm_loader.get_status(),
+            "models": self.residency.get_stats()
+        }
+        generator = self.llm_loader.current()
+        if generator is not None:
+            stats["llm_batching"] = generator.get_batching_stats()
+        return stats
+
+    def serve_forever(self):
+        print(f"Model server listening on {self.socket_path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.residency.stop()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+if __name__ == "__main__":
+    model_server = ModelServer(Config.MODEL_SERVER_SOCKET or "./model_server.sock")
+    # serve_forever() must be stopped from another thread
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=model_server.server.shutdown).start())
+    try:
+        model_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,15 +1,18 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Literal
 
 class ChatRequest(BaseModel):
     question: str = Field(..., description="The question to ask about the PDF")
     session_id: Optional[str] = Field(None, description="Session ID for conversation continuity")
+    mode: Optional[Literal["vector", "hybrid"]] = Field(None, description="Retrieval mode for /chat (defaults to server config)")
 
 class ChatResponse(BaseModel):
     answer: str = Field(..., description="The AI's response to the question")
     citations: List[Dict[str, Any]] = Field(default=[], description="Citations from the source documents")
     question: str = Field(..., description="The original question")
     session_id: Optional[str] = Field(None, description="Session ID for conversation continuity")
+    timings: Dict[str, float] = Field(default={}, description="Retrieval latency per leg in milliseconds")
+    generation: Optional[Dict[str, Any]] = Field(None, description="LLM tokens generated vs kept in the answer, and why decoding stopped")
 
 class UploadResponse(BaseModel):
     message: str = Field(..., description="Upload status message")
@@ -17,6 +20,57 @@ class UploadResponse(BaseModel):
     filename: str = Field(..., description="Original filename")
     num_chunks: int = Field(..., description="Number of text chunks created")
     file_path: str = Field(..., description="Path where file is stored")
+    duplicate: bool = Field(False, description="True if identical content was already uploaded")
+
+class UploadJobResponse(BaseModel):
+    message: str = Field(..., description="Upload status message")
+    job_id: str = Field(..., description="Identifier of the background ingestion job")
+    filename: str = Field(..., description="Original filename")
+    status: str = Field(..., description="Job status (queued, running, completed, failed)")
+    status_url: str = Field(..., description="Endpoint to poll for job progress")
+
+class JobStatusResponse(BaseModel):
+    job_id: str = Field(..., description="Identifier of the ingestion job")
+    status: str = Field(..., description="Job status (queued, running, completed, failed)")
+    stage: str = Field(..., description="Last completed stage (saved, extracted, chunked, embedded, persisted)")
+    filename: str = Field(..., description="Original filename")
+    progress: Dict[str, Any] = Field(default={}, description="Progress counters for the job")
+    timings: Dict[str, float] = Field(default={}, description="Seconds spent in each stage")
+    result: Optional[Dict[str, Any]] = Field(None, description="Ingestion result once completed")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    created_at: float = Field(..., description="Job creation time (unix seconds)")
+    updated_at: float = Field(..., description="Last update time (unix seconds)")
+
+class DocumentChunk(BaseModel):
+    id: str = Field(..., description="Chunk identifier (content hash)")
+    text: Optional[str] = Field(None, description="Chunk text, when requested")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Chunk metadata, when requested")
+    embedding: Optional[List[float]] = Field(None, description="Chunk embedding, when requested")
+
+class DocumentPageResponse(BaseModel):
+    documents: List[DocumentChunk] = Field(default=[], description="Chunks on this page")
+    limit: int = Field(..., description="Maximum chunks per page")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, absent on the last page")
+    total: Optional[int] = Field(None, description="Total chunks in the collection (unfiltered requests only)")
+
+class DocumentRecord(BaseModel):
+    file_id: str = Field(..., description="Unique identifier of the uploaded file")
+    filename: Optional[str] = Field(None, description="Original filename")
+    file_path: Optional[str] = Field(None, description="Path where the file is stored")
+    file_size: int = Field(0, description="File size in bytes")
+    file_hash: Optional[str] = Field(None, description="SHA-256 of the file content")
+    status: str = Field(..., description="Ingest status (processing, ready)")
+    pages: int = Field(0, description="Pages with extractable text")
+    num_chunks: int = Field(0, description="Chunks produced from the file")
+    chunks_stored: int = Field(0, description="Chunks newly stored (others were already present)")
+    timings: Dict[str, float] = Field(default={}, description="Seconds spent extracting, embedding and ingesting")
+    created_at: Optional[float] = Field(None, description="Registration time (unix seconds)")
+    updated_at: Optional[float] = Field(None, description="Last update time (unix seconds)")
+
+class DocumentListResponse(BaseModel):
+    files: List[DocumentRecord] = Field(default=[], description="Files on this page")
+    limit: int = Field(..., description="Maximum files per page")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, absent on the last page")
 
 class HealthResponse(BaseModel):
     status: str = Field(..., description="Health status")
@@ -1,13 +1,39 @@
 import os
 import uuid
-from typing import List, Dict, Any
+import hashlib
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
 from pathlib import Path
 
+from pypdf import PdfReader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
 from langchain.schema import Document
 
 from config import Config
+from text_normalizer import TextNormalizer
+from keyword_matcher import load_taxonomy
+from document_registry import DocumentRegistry
+
+def extract_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract text of pages [start, end) as (page_index, text) pairs"""
+    # Module-level so it can be pickled into a worker process
+    reader = PdfReader(file_path)
+    return [(i, reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+def split_page_ranges(num_pages: int, num_parts: int) -> List[Tuple[int, int]]:
+    """Split [0, num_pages) into at most num_parts contiguous ranges"""
+    num_parts = max(1, min(num_parts, num_pages))
+    size, remainder = divmod(num_pages, num_parts)
+    ranges = []
+    start = 0
+    for part in range(num_parts):
+        end = start + size + (1 if part < remainder else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
 
 class PDFProcessor:
     def __init__(self):
@@ -16,10 +42,37 @@ class PDFProcessor:
             chunk_overlap=Config.CHUNK_OVERLAP,
             length_function=len,
         )
+        self.normalizer = TextNormalizer()
+        self.skill_matcher = load_taxonomy(Config.SKILLS_TAXONOMY_PATH)
+        self.registry = DocumentRegistry(Config.DOCUMENT_REGISTRY_PATH)
+        
+        # Process pool for large PDFs, created on first use
+        self.extraction_workers = max(1, Config.PARALLEL_EXTRACTION_WORKERS)
+        self._extraction_pool = None
+        self._pool_lock = threading.Lock()
         
         # Create upload directory if it doesn't exist
         os.makedirs(Config.UPLOAD_DIR, exist_ok=True)
     
+    @staticmethod
+    def compute_file_hash(file_content: bytes) -> str:
+        """SHA-256 of the raw upload, used to detect re-uploads"""
+        return hashlib.sha256(file_content).hexdigest()
+    
+    @staticmethod
+    def compute_file_hash_from_path(file_path: str) -> str:
+        """SHA-256 of a stored file, read in blocks"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def compute_chunk_hash(text: str) -> str:
+        """SHA-256 of a chunk's text; with the file_id it forms the chunk's vector store id"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
     def save_uploaded_file(self, file_content: bytes, filename: str) -> str:
         """Save uploaded file to disk and return the file path"""
         file_id = str(uuid.uuid4())
@@ -35,21 +88,57 @@ class PDFProcessor:
         
         return file_path
     
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file using PyPDFLoader"""
+    def _get_extraction_pool(self) -> ProcessPoolExecutor:
+        """Lazily start the extraction process pool"""
+        with self._pool_lock:
+            if self._extraction_pool is None:
+                # spawn: the API process is multi-threaded, so forking is unsafe
+                self._extraction_pool = ProcessPoolExecutor(
+                    max_workers=self.extraction_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._extraction_pool
+    
+    def iter_pages(
+        self,
+        file_path: str,
+        parallel: Optional[bool] = None,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Document]:
+        """Yield one Document per non-empty page, numbered from 1; stats["pages"] gets the total page count"""
         try:
-            loader = PyPDFLoader(file_path)
-            pages = loader.load()
+            reader = PdfReader(file_path)
+            num_pages = len(reader.pages)
+            if stats is not None:
+                stats["pages"] = num_pages
+            
+            # Large PDFs are split into page ranges extracted on the process pool
+            if parallel is None:
+                parallel = (self.extraction_workers > 1 and
+                            num_pages >= Config.PARALLEL_EXTRACTION_MIN_PAGES)
             
-            # Combine all pages into a single text
-            full_text = ""
-            for page in pages:
-                full_text += page.page_content + "\n"
+            if parallel:
+                pool = self._get_extraction_pool()
+                ranges = split_page_ranges(num_pages, self.extraction_workers * 2)
+                starts, ends = zip(*ranges)
+                # map() yields range results in submission order
+                worker_path = os.path.abspath(file_path)
+                page_batches = pool.map(extract_page_range, [worker_path] * len(ranges), starts, ends)
+                pages = (page for batch in page_batches for page in batch)
+            else:
+                pages = ((i, reader.pages[i].extract_text() or "") for i in range(num_pages))
             
-            return full_text
+            for index, text in pages:
+                if not text.strip():
+                    continue
+                yield Document(page_content=text, metadata={"page": index + 1})
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
     
+    def extract_text_from_pdf(self, file_path: str) -> str:
+        """Extract text from PDF file"""
+        return "\n".join(page.page_content for page in self.iter_pages(file_path))
+    
     def split_text_into_chunks(self, text: str, metadata: Dict[str, Any] = None) -> List[Document]:
         """Split text into chunks for vector storage"""
         try:
@@ -63,42 +152,91 @@ class PDFProcessor:
         except Exception as e:
             raise Exception(f"Error splitting text into chunks: {str(e)}")
     
-    def process_pdf(self, file_content: bytes, filename: str) -> Dict[str, Any]:
-        """Complete PDF processing pipeline"""
-        try:
-            # Save file
-            file_path = self.save_uploaded_file(file_content, filename)
+    def iter_chunks(
+        self,
+        file_path: str,
+        metadata: Dict[str, Any],
+        stats: Dict[str, Any],
+        progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Iterator[Document]:
+        """Stream page -> chunks, keeping the page number on every chunk"""
+        # Only time spent here counts as extraction, not time the consumer holds a chunk
+        stats.setdefault("extract_seconds", 0.0)
+        clock = time.perf_counter()
+        stats.setdefault("pages_with_text", 0)
+        for page in self.iter_pages(file_path, stats=stats):
+            stats["pages_with_text"] += 1
+            if progress_callback:
+                progress_callback("extracted", {"pages_extracted": page.metadata["page"], "pages_total": stats["pages"]})
             
-            # Extract text
-            text = self.extract_text_from_pdf(file_path)
+            chunks = self.split_text_into_chunks(page.page_content, {**metadata, **page.metadata})
+            for chunk in chunks:
+                chunk.metadata["chunk_hash"] = self.compute_chunk_hash(chunk.page_content)
+                # Clean once here so /chat only assembles stored snippets
+                chunk.metadata.update(self.normalizer.normalize(chunk.page_content))
+                chunk.metadata["skills"] = ", ".join(self.skill_matcher.find_labels(chunk.page_content))
+                chunk.metadata["skills_taxonomy"] = self.skill_matcher.fingerprint
+            stats["num_chunks"] += len(chunks)
+            if progress_callback:
+                progress_callback("chunked", {"chunks_total": stats["num_chunks"]})
             
-            # Create metadata
-            metadata = {
-                "filename": filename,
-                "file_path": file_path,
-                "file_id": Path(file_path).stem,
-                "source": "pdf_upload"
-            }
-            
-            # Split into chunks
-            chunks = self.split_text_into_chunks(text, metadata)
-            
-            return {
-                "file_path": file_path,
-                "text": text,
-                "chunks": chunks,
-                "metadata": metadata,
-                "num_chunks": len(chunks)
-            }
-            
-        except Exception as e:
-            # Clean up file if processing fails
-            if 'file_path' in locals():
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-            raise e
+            stats["extract_seconds"] += time.perf_counter() - clock
+            yield from chunks
+            clock = time.perf_counter()
+        stats["extract_seconds"] += time.perf_counter() - clock
+        
+        if metadata.get("file_id"):
+            self.registry.update(
+                metadata["file_id"],
+                pages=stats["pages"],
+                num_chunks=stats["num_chunks"],
+                timings={"extract_seconds": round(stats["extract_seconds"], 3)}
+            )
+    
+    def process_saved_pdf(
+        self,
+        file_path: str,
+        filename: str,
+        progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        file_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Set up the lazy extract -> chunk pipeline for a stored PDF"""
+        # "chunks" is a generator and "stats" (pages, pages_with_text, num_chunks) fills in as it
+        # is consumed, so only one page of text is held in memory at a time
+        if file_hash is None:
+            file_hash = self.compute_file_hash_from_path(file_path)
+        
+        # Create metadata
+        metadata = {
+            "filename": filename,
+            "file_path": file_path,
+            "file_id": Path(file_path).stem,
+            "file_hash": file_hash,
+            "source": "pdf_upload"
+        }
+        stats = {"pages": 0, "pages_with_text": 0, "num_chunks": 0}
+        
+        self.registry.register(
+            metadata["file_id"],
+            filename=filename,
+            file_path=file_path,
+            file_size=os.path.getsize(file_path),
+            file_hash=file_hash
+        )
+        
+        return {
+            "file_path": file_path,
+            "chunks": self.iter_chunks(file_path, metadata, stats, progress_callback),
+            "metadata": metadata,
+            "stats": stats
+        }
+    
+    def shutdown(self):
+        """Stop the extraction process pool"""
+        with self._pool_lock:
+            if self._extraction_pool is not None:
+                self._extraction_pool.shutdown(wait=True, cancel_futures=True)
+                self._extraction_pool = None
     
     def cleanup_file(self, file_path: str):
         """Remove temporary file after processing"""
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from config import Config
+from ingestion_service import IngestionService
+
+class RetentionSweeper:
+    """Background thread enforcing document TTL and upload size limits"""
+
+    # Each sweep, oldest first:
+    #   1. delete documents (ready or failed) older than ttl_seconds, and records a crashed ingest abandoned
+    #   2. delete ready documents until their uploads total at most max_bytes
+    #   3. remove files in the upload directory that no document or queued job refers to
+    #   4. compact the vector store if anything was deleted
+    def __init__(
+        self,
+        ingestion_service: IngestionService,
+        ttl_seconds: float,
+        max_bytes: int,
+        interval_seconds: float,
+        orphan_grace_seconds: float
+    ):
+        self.ingestion_service = ingestion_service
+        self.vector_store = ingestion_service.vector_store
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.interval_seconds = max(1.0, interval_seconds)
+        self.orphan_grace_seconds = orphan_grace_seconds
+
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.sweeps = 0
+        self.documents_deleted = 0
+        self.bytes_freed = 0
+        self.orphans_removed = 0
+        self.last_sweep: Dict[str, Any] = {}
+
+        self._worker = threading.Thread(target=self._run, name="retention-sweeper", daemon=True)
+        self._worker.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error during retention sweep: {e}")
+
+    def _expired_documents(self, now: float):
+        """Yield documents to delete, oldest first"""
+        registry = self.vector_store.registry
+        # Only ready documents still have their upload on disk
+        total_bytes = registry.get_stats()["bytes"]
+        offset = 0
+        while True:
+            page = registry.list(limit=100, offset=offset)
+            if not page:
+                return
+            for record in page:
+                if record["status"] == "processing":
+                    if self.ingestion_service.is_abandoned(record):
+                        yield record
+                    continue
+                expired = self.ttl_seconds > 0 and now - (record["created_at"] or now) > self.ttl_seconds
+                over_budget = (record["status"] == "ready" and self.max_bytes > 0
+                               and total_bytes > self.max_bytes)
+                if expired or over_budget:
+                    if record["status"] == "ready":
+                        total_bytes -= record["file_size"] or 0
+                    yield record
+            offset += len(page)
+
+    def _remove_orphan_uploads(self, now: float) -> int:
+        """Delete uploads no registry record or pending job refers to"""
+        upload_dir = Config.UPLOAD_DIR
+        if not os.path.isdir(upload_dir):
+            return 0
+
+        registry = self.vector_store.registry
+        referenced = self.ingestion_service.pending_file_paths()
+        offset = 0
+        while True:
+            page = registry.list(limit=500, offset=offset)
+            if not page:
+                break
+            referenced.update(os.path.abspath(r["file_path"]) for r in page if r.get("file_path"))
+            offset += len(page)
+
+        removed = 0
+        for entry in os.scandir(upload_dir):
+            if not entry.is_file() or os.path.abspath(entry.path) in referenced:
+                continue
+            # New uploads are saved before they are registered; leave them alone for a while
+            if now - entry.stat().st_mtime < self.orphan_grace_seconds:
+                continue
+            self.ingestion_service.pdf_processor.cleanup_file(entry.path)
+            removed += 1
+        return removed
+
+    def sweep(self) -> Dict[str, Any]:
+        """Run one retention pass"""
+        started = time.time()
+        deleted, freed = 0, 0
+        # Collect first: deleting while paging through the registry would shift the offsets
+        for record in list(self._expired_documents(started)):
+            try:
+                if self.ingestion_service.delete_document(record["file_id"]) is not None:
+                    deleted += 1
+                    # Failed ingests already removed their upload
+                    if record["status"] != "failed":
+                        freed += record["file_size"] or 0
+            except Exception as e:
+                print(f"Error deleting expired document {record['file_id']}: {e}")
+
+        orphans = self._remove_orphan_uploads(started)
+        compacted = self.vector_store.compact()
+
+        result = {
+            "documents_deleted": deleted,
+            "bytes_freed": freed,
+            "orphans_removed": orphans,
+            "compacted": compacted,
+            "seconds": round(time.time() - started, 3),
+            "finished_at": time.time()
+        }
+        with self._stats_lock:
+            self.sweeps += 1
+            self.documents_deleted += deleted
+            self.bytes_freed += freed
+            self.orphans_removed += orphans
+            self.last_sweep = result
+        if deleted or orphans:
+            print(f"Retention sweep removed {deleted} documents and {orphans} orphaned uploads")
+        return result
+
+    def stop(self):
+        """Stop the sweeper thread"""
+        self._stop.set()
+        self._worker.join(timeout=5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get retention policy and sweep counters"""
+        with self._stats_lock:
+            return {
+                "ttl_seconds": self.ttl_seconds or None,
+                "max_bytes": self.max_bytes or None,
+                "interval_seconds": self.interval_seconds,
+                "sweeps": self.sweeps,
+                "documents_deleted": self.documents_deleted,
+                "bytes_freed": self.bytes_freed,
+                "orphans_removed": self.orphans_removed,
+                "last_sweep": self.last_sweep
+            }
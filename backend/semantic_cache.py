@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+class SemanticCache:
+    """LRU cache of LLM answers looked up by cosine similarity of question embeddings"""
+
+    # Embeddings live in a preallocated (max_size, dim) matrix so a lookup is one
+    # matrix-vector product. Every entry belongs to the corpus version it was
+    # answered against; a newer version drops them all and answers for an older
+    # one are ignored.
+    def __init__(self, max_size: int, threshold: float):
+        self.max_size = max_size
+        self.threshold = threshold
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._free_slots: List[int] = []
+        self.version: Optional[int] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.tokens_saved = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _check_version(self, version: int) -> bool:
+        """Drop every entry once the corpus has moved on; False if version is older than the cache's"""
+        if self.version is not None and version < self.version:
+            # A request that started before the last ingest or delete: never store or serve it
+            return False
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._free_slots = list(range(self.max_size - 1, -1, -1))
+            self.version = version
+        return True
+
+    def get(self, embedding: List[float], version: int) -> Optional[Dict[str, Any]]:
+        """Return the cached answer for the most similar question above the threshold"""
+        if self.max_size <= 0:
+            return None
+        query = self._normalize(embedding)
+        with self._lock:
+            if not self._check_version(version):
+                self.misses += 1
+                return None
+            if not self._entries or self._matrix is None or self._matrix.shape[1] != len(query):
+                self.misses += 1
+                return None
+
+            slots = np.fromiter(self._entries.keys(), dtype=np.int64, count=len(self._entries))
+            similarities = self._matrix[slots] @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            slot = int(slots[best])
+            self._entries.move_to_end(slot)
+            entry = self._entries[slot]
+            self.hits += 1
+            self.tokens_saved += entry["tokens"]
+            return {**entry["response"], "similarity": round(float(similarities[best]), 4)}
+
+    def set(self, embedding: List[float], version: int, response: Dict[str, Any], tokens: int = 0):
+        """Store an answer, evicting the least recently used one when full"""
+        if self.max_size <= 0:
+            return
+        vector = self._normalize(embedding)
+        with self._lock:
+            if not self._check_version(version):
+                return
+            if self._matrix is None or self._matrix.shape[1] != len(vector):
+                self._matrix = np.zeros((self.max_size, len(vector)), dtype=np.float32)
+                self._entries.clear()
+                self._free_slots = list(range(self.max_size - 1, -1, -1))
+
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                slot, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+
+            self._matrix[slot] = vector
+            self._entries[slot] = {"response": response, "tokens": tokens}
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._free_slots = list(range(self.max_size - 1, -1, -1))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and generation tokens saved"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "corpus_version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "tokens_saved": self.tokens_saved,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
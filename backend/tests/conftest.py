@@ -0,0 +1,36 @@
+import hashlib
+import os
+import sys
+from typing import List
+
+import numpy as np
+import pytest
+from langchain.schema.embeddings import Embeddings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DIM = 16
+
+class StubEmbeddings(Embeddings):
+    """Deterministic unit vectors derived from the text, so no model is downloaded"""
+
+    def _embed(self, text: str) -> List[float]:
+        rng = np.random.default_rng(int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16))
+        vector = rng.standard_normal(DIM)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+@pytest.fixture
+def stub_embeddings():
+    return StubEmbeddings()
+
+@pytest.fixture
+def unit_vectors():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((60, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
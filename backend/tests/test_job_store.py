@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from job_store import JobStore
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite"))
+
+def queue_job(store, job_id, file_hash="hash"):
+    store.create(job_id, status="queued", stage="saved", filename="a.pdf", file_path="uploads/a.pdf", file_hash=file_hash)
+
+def test_create_and_update_round_trip(store):
+    queue_job(store, "job-1")
+    store.update("job-1", stage="chunked", progress={"pages_extracted": 2}, timings={"extracted": 0.5})
+    job = store.get("job-1")
+    assert job["status"] == "queued"
+    assert job["stage"] == "chunked"
+    assert job["progress"] == {"pages_extracted": 2}
+    assert job["timings"] == {"extracted": 0.5}
+    assert job["result"] is None
+    assert store.get("missing") is None
+    with pytest.raises(ValueError):
+        store.update("job-1", bogus=1)
+
+def test_only_one_worker_claims_a_job(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    first, second = JobStore(path), JobStore(path)
+    queue_job(first, "job-1")
+    assert first.claim("job-1", owner=101)
+    assert not second.claim("job-1", owner=202)
+    job = second.get("job-1")
+    assert job["status"] == "running"
+    assert job["owner"] == 101
+    assert job["started_at"] is not None
+
+def test_requeue_checks_the_owner(store):
+    queue_job(store, "job-1")
+    store.claim("job-1", owner=101)
+    store.update("job-1", stage="embedded", progress={"chunks_total": 9})
+    assert not store.requeue("job-1", owner=202)
+    assert store.requeue("job-1", owner=101)
+    job = store.get("job-1")
+    assert (job["status"], job["stage"], job["progress"], job["owner"]) == ("queued", "saved", {}, None)
+    assert store.claim("job-1", owner=202)
+
+def test_pending_lookups(store):
+    queue_job(store, "job-1", file_hash="h1")
+    queue_job(store, "job-2", file_hash="h2")
+    store.update("job-2", status="completed")
+    assert store.find_pending("h1")["job_id"] == "job-1"
+    assert store.find_pending("h2") is None
+    assert [job["job_id"] for job in store.list_pending()] == ["job-1"]
+    assert store.count_by_status() == {"queued": 1, "completed": 1}
+
+def test_prune_removes_only_old_finished_jobs(store):
+    for job_id in ("done", "failed", "queued", "recent"):
+        queue_job(store, job_id)
+    store.update("done", status="completed")
+    store.update("failed", status="failed")
+    cutoff = time.time()
+    store.update("recent", status="completed")
+    assert store.prune(cutoff) == 2
+    assert store.get("done") is None and store.get("failed") is None
+    assert store.get("queued") is not None and store.get("recent") is not None
@@ -0,0 +1,52 @@
+from keyword_index import KeywordIndex, tokenize
+
+CHUNKS = {
+    "a": ("Python developer building React front ends", {"page": 1}),
+    "b": ("Chef cooking pasta and desserts", {"page": 2}),
+    "c": ("Python scripts for data pipelines in Python", {"page": 3}),
+}
+
+def fetch(ids):
+    ids = [chunk_id for chunk_id in ids if chunk_id in CHUNKS]
+    return {
+        "ids": ids,
+        "documents": [CHUNKS[chunk_id][0] for chunk_id in ids],
+        "metadatas": [CHUNKS[chunk_id][1] for chunk_id in ids]
+    }
+
+def build(path):
+    index = KeywordIndex(str(path), fetch)
+    index.add(list(CHUNKS), [text for text, _ in CHUNKS.values()])
+    return index
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Python, REACT and C++!")[:2] == ["python", "react"]
+
+def test_search_ranks_by_bm25(tmp_path):
+    index = build(tmp_path / "keywords.sqlite")
+    results = index.search("python", k=5)
+    assert [doc.metadata["page"] for doc, _ in results] == [3, 1]
+    assert results[0][1] > results[1][1]
+    assert results[0][0].page_content == CHUNKS["c"][0]
+    assert index.search("pasta")[0][0].metadata == {"page": 2}
+    assert index.search("nothing matches") == []
+
+def test_remove_and_clear(tmp_path):
+    index = build(tmp_path / "keywords.sqlite")
+    index.remove(["c"])
+    assert len(index) == 2
+    assert [doc.metadata["page"] for doc, _ in index.search("python")] == [1]
+    index.clear()
+    assert len(index) == 0
+    assert index.search("python") == []
+
+def test_reload_from_sqlite(tmp_path):
+    path = tmp_path / "keywords.sqlite"
+    index = build(path)
+    index.remove(["b"])
+
+    reloaded = KeywordIndex(str(path), fetch)
+    assert len(reloaded) == 2
+    assert reloaded.search("pasta") == []
+    assert [doc.metadata["page"] for doc, _ in reloaded.search("python")] == [3, 1]
+    assert reloaded.get_stats()["terms"] == index.get_stats()["terms"]
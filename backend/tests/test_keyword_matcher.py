@@ -0,0 +1,29 @@
+import json
+
+from keyword_matcher import KeywordMatcher, load_taxonomy
+
+def test_terms_need_word_boundaries():
+    matcher = KeywordMatcher({"r": "R", "go": "Go", "react": "React"})
+    assert matcher.find_terms("React and Go at Google") == ["react", "go"]
+    assert matcher.find_terms("Skills: R, Go.") == ["r", "go"]
+
+def test_overlapping_terms_are_all_found():
+    matcher = KeywordMatcher({"machine learning": "ML", "learning": "Learning", "c++": "C++"})
+    assert matcher.find_terms("Machine\n  learning in C++") == ["machine learning", "learning", "c++"]
+    assert matcher.find_labels("machine learning in c++") == ["C++", "Learning", "ML"]
+
+def test_fingerprint_tracks_the_labels():
+    assert KeywordMatcher({"a": "A"}).fingerprint == KeywordMatcher({"A": "A"}).fingerprint
+    assert KeywordMatcher({"a": "A"}).fingerprint != KeywordMatcher({"a": "B"}).fingerprint
+
+def test_load_taxonomy(tmp_path):
+    path = tmp_path / "skills.json"
+    path.write_text(json.dumps({
+        "name": "skills",
+        "terms": {"languages": ["python", "javascript"], "cloud": ["aws"]},
+        "labels": {"aws": "AWS"}
+    }))
+    matcher = load_taxonomy(str(path))
+    assert matcher.name == "skills"
+    assert matcher.find_labels("Python and AWS, some JavaScript") == ["AWS", "Javascript", "Python"]
+    assert len(matcher.fingerprint) == 12
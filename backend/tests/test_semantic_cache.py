@@ -0,0 +1,43 @@
+from semantic_cache import SemanticCache
+
+def test_hit_above_threshold_only():
+    cache = SemanticCache(max_size=4, threshold=0.9)
+    cache.set([1.0, 0.0], 1, {"answer": "a"}, tokens=12)
+    hit = cache.get([0.99, 0.05], 1)
+    assert hit["answer"] == "a" and hit["similarity"] >= 0.9
+    assert cache.get([0.0, 1.0], 1) is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["tokens_saved"]) == (1, 1, 12)
+
+def test_newer_version_drops_entries():
+    cache = SemanticCache(max_size=4, threshold=0.9)
+    cache.set([1.0, 0.0], 1, {"answer": "old corpus"})
+    assert cache.get([1.0, 0.0], 2) is None
+    assert cache.get_stats()["size"] == 0
+    assert cache.get_stats()["invalidations"] == 1
+
+def test_answers_for_an_older_version_are_ignored():
+    cache = SemanticCache(max_size=4, threshold=0.9)
+    cache.set([1.0, 0.0], 2, {"answer": "current"})
+    # A generation that started before the bump finishes late
+    cache.set([0.0, 1.0], 1, {"answer": "stale"})
+    assert cache.get_stats()["size"] == 1
+    assert cache.get([0.0, 1.0], 2) is None
+    assert cache.get([1.0, 0.0], 1) is None
+    assert cache.get([1.0, 0.0], 2)["answer"] == "current"
+    assert cache.get_stats()["corpus_version"] == 2
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticCache(max_size=2, threshold=0.99)
+    cache.set([1.0, 0.0, 0.0], 1, {"answer": "x"})
+    cache.set([0.0, 1.0, 0.0], 1, {"answer": "y"})
+    cache.get([1.0, 0.0, 0.0], 1)
+    cache.set([0.0, 0.0, 1.0], 1, {"answer": "z"})
+    assert cache.get([0.0, 1.0, 0.0], 1) is None
+    assert cache.get([1.0, 0.0, 0.0], 1)["answer"] == "x"
+    assert cache.get_stats()["evictions"] == 1
+
+def test_disabled_cache_stores_nothing():
+    cache = SemanticCache(max_size=0, threshold=0.9)
+    cache.set([1.0], 1, {"answer": "a"})
+    assert cache.get([1.0], 1) is None
@@ -0,0 +1,25 @@
+from text_normalizer import NORMALIZER_VERSION, TextNormalizer
+
+normalizer = TextNormalizer()
+
+def test_clean_collapses_whitespace_and_page_artifacts():
+    assert normalizer.clean("  Senior   engineer\n\nPage 3 at Acme Page4\tCorp ") == "Senior engineer at Acme Corp"
+
+def test_snippet_keeps_first_long_sentences():
+    text = "Short. Built data pipelines in Python for analytics. Led a team of five engineers on it. " \
+           "Shipped a React dashboard to customers. Fourth sentence that is also long enough."
+    snippet = normalizer.snippet(normalizer.clean(text))
+    assert snippet == ("Built data pipelines in Python for analytics. Led a team of five engineers on it. "
+                       "Shipped a React dashboard to customers.")
+
+def test_snippet_falls_back_to_a_prefix():
+    assert normalizer.snippet("tiny. bits. only") == "tiny. bits. only..."
+    assert normalizer.snippet("") == ""
+
+def test_normalize_skips_short_chunks():
+    assert normalizer.normalize("Page 2") == {"snippet": "", "normalizer_version": NORMALIZER_VERSION}
+
+def test_snippet_for_recomputes_outdated_metadata():
+    text = "Designed payment systems handling millions of requests."
+    assert normalizer.snippet_for({"normalizer_version": NORMALIZER_VERSION, "snippet": "stored"}, text) == "stored"
+    assert normalizer.snippet_for({"normalizer_version": 0, "snippet": "stored"}, text) == text
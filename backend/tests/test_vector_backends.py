@@ -0,0 +1,102 @@
+import pytest
+
+from vector_backends import ChromaBackend, FaissBackend, NumpyBackend, QuantizedBackend, faiss
+
+BACKENDS = ["chroma", "numpy", "int8", "binary", "faiss-flat", "faiss-hnsw", "faiss-ivf"]
+
+def make_backend(name, directory, embeddings):
+    if name == "chroma":
+        return ChromaBackend(str(directory), embeddings, delete_batch_size=7)
+    if name == "numpy":
+        return NumpyBackend(str(directory))
+    if name in ("int8", "binary"):
+        return QuantizedBackend(str(directory), mode=name)
+    if faiss is None:
+        pytest.skip("faiss-cpu is not installed")
+    # One IVF list trains on the 60 test vectors (FAISS wants 39 per list)
+    return FaissBackend(str(directory), index_type=name.split("-", 1)[1], ivf_nlist=1, ivf_nprobe=1)
+
+@pytest.fixture(params=BACKENDS)
+def backend_name(request):
+    return request.param
+
+@pytest.fixture
+def backend(backend_name, tmp_path, stub_embeddings, unit_vectors):
+    backend = make_backend(backend_name, tmp_path / "index", stub_embeddings)
+    add_chunks(backend, unit_vectors)
+    return backend
+
+def add_chunks(backend, vectors):
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+    texts = [f"text {i}" for i in range(len(vectors))]
+    metadatas = [{"file_id": f"file-{i % 3}", "page": i} for i in range(len(vectors))]
+    backend.add(ids, vectors.tolist(), texts, metadatas)
+
+def top_ids(backend, vector, k=3):
+    return [doc.page_content.replace("text ", "chunk-") for doc, _ in backend.search(vector.tolist(), k)]
+
+def test_search_returns_nearest_first(backend, unit_vectors):
+    results = backend.search(unit_vectors[7].tolist(), 3)
+    assert len(results) == 3
+    doc, distance = results[0]
+    assert doc.page_content == "text 7"
+    assert doc.metadata == {"file_id": "file-1", "page": 7}
+    assert distance == pytest.approx(0.0, abs=1e-3)
+    assert [d for _, d in results] == sorted(d for _, d in results)
+
+def test_get_and_existing_ids(backend, unit_vectors):
+    assert backend.count() == 60
+    assert backend.existing_ids(["chunk-0", "chunk-59", "missing"]) == {"chunk-0", "chunk-59"}
+    filtered = backend.get(where={"file_id": "file-2"})
+    assert sorted(filtered["ids"]) == sorted(f"chunk-{i}" for i in range(2, 60, 3))
+    assert backend.get(where={"file_id": "file-2", "page": 5})["ids"] == ["chunk-5"]
+    page = backend.get(ids=["chunk-4"], include=("documents", "metadatas", "embeddings"))
+    assert page["documents"] == ["text 4"]
+    assert page["embeddings"][0] == pytest.approx(unit_vectors[4].tolist(), abs=1e-5)
+
+def test_delete_by_ids_and_where(backend, unit_vectors):
+    backend.delete(ids=[f"chunk-{i}" for i in range(5)])
+    assert backend.count() == 55
+    assert "chunk-2" not in top_ids(backend, unit_vectors[2], k=5)
+    assert backend.existing_ids(["chunk-2"]) == set()
+
+    backend.delete(where={"file_id": "file-1"})
+    assert backend.get(where={"file_id": "file-1"})["ids"] == []
+    assert backend.count() == 55 - len([i for i in range(5, 60) if i % 3 == 1])
+    assert top_ids(backend, unit_vectors[9], k=1) == ["chunk-9"]
+
+def test_clear_then_reuse(backend, unit_vectors):
+    backend.clear()
+    assert backend.count() == 0
+    assert backend.search(unit_vectors[0].tolist(), 3) == []
+    assert backend.get()["ids"] == []
+
+    add_chunks(backend, unit_vectors[:10])
+    assert backend.count() == 10
+    assert top_ids(backend, unit_vectors[3], k=1) == ["chunk-3"]
+
+def test_persist_and_reload(backend, backend_name, tmp_path, stub_embeddings, unit_vectors):
+    backend.delete(ids=["chunk-1", "chunk-2"])
+    backend.persist()
+    del backend
+
+    reloaded = make_backend(backend_name, tmp_path / "index", stub_embeddings)
+    assert reloaded.count() == 58
+    assert reloaded.existing_ids(["chunk-1", "chunk-3"]) == {"chunk-3"}
+    assert top_ids(reloaded, unit_vectors[3], k=1) == ["chunk-3"]
+    assert "chunk-2" not in top_ids(reloaded, unit_vectors[2], k=5)
+
+@pytest.mark.parametrize("name", ["numpy", "int8", "binary", "faiss-flat", "faiss-hnsw"])
+def test_compact_drops_tombstones(name, tmp_path, stub_embeddings, unit_vectors):
+    backend = make_backend(name, tmp_path / "index", stub_embeddings)
+    add_chunks(backend, unit_vectors)
+    backend.delete(where={"file_id": "file-0"})
+    backend.compact()
+    assert backend.rows == backend.count() == 40
+    assert top_ids(backend, unit_vectors[4], k=1) == ["chunk-4"]
+    assert backend.get(where={"file_id": "file-0"})["ids"] == []
+
+    backend.persist()
+    reloaded = make_backend(name, tmp_path / "index", stub_embeddings)
+    assert reloaded.count() == 40
+    assert top_ids(reloaded, unit_vectors[5], k=1) == ["chunk-5"]
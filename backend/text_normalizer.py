@@ -0,0 +1,62 @@
+import re
+from typing import Any, Dict, List
+
+# Bump when the rules change so chunks cleaned by older rules are re-cleaned at query time
+NORMALIZER_VERSION = 1
+
+# One alternation handles both rules: any run of page artifacts ("Page 3", "Page3",
+# a stray "Page") together with the whitespace around it, or a plain whitespace run.
+# Either collapses to a single space.
+_NOISE = re.compile(r"(?:\s*(?:Page ?\d+|\bPage\b))+\s*|\s+")
+
+MIN_CONTENT_LENGTH = 10
+MIN_SENTENCE_LENGTH = 20
+MAX_SNIPPET_SENTENCES = 3
+FALLBACK_SNIPPET_LENGTH = 500
+
+class TextNormalizer:
+    """Precompiled, single-pass cleanup of chunk text into display-ready snippets"""
+
+    # Rules, in order:
+    #   1. collapse whitespace (including newlines) to single spaces
+    #   2. drop page artifacts left by PDF headers and footers
+    #   3. split on "." and keep sentences longer than MIN_SENTENCE_LENGTH
+    #      that carry no leftover "page" fragment
+    #   4. the snippet is the first MAX_SNIPPET_SENTENCES kept sentences, or the
+    #      first FALLBACK_SNIPPET_LENGTH characters when none qualify
+
+    def clean(self, text: str) -> str:
+        """Apply rules 1 and 2 in one regex pass"""
+        return _NOISE.sub(" ", text).strip()
+
+    def sentences(self, cleaned: str) -> List[str]:
+        """Apply rule 3 to already cleaned text"""
+        kept = []
+        for sentence in cleaned.split("."):
+            sentence = sentence.strip()
+            if len(sentence) <= MIN_SENTENCE_LENGTH or "Page" in sentence:
+                continue
+            lowered = sentence.lower()
+            if lowered.startswith("page") or lowered.endswith("page"):
+                continue
+            kept.append(sentence)
+        return kept
+
+    def snippet(self, cleaned: str) -> str:
+        """Apply rule 4 to already cleaned text"""
+        sentences = self.sentences(cleaned)
+        if sentences:
+            return ". ".join(sentences[:MAX_SNIPPET_SENTENCES]) + "."
+        return cleaned[:FALLBACK_SNIPPET_LENGTH] + "..." if cleaned else ""
+
+    def normalize(self, text: str) -> Dict[str, Any]:
+        """Chunk metadata holding the display snippet (empty for chunks too short to show)"""
+        cleaned = self.clean(text)
+        snippet = self.snippet(cleaned) if len(cleaned) > MIN_CONTENT_LENGTH else ""
+        return {"snippet": snippet, "normalizer_version": NORMALIZER_VERSION}
+
+    def snippet_for(self, metadata: Dict[str, Any], text: str) -> str:
+        """Stored snippet, or one computed now for chunks ingested under older rules"""
+        if metadata.get("normalizer_version") == NORMALIZER_VERSION:
+            return metadata.get("snippet", "")
+        return self.normalize(text)["snippet"]
@@ -0,0 +1,673 @@
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+from langchain_community.vectorstores import Chroma
+
+try:
+    import faiss
+except ImportError:  # faiss-cpu is optional; the NumPy backend needs nothing extra
+    faiss = None
+
+_METADATA_KEY = re.compile(r"^\w+$")
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+class VectorBackend:
+    """Storage and nearest-neighbour search for chunk vectors behind VectorStore"""
+
+    name = "base"
+
+    def add(self, ids: List[str], embeddings: List[List[float]], texts: List[str], metadatas: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def existing_ids(self, ids: List[str]) -> set:
+        raise NotImplementedError
+
+    def search(self, embedding: List[float], k: int) -> List[Tuple[Document, float]]:
+        """Return (document, distance) pairs, closest first"""
+        raise NotImplementedError
+
+    def get(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        ids: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        include: Tuple[str, ...] = ("documents", "metadatas")
+    ) -> Dict[str, Any]:
+        """Chroma-style get(): dict of parallel "ids", "documents", "metadatas", "embeddings" lists"""
+        raise NotImplementedError
+
+    def delete(self, where: Optional[Dict[str, Any]] = None, ids: Optional[List[str]] = None):
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def persist(self):
+        pass
+
+    def compact(self):
+        """Reclaim space left by deletions (no-op where the store handles it)"""
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+class ChromaBackend(VectorBackend):
+    """The original LangChain Chroma collection"""
+
+    name = "chroma"
+
+    def __init__(self, persist_directory: str, embeddings, delete_batch_size: int = 500):
+        self.persist_directory = persist_directory
+        self.delete_batch_size = max(1, delete_batch_size)
+        existed = os.path.exists(persist_directory)
+        self.store = Chroma(
+            persist_directory=persist_directory,
+            embedding_function=embeddings
+        )
+        if existed:
+            print(f"Loaded existing vector store from {persist_directory}")
+        else:
+            print(f"Created new vector store at {persist_directory}")
+
+    @property
+    def collection(self):
+        return self.store._collection
+
+    def add(self, ids, embeddings, texts, metadatas):
+        self.collection.add(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=texts)
+
+    def existing_ids(self, ids):
+        return set(self.collection.get(ids=ids, include=[]).get("ids", []))
+
+    def search(self, embedding, k):
+        return self.store.similarity_search_by_vector_with_relevance_scores(embedding, k=k)
+
+    @staticmethod
+    def _where(where):
+        # Chroma only accepts one field per filter unless combined with $and
+        if where and len(where) > 1 and not any(key.startswith("$") for key in where):
+            return {"$and": [{key: value} for key, value in where.items()]}
+        return where or None
+
+    def get(self, where=None, ids=None, limit=None, offset=0, include=("documents", "metadatas")):
+        result = self.collection.get(
+            ids=ids,
+            where=self._where(where),
+            limit=limit,
+            offset=offset or None,
+            include=list(include)
+        )
+        return {key: result.get(key) for key in ("ids", "documents", "metadatas", "embeddings")}
+
+    def delete(self, where=None, ids=None):
+        self.collection.delete(ids=ids, where=self._where(where) if where is not None else None)
+
+    def count(self):
+        return self.collection.count()
+
+    def clear(self):
+        # Chroma rejects an empty where filter, so delete every id a page at a time
+        while True:
+            ids = self.collection.get(limit=self.delete_batch_size, include=[])["ids"]
+            if not ids:
+                return
+            self.collection.delete(ids=ids)
+
+    def persist(self):
+        self.store.persist()
+
+    def get_stats(self):
+        return {
+            "backend": self.name,
+            "collection_name": self.collection.name,
+            "persist_directory": self.persist_directory
+        }
+
+class NumpyBackend(VectorBackend):
+    """Brute-force inner-product search over a memory-mapped float32 matrix"""
+
+    # Vectors are appended to vectors.f32 (row i is docstore row i) and text and
+    # metadata live in a SQLite docstore. Deletes are tombstones until compact().
+    name = "numpy"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.db_path = os.path.join(directory, "docstore.sqlite")
+
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.memmap] = None
+        self.dim: Optional[int] = None
+        self.rows = 0
+        self._open()
+
+    def _open(self):
+        """Open the docstore and align the vector file with it"""
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "row INTEGER PRIMARY KEY, id TEXT NOT NULL, text TEXT, metadata TEXT, deleted INTEGER DEFAULT 0)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS chunks_id ON chunks (id)")
+        self.db.commit()
+
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                self.dim = json.load(f)["dim"]
+
+        self.rows = self.db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        self.live = np.ones(self.rows, dtype=bool)
+        for (row,) in self.db.execute("SELECT row FROM chunks WHERE deleted = 1"):
+            self.live[row] = False
+
+        if self.dim is not None and os.path.exists(self.vectors_path):
+            # Vectors are written before the docstore commit; drop any unreferenced tail
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(self.rows * self.dim * 4)
+        self._matrix = None
+        self._load_index()
+
+    def _vectors(self) -> Optional[np.memmap]:
+        if self.rows == 0:
+            return None
+        if self._matrix is None or self._matrix.shape[0] != self.rows:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+        return self._matrix
+
+    # Index hooks, overridden by ANN backends
+    def _load_index(self):
+        pass
+
+    def _index_add(self, vectors: np.ndarray):
+        pass
+
+    def _search_rows(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (scores, rows) of the k highest inner products"""
+        matrix = self._vectors()
+        scores = matrix @ query
+        scores[~self.live] = -np.inf
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return scores[top], top
+
+    def add(self, ids, embeddings, texts, metadatas):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                with open(self.meta_path, "w") as f:
+                    json.dump({"dim": self.dim}, f)
+
+            start = self.rows
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            self.db.executemany(
+                "INSERT INTO chunks (row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                [(start + i, chunk_id, text, json.dumps(metadata))
+                 for i, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas))]
+            )
+            self.db.commit()
+            self.rows += len(ids)
+            self.live = np.concatenate([self.live, np.ones(len(ids), dtype=bool)])
+            self._index_add(vectors)
+
+    def existing_ids(self, ids):
+        if not ids:
+            return set()
+        with self._lock:
+            placeholders = ",".join("?" * len(ids))
+            cursor = self.db.execute(
+                f"SELECT id FROM chunks WHERE deleted = 0 AND id IN ({placeholders})", list(ids)
+            )
+            return {row[0] for row in cursor}
+
+    def search(self, embedding, k):
+        with self._lock:
+            live_count = int(self.live.sum())
+            if live_count == 0:
+                return []
+            query = np.asarray(embedding, dtype=np.float32)
+            # Over-fetch by the tombstone count so deleted rows never crowd out results
+            fetch = min(self.rows, k + (self.rows - live_count))
+            scores, rows = self._search_rows(query, fetch)
+
+            hits = [(int(row), float(score)) for score, row in zip(scores, rows)
+                    if row >= 0 and self.live[row]][:k]
+            docs = self._fetch_rows([row for row, _ in hits])
+            # Unit vectors: squared L2 distance = 2 - 2 * cosine, matching Chroma's default
+            return [(docs[row], 2.0 - 2.0 * score) for row, score in hits]
+
+    def _fetch_rows(self, rows: List[int]) -> Dict[int, Document]:
+        if not rows:
+            return {}
+        placeholders = ",".join("?" * len(rows))
+        cursor = self.db.execute(f"SELECT row, text, metadata FROM chunks WHERE row IN ({placeholders})", rows)
+        return {
+            row: Document(page_content=text, metadata=json.loads(metadata))
+            for row, text, metadata in cursor
+        }
+
+    def _where_sql(self, where: Optional[Dict[str, Any]], ids: Optional[List[str]]) -> Tuple[str, list]:
+        clauses, params = ["deleted = 0"], []
+        for key, value in (where or {}).items():
+            if not _METADATA_KEY.match(key):
+                raise ValueError(f"Invalid metadata key: {key}")
+            clauses.append(f"json_extract(metadata, '$.{key}') = ?")
+            params.append(value)
+        if ids is not None:
+            clauses.append(f"id IN ({','.join('?' * len(ids))})")
+            params.extend(ids)
+        return " AND ".join(clauses), params
+
+    def get(self, where=None, ids=None, limit=None, offset=0, include=("documents", "metadatas")):
+        with self._lock:
+            if ids is not None and not ids:
+                return {"ids": [], "documents": None, "metadatas": None, "embeddings": None}
+            clause, params = self._where_sql(where, ids)
+            sql = f"SELECT row, id, text, metadata FROM chunks WHERE {clause} ORDER BY row"
+            if limit is not None:
+                sql += " LIMIT ? OFFSET ?"
+                params += [limit, offset or 0]
+            elif offset:
+                sql += " LIMIT -1 OFFSET ?"
+                params.append(offset)
+            records = self.db.execute(sql, params).fetchall()
+
+            matrix = self._vectors() if "embeddings" in include else None
+            return {
+                "ids": [r[1] for r in records],
+                "documents": [r[2] for r in records] if "documents" in include else None,
+                "metadatas": [json.loads(r[3]) for r in records] if "metadatas" in include else None,
+                "embeddings": [matrix[r[0]].tolist() for r in records] if matrix is not None else None
+            }
+
+    def delete(self, where=None, ids=None):
+        with self._lock:
+            clause, params = self._where_sql(where, ids)
+            rows = [r[0] for r in self.db.execute(f"SELECT row FROM chunks WHERE {clause}", params)]
+            if not rows:
+                return
+            self.db.executemany("UPDATE chunks SET deleted = 1 WHERE row = ?", [(row,) for row in rows])
+            self.db.commit()
+            self.live[rows] = False
+
+    def count(self):
+        with self._lock:
+            return int(self.live.sum())
+
+    def clear(self):
+        with self._lock:
+            self.db.close()
+            self._matrix = None
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory, exist_ok=True)
+            self.dim = None
+            self._open()
+
+    def compact(self):
+        """Rewrite vectors and docstore without tombstoned rows"""
+        with self._lock:
+            if self.live.all():
+                return
+            live_rows = np.flatnonzero(self.live)
+            matrix = self._vectors()
+            records = self.db.execute(
+                "SELECT id, text, metadata FROM chunks WHERE deleted = 0 ORDER BY row"
+            ).fetchall()
+
+            tmp_vectors = f"{self.vectors_path}.compact"
+            with open(tmp_vectors, "wb") as f:
+                for start in range(0, len(live_rows), 65536):
+                    f.write(np.ascontiguousarray(matrix[live_rows[start:start + 65536]]).tobytes())
+
+            self._matrix = None
+            self.db.execute("DELETE FROM chunks")
+            self.db.executemany(
+                "INSERT INTO chunks (row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                [(i, chunk_id, text, metadata) for i, (chunk_id, text, metadata) in enumerate(records)]
+            )
+            os.replace(tmp_vectors, self.vectors_path)
+            self.db.commit()
+            self.db.execute("VACUUM")
+
+            removed = self.rows - len(records)
+            self.rows = len(records)
+            self.live = np.ones(self.rows, dtype=bool)
+            self._rebuild_index()
+            print(f"Compacted {self.name} index, removed {removed} deleted rows")
+
+    def _rebuild_index(self):
+        pass
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "backend": self.name,
+                "directory": self.directory,
+                "rows": self.rows,
+                "live_rows": int(self.live.sum()),
+                "dim": self.dim
+            }
+
+class QuantizedBackend(NumpyBackend):
+    """NumpyBackend that scans compact int8 or 1-bit codes held in RAM and rescores on disk"""
+
+    # Codes are appended to codes.int8 / codes.bin alongside vectors.f32. A query
+    # scans only the codes, keeps the best k * rescore_factor candidates and
+    # rescores those against the float32 memmap, so the full-precision matrix
+    # is read a few rows at a time instead of being paged in whole.
+    name = "quantized"
+    SCAN_BLOCK = 16384
+
+    def __init__(self, directory: str, mode: str = "int8", rescore_factor: int = 10, int8_range: float = 0.5):
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        self.mode = mode
+        self.rescore_factor = max(1, rescore_factor)
+        self.rescore = True
+        # MiniLM vectors are unit length; components beyond +/-int8_range are clipped
+        self.int8_range = int8_range
+        self.codes: Optional[np.ndarray] = None
+        super().__init__(directory)
+
+    @property
+    def codes_path(self) -> str:
+        return os.path.join(self.directory, "codes.int8" if self.mode == "int8" else "codes.bin")
+
+    @property
+    def _quantization_meta_path(self) -> str:
+        return os.path.join(self.directory, "quantization.json")
+
+    def _code_width(self) -> int:
+        return self.dim if self.mode == "int8" else (self.dim + 7) // 8
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.mode == "int8":
+            scaled = np.clip(vectors / self.int8_range, -1.0, 1.0) * 127
+            return np.rint(scaled).astype(np.int8)
+        return np.packbits(vectors > 0, axis=1)
+
+    def _load_index(self):
+        """Load codes if they match the vector file and settings, else re-encode"""
+        self.codes = None
+        if self.rows == 0:
+            return
+        settings = {"mode": self.mode, "int8_range": self.int8_range}
+        stored = {}
+        if os.path.exists(self._quantization_meta_path):
+            with open(self._quantization_meta_path) as f:
+                stored = json.load(f)
+        dtype = np.int8 if self.mode == "int8" else np.uint8
+        expected_size = self.rows * self._code_width()
+        if (stored == settings and os.path.exists(self.codes_path)
+                and os.path.getsize(self.codes_path) >= expected_size):
+            with open(self.codes_path, "rb") as f:
+                data = f.read(expected_size)
+            self.codes = np.frombuffer(data, dtype=dtype).reshape(self.rows, self._code_width()).copy()
+            with open(self.codes_path, "r+b") as f:
+                f.truncate(expected_size)
+            print(f"Loaded {self.mode} codes for {self.rows} vectors")
+            return
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Re-encode every vector from the float32 file in blocks"""
+        self.codes = None
+        matrix = self._vectors()
+        if matrix is None:
+            if os.path.exists(self.codes_path):
+                os.remove(self.codes_path)
+            return
+        blocks = [self._encode(np.asarray(matrix[start:start + 65536]))
+                  for start in range(0, self.rows, 65536)]
+        self.codes = np.concatenate(blocks)
+        tmp_path = f"{self.codes_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.codes.tobytes())
+        os.replace(tmp_path, self.codes_path)
+        with open(self._quantization_meta_path, "w") as f:
+            json.dump({"mode": self.mode, "int8_range": self.int8_range}, f)
+        print(f"Encoded {self.rows} vectors as {self.mode} codes")
+
+    def _index_add(self, vectors):
+        if self.codes is None or self.codes.shape[0] != self.rows - len(vectors):
+            self._rebuild_index()
+            return
+        codes = self._encode(vectors)
+        with open(self.codes_path, "ab") as f:
+            f.write(codes.tobytes())
+        if not os.path.exists(self._quantization_meta_path):
+            with open(self._quantization_meta_path, "w") as f:
+                json.dump({"mode": self.mode, "int8_range": self.int8_range}, f)
+        self.codes = np.concatenate([self.codes, codes])
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Score every row from its codes; higher is closer"""
+        scores = np.empty(self.rows, dtype=np.float32)
+        if self.mode == "int8":
+            weights = (query * (self.int8_range / 127)).astype(np.float32)
+            for start in range(0, self.rows, self.SCAN_BLOCK):
+                block = self.codes[start:start + self.SCAN_BLOCK]
+                scores[start:start + len(block)] = block.astype(np.float32) @ weights
+            return scores
+
+        query_bits = np.packbits(query > 0)
+        for start in range(0, self.rows, self.SCAN_BLOCK):
+            block = self.codes[start:start + self.SCAN_BLOCK]
+            hamming = _POPCOUNT[np.bitwise_xor(block, query_bits)].sum(axis=1, dtype=np.int32)
+            # Angle between sign vectors estimates the cosine between the originals
+            scores[start:start + len(block)] = np.cos(np.pi * hamming / self.dim)
+        return scores
+
+    def _search_rows(self, query, k):
+        scores = self._approximate_scores(query)
+        scores[~self.live] = -np.inf
+        k = min(k, self.rows)
+        if not self.rescore:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return scores[top], top
+
+        candidates = min(self.rows, k * self.rescore_factor)
+        rows = np.sort(np.argpartition(-scores, candidates - 1)[:candidates])
+        exact = self._vectors()[rows] @ query
+        exact[~self.live[rows]] = -np.inf
+        top = np.argsort(-exact)[:k]
+        return exact[top], rows[top]
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats.update({
+            "quantization": self.mode,
+            "rescore_factor": self.rescore_factor if self.rescore else None,
+            "code_bytes": int(self.codes.nbytes) if self.codes is not None else 0,
+            "float_bytes": self.rows * (self.dim or 0) * 4
+        })
+        return stats
+
+class FaissBackend(NumpyBackend):
+    """FAISS index over the same vector file and docstore as NumpyBackend"""
+
+    # index_type is "flat", "ivf", "hnsw" or "auto" (flat up to flat_max_vectors,
+    # then large_index_type). The index is written to index.faiss on persist()
+    # and memory-mapped on load where FAISS allows it.
+    name = "faiss"
+
+    def __init__(
+        self,
+        directory: str,
+        index_type: str = "auto",
+        flat_max_vectors: int = 50000,
+        large_index_type: str = "hnsw",
+        ivf_nlist: int = 1024,
+        ivf_nprobe: int = 16,
+        hnsw_m: int = 32,
+        hnsw_ef_construction: int = 200,
+        hnsw_ef_search: int = 64
+    ):
+        if faiss is None:
+            raise ImportError("faiss-cpu is required for the faiss vector backend")
+        self.index_type = index_type
+        self.flat_max_vectors = flat_max_vectors
+        self.large_index_type = large_index_type
+        self.ivf_nlist = ivf_nlist
+        self.ivf_nprobe = ivf_nprobe
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+
+        self.index = None
+        self.built_type: Optional[str] = None
+        self._index_mmapped = False
+        super().__init__(directory)
+
+    def _resolve_type(self, rows: int) -> str:
+        index_type = self.index_type
+        if index_type == "auto":
+            index_type = "flat" if rows <= self.flat_max_vectors else self.large_index_type
+        # IVF needs enough points per list to train its quantizer
+        if index_type == "ivf" and rows < self.ivf_nlist * 39:
+            index_type = "flat"
+        return index_type
+
+    def _new_index(self, index_type: str):
+        if index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(self.dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.hnsw_ef_construction
+            return index
+        if index_type == "ivf":
+            quantizer = faiss.IndexFlatIP(self.dim)
+            return faiss.IndexIVFFlat(quantizer, self.dim, self.ivf_nlist, faiss.METRIC_INNER_PRODUCT)
+        return faiss.IndexFlatIP(self.dim)
+
+    def _configure_search(self):
+        if self.built_type == "hnsw":
+            faiss.downcast_index(self.index).hnsw.efSearch = self.hnsw_ef_search
+        elif self.built_type == "ivf":
+            faiss.extract_index_ivf(self.index).nprobe = self.ivf_nprobe
+
+    def _load_index(self):
+        """Memory-map the persisted index if it matches the vector file, else rebuild"""
+        self.index_path = os.path.join(self.directory, "index.faiss")
+        self.index, self.built_type = None, None
+        if self.rows == 0:
+            return
+
+        meta = {}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+
+        if os.path.exists(self.index_path) and meta.get("index_rows") == self.rows:
+            try:
+                self.index = faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                self._index_mmapped = True
+            except RuntimeError:
+                self.index = faiss.read_index(self.index_path)
+                self._index_mmapped = False
+            self.built_type = meta.get("index_type", "flat")
+            self._configure_search()
+            print(f"Loaded {self.built_type} FAISS index with {self.index.ntotal} vectors")
+            return
+
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Build the index from the vector file in blocks"""
+        self.index, self.built_type, self._index_mmapped = None, None, False
+        matrix = self._vectors()
+        if matrix is None:
+            return
+
+        index_type = self._resolve_type(self.rows)
+        index = self._new_index(index_type)
+        if index_type == "ivf":
+            sample_size = min(self.rows, self.ivf_nlist * 256)
+            sample = np.random.default_rng(0).choice(self.rows, sample_size, replace=False)
+            index.train(np.ascontiguousarray(matrix[np.sort(sample)]))
+        for start in range(0, self.rows, 65536):
+            index.add(np.ascontiguousarray(matrix[start:start + 65536]))
+
+        self.index, self.built_type = index, index_type
+        self._configure_search()
+        print(f"Built {index_type} FAISS index with {self.rows} vectors")
+
+    def _index_add(self, vectors):
+        # Crossing the flat/ANN threshold means rebuilding from the vector file
+        if self.index is None or self._resolve_type(self.rows) != self.built_type:
+            self._rebuild_index()
+            return
+        if self._index_mmapped:
+            # Memory-mapped indexes are read-only; load a writable copy once
+            self.index = faiss.read_index(self.index_path)
+            self._index_mmapped = False
+            self._configure_search()
+        self.index.add(vectors)
+
+    def _search_rows(self, query, k):
+        scores, rows = self.index.search(query.reshape(1, -1), k)
+        return scores[0], rows[0]
+
+    def persist(self):
+        with self._lock:
+            if self.index is None or self._index_mmapped:
+                return
+            tmp_path = f"{self.index_path}.tmp"
+            faiss.write_index(self.index, tmp_path)
+            os.replace(tmp_path, self.index_path)
+            with open(self.meta_path, "w") as f:
+                json.dump({"dim": self.dim, "index_type": self.built_type, "index_rows": self.rows}, f)
+
+    def compact(self):
+        super().compact()
+        self.persist()
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats.update({
+            "index_type": self.built_type,
+            "memory_mapped": self._index_mmapped
+        })
+        return stats
+
+def create_backend(name: str, embeddings, config) -> VectorBackend:
+    """Build the vector backend selected in Config"""
+    if name == "chroma":
+        return ChromaBackend(config.CHROMA_PERSIST_DIRECTORY, embeddings, delete_batch_size=config.DELETE_BATCH_SIZE)
+    if name == "numpy":
+        if config.VECTOR_QUANTIZATION != "none":
+            return QuantizedBackend(
+                config.VECTOR_INDEX_DIRECTORY,
+                mode=config.VECTOR_QUANTIZATION,
+                rescore_factor=config.QUANTIZATION_RESCORE_FACTOR,
+                int8_range=config.QUANTIZATION_INT8_RANGE
+            )
+        return NumpyBackend(config.VECTOR_INDEX_DIRECTORY)
+    if name == "faiss":
+        return FaissBackend(
+            config.VECTOR_INDEX_DIRECTORY,
+            index_type=config.FAISS_INDEX_TYPE,
+            flat_max_vectors=config.FAISS_FLAT_MAX_VECTORS,
+            large_index_type=config.FAISS_LARGE_INDEX_TYPE,
+            ivf_nlist=config.FAISS_IVF_NLIST,
+            ivf_nprobe=config.FAISS_IVF_NPROBE,
+            hnsw_m=config.FAISS_HNSW_M,
+            hnsw_ef_construction=config.FAISS_HNSW_EF_CONSTRUCTION,
+            hnsw_ef_search=config.FAISS_HNSW_EF_SEARCH
+        )
+    raise ValueError(f"Unknown vector backend: {name}")
@@ -1,30 +1,103 @@
 import os
-import re
+import time
 from typing import List, Dict, Any, Optional
 from langchain.schema import Document
 from vector_store import VectorStore
+from caching import create_cache, normalize_query
+from text_normalizer import TextNormalizer
+from keyword_matcher import load_taxonomy
 from config import Config
 
 class VectorSearchService:
     def __init__(self, vector_store: VectorStore):
         self.vector_store = vector_store
+        self.normalizer = TextNormalizer()
+        self.skill_matcher = load_taxonomy(Config.SKILLS_TAXONOMY_PATH)
+        
+        # Formatted answers for repeated questions on an unchanged corpus
+        self.result_cache = None
+        if Config.RESULT_CACHE_BACKEND != "none":
+            self.result_cache = create_cache(
+                Config.RESULT_CACHE_BACKEND,
+                max_size=Config.RESULT_CACHE_SIZE,
+                ttl_seconds=Config.RESULT_CACHE_TTL_SECONDS,
+                path=Config.RESULT_CACHE_PATH
+            )
+    
+    def _retrieve(self, question: str, k: int, mode: str) -> tuple:
+        """Retrieve documents by vector or hybrid search, timing each leg"""
+        timings = {}
+        
+        if mode != "hybrid":
+            started = time.perf_counter()
+            docs = self.vector_store.similarity_search(question, k=k)
+            timings["vector_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return docs, timings
+        
+        # Over-fetch from both legs so fusion has something to reorder
+        candidates = max(k * 4, 10)
+        
+        started = time.perf_counter()
+        vector_docs = self.vector_store.similarity_search(question, k=candidates)
+        timings["vector_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        
+        started = time.perf_counter()
+        keyword_docs = [doc for doc, _ in self.vector_store.keyword_search(question, k=candidates)]
+        timings["keyword_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        
+        started = time.perf_counter()
+        docs = self._reciprocal_rank_fusion([vector_docs, keyword_docs], k)
+        timings["fusion_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return docs, timings
     
-    def search_and_summarize(self, question: str, k: int = 2) -> Dict[str, Any]:
+    def _reciprocal_rank_fusion(self, rankings: List[List[Document]], k: int) -> List[Document]:
+        """Fuse ranked lists with reciprocal-rank fusion"""
+        scores: Dict[str, float] = {}
+        docs_by_key: Dict[str, Document] = {}
+        
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking):
+                key = doc.metadata.get("chunk_hash") or doc.page_content
+                scores[key] = scores.get(key, 0.0) + 1.0 / (Config.HYBRID_RRF_K + rank + 1)
+                docs_by_key.setdefault(key, doc)
+        
+        ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+        return [docs_by_key[key] for key in ranked]
+    
+    def search_and_summarize(self, question: str, k: int = 2, mode: Optional[str] = None) -> Dict[str, Any]:
         """
         Search vector database and return relevant content without using LLM
         """
+        mode = mode or Config.CHAT_RETRIEVAL_MODE
+        method = "hybrid_search" if mode == "hybrid" else "vector_search"
+        
+        # The collection version changes on every add/delete/clear, so stale entries are never hit
+        cache_key = (normalize_query(question), k, mode, self.vector_store.collection_version)
+        if self.result_cache is not None:
+            started = time.perf_counter()
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return {
+                    **cached,
+                    "question": question,
+                    "timings": {"cache_ms": round((time.perf_counter() - started) * 1000, 2)}
+                }
+        
         try:
-            # Get relevant documents from vector store
-            relevant_docs = self.vector_store.similarity_search(question, k=k)
+            # Get relevant documents from vector store (and keyword index in hybrid mode)
+            relevant_docs, timings = self._retrieve(question, k, mode)
             
             if not relevant_docs:
-                return {
+                result = {
                     "answer": "I couldn't find any relevant information in the document for your question.",
                     "citations": [],
                     "source_documents": [],
                     "question": question,
-                    "method": "vector_search"
+                    "method": method,
+                    "timings": timings
                 }
+                self._cache_result(cache_key, result)
+                return result
             
             # Extract and format the most relevant content
             answer = self._format_relevant_content(relevant_docs, question)
@@ -32,16 +105,19 @@ class VectorSearchService:
             # Debug: Print the raw answer to see what's being returned
             print(f"DEBUG - Raw answer: {answer}")
                 
-            # Process citations (temporarily disabled to avoid page number issues)
-            citations = []  # self._process_citations(relevant_docs)
+            # Chunks carry their source page, so citations point at real pages
+            citations = self._process_citations(relevant_docs)
             
-            return {
+            result = {
                 "answer": answer,
                 "citations": citations,
                 "source_documents": relevant_docs,
                 "question": question,
-                "method": "vector_search"
+                "method": method,
+                "timings": timings
             }
+            self._cache_result(cache_key, result)
+            return result
             
         except Exception as e:
             print(f"Error in vector search: {e}")
@@ -50,9 +126,28 @@ class VectorSearchService:
                 "citations": [],
                 "source_documents": [],
                 "question": question,
-                "method": "vector_search"
+                "method": method,
+                "timings": {}
             }
     
+    def _cache_result(self, cache_key: tuple, result: Dict[str, Any]):
+        """Store a successful result (errors are never cached)"""
+        if self.result_cache is None:
+            return
+        try:
+            self.result_cache.set(cache_key, result)
+        except Exception as e:
+            print(f"Error caching search result: {e}")
+    
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Get result cache hit/miss counters"""
+        if self.result_cache is None:
+            return None
+        stats = self.result_cache.get_stats()
+        stats["backend"] = Config.RESULT_CACHE_BACKEND
+        stats["collection_version"] = self.vector_store.collection_version
+        return stats
+    
     def _format_relevant_content(self, documents: List[Document], question: str) -> str:
         """
         Format the most relevant content from documents into a coherent answer
@@ -60,112 +155,46 @@ class VectorSearchService:
         if not documents:
             return "No relevant information found."
         
-        # Extract content from documents with better deduplication
-        unique_contents = []
+        # Snippets are cleaned at ingest time; only assembly happens here
+        unique_docs = []
         seen_content = set()
         
         for doc in documents:
-            content = doc.page_content.strip()
-            if content and len(content) > 10:  # Only include meaningful content
-                # Clean content first - remove page numbers and artifacts
-                cleaned_content = content
-                cleaned_content = re.sub(r'Page \d+', '', cleaned_content).strip()
-                cleaned_content = re.sub(r'Page \d+ Page \d+', '', cleaned_content).strip()
-                cleaned_content = cleaned_content.replace('\n', ' ').replace('  ', ' ')
-                
-                if cleaned_content and len(cleaned_content) > 10:
-                    # Create a simplified version for deduplication (more robust)
-                    words = cleaned_content.split()
-                    simplified = ' '.join(words[:15]).lower()  # First 15 words for better deduplication
-                    
-                    if simplified not in seen_content:
-                        unique_contents.append(cleaned_content)
-                        seen_content.add(simplified)
+            snippet = self.normalizer.snippet_for(doc.metadata, doc.page_content)
+            if snippet:
+                # First 15 words are enough to spot overlapping chunks
+                simplified = ' '.join(snippet.split()[:15]).lower()
+                if simplified not in seen_content:
+                    unique_docs.append((doc, snippet))
+                    seen_content.add(simplified)
         
-        if not unique_contents:
+        if not unique_docs:
             return "No relevant information found."
         
         # Take only the first unique content to avoid repetition
-        combined_content = unique_contents[0]  # Only use the first unique content
-        
-        # Create a structured response
-        response_parts = []
+        doc, content = unique_docs[0]
         
         # Add a brief summary based on question type
         question_lower = question.lower()
         
         if "skill" in question_lower or "skills" in question_lower:
-            response_parts.append("Based on the document, here are the skills mentioned:")
-            # For skills, try to extract specific skill keywords
-            combined_content = self._extract_skills_from_content(combined_content)
+            header = "Based on the document, here are the skills mentioned:"
+            # Skills are tagged per chunk at ingest; list them rather than prose
+            skills = self._skills_for(doc)
+            if skills:
+                content = f"Skills found: {skills}"
         elif "experience" in question_lower or "work" in question_lower:
-            response_parts.append("Based on the document, here is the experience/work history:")
+            header = "Based on the document, here is the experience/work history:"
         elif "education" in question_lower or "degree" in question_lower:
-            response_parts.append("Based on the document, here is the education background:")
+            header = "Based on the document, here is the education background:"
         elif "contact" in question_lower or "email" in question_lower or "phone" in question_lower:
-            response_parts.append("Based on the document, here is the contact information:")
+            header = "Based on the document, here is the contact information:"
         elif "summary" in question_lower or "overview" in question_lower or "key points" in question_lower:
-            response_parts.append("Based on the document, here are the key points:")
+            header = "Based on the document, here are the key points:"
         else:
-            response_parts.append("Based on the document, here is the relevant information:")
+            header = "Based on the document, here is the relevant information:"
         
-        # Add the actual content with better formatting
-        if combined_content:
-            # Clean up the content - remove excessive whitespace, line breaks, and page artifacts
-            cleaned_content = ' '.join(combined_content.split())
-            
-            # More aggressive page number removal
-            cleaned_content = re.sub(r'Page \d+', '', cleaned_content).strip()
-            cleaned_content = re.sub(r'Page \d+ Page \d+', '', cleaned_content).strip()
-            cleaned_content = re.sub(r'Page\d+', '', cleaned_content).strip()
-            cleaned_content = re.sub(r'\bPage\b', '', cleaned_content).strip()
-            
-            # Remove any remaining artifacts
-            cleaned_content = re.sub(r'\s+', ' ', cleaned_content).strip()
-            
-            # Split into sentences for better readability
-            sentences = cleaned_content.split('.')
-            # Take only meaningful sentences (filter out page numbers and short sentences)
-            meaningful_sentences = []
-            for s in sentences:
-                s = s.strip()
-                # More aggressive filtering
-                if (len(s) > 20 and 
-                    not s.startswith('Page') and 
-                    not s.lower().startswith('page') and
-                    not s.endswith('Page') and
-                    not s.lower().endswith('page') and
-                    'Page' not in s):
-                    meaningful_sentences.append(s)
-            
-            # Limit to 3 sentences maximum to avoid repetition
-            if meaningful_sentences:
-                final_content = '. '.join(meaningful_sentences[:3]) + '.'
-                # Final cleanup to remove any remaining page references
-                final_content = re.sub(r'\bPage\b', '', final_content).strip()
-                final_content = re.sub(r'\s+', ' ', final_content).strip()
-                response_parts.append(final_content)
-            else:
-                # Fallback: use cleaned content directly
-                fallback_content = re.sub(r'\bPage\b', '', cleaned_content).strip()
-                fallback_content = re.sub(r'\s+', ' ', fallback_content).strip()
-                if fallback_content:
-                    response_parts.append(fallback_content[:500] + '...')
-        
-        # Final cleanup of the entire response
-        final_response = "\n\n".join(response_parts)
-        
-        # Aggressive page number removal
-        final_response = re.sub(r'\bPage\b', '', final_response).strip()
-        final_response = re.sub(r'Page \d+', '', final_response).strip()
-        final_response = re.sub(r'Page\d+', '', final_response).strip()
-        final_response = re.sub(r'\s+', ' ', final_response).strip()
-        
-        # Remove any trailing artifacts
-        final_response = re.sub(r'\s*Page\s*$', '', final_response).strip()
-        final_response = re.sub(r'\s*Page\s*Page\s*$', '', final_response).strip()
-        
-        return final_response
+        return f"{header} {content}" if content else header
     
     def _process_citations(self, source_documents: List[Document]) -> List[Dict[str, Any]]:
         """Process source documents to create citations"""
@@ -193,31 +222,32 @@ class VectorSearchService:
         Get a summary of all documents in the vector store
         """
         try:
-            stats = self.vector_store.get_collection_stats()
-            
-            # Get a sample of documents for overview
-            sample_docs = self.vector_store.similarity_search("", k=5)
+            # Registry lookups only; no vector query is needed to describe the corpus
+            registry = self.vector_store.registry
+            stats = registry.get_stats()
             
-            summary = {
-                "total_documents": stats.get("count", 0),
-                "total_chunks": len(sample_docs),
-                "document_types": self._get_document_types(sample_docs),
+            return {
+                "total_documents": stats["files"],
+                "total_chunks": self.vector_store.backend.count(),
+                "total_pages": stats["pages"],
+                "total_bytes": stats["bytes"],
+                "document_types": self._get_document_types(
+                    [record["filename"] or "" for record in registry.list(limit=Config.DOCUMENTS_PAGE_MAX_LIMIT, status="ready")]
+                ),
                 "method": "vector_search"
             }
             
-            return summary
-            
         except Exception as e:
             return {
                 "error": f"Error getting document summary: {e}",
                 "method": "vector_search"
             }
     
-    def _get_document_types(self, documents: List[Document]) -> List[str]:
-        """Extract document types from metadata"""
+    def _get_document_types(self, filenames: List[str]) -> List[str]:
+        """Map filenames to document types"""
         doc_types = set()
-        for doc in documents:
-            filename = doc.metadata.get("filename", "").lower()
+        for filename in filenames:
+            filename = filename.lower()
             if filename.endswith('.pdf'):
                 doc_types.add("PDF")
             elif filename.endswith('.txt'):
@@ -234,112 +264,27 @@ class VectorSearchService:
         if not content:
             return content
         
-        # Common skill keywords to look for (comprehensive list for any resume/document)
-        skill_keywords = [
-            # Programming Languages
-            'javascript', 'typescript', 'python', 'java', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
-            'html', 'css', 'scss', 'sass', 'sql', 'nosql', 'r', 'matlab', 'swift', 'kotlin', 'scala',
-            
-            # Frameworks & Libraries
-            'react', 'reactjs', 'nextjs', 'angular', 'vue', 'vue.js', 'node.js', 'express', 'expressjs',
-            'django', 'flask', 'fastapi', 'spring', 'laravel', 'symfony', 'jquery', 'bootstrap',
-            'tailwind', 'material-ui', 'ant design', 'redux', 'mobx', 'zustand', 'svelte', 'ember',
-            
-            # Databases & Storage
-            'mongodb', 'mysql', 'postgresql', 'sqlite', 'redis', 'elasticsearch', 'dynamodb',
-            'firebase', 'supabase', 'cassandra', 'neo4j', 'oracle', 'sql server', 'mariadb',
-            
-            # Cloud & DevOps
-            'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins', 'gitlab', 'github',
-            'git', 'bitbucket', 'terraform', 'ansible', 'nginx', 'apache', 'vault', 'consul',
-            
-            # AI & ML
-            'ai', 'machine learning', 'deep learning', 'tensorflow', 'pytorch', 'scikit-learn',
-            'langchain', 'genai', 'openai', 'chatgpt', 'nlp', 'computer vision', 'neural networks',
-            
-            # Tools & Platforms
-            'jira', 'confluence', 'slack', 'trello', 'asana', 'figma', 'sketch', 'adobe',
-            'socket.io', 'webpack', 'babel', 'eslint', 'prettier', 'jest', 'cypress', 'postman',
-            
-            # Concepts & Methodologies
-            'rest api', 'graphql', 'microservices', 'serverless', 'agile', 'scrum', 'kanban',
-            'tdd', 'bdd', 'ci/cd', 'devops', 'api', 'sdlc', 'responsive design', 'ux/ui',
-            
-            # Specific Technologies
-            'canvas api', 'webgl', 'three.js', 'd3.js', 'chart.js', 'konva', 'fabric.js',
-            'websockets', 'real-time', 'collaboration', 'drawing', 'erasing', 'undo', 'redo',
-            'sticky notes', 'voice search', 'image upload', 'text manipulation',
-            
-            # Problem Solving
-            'algorithms', 'data structures', 'leetcode', 'hackathon', 'competitive programming',
-            'dsa', 'problem solving', 'optimization', 'performance', 'testing'
-        ]
-        
-        # Find skills in the content
-        found_skills = []
-        content_lower = content.lower()
-        
-        for skill in skill_keywords:
-            if skill in content_lower:
-                # Handle special cases for better formatting
-                if skill == 'reactjs':
-                    found_skills.append('ReactJS')
-                elif skill == 'nextjs':
-                    found_skills.append('NextJS')
-                elif skill == 'expressjs':
-                    found_skills.append('ExpressJS')
-                elif skill == 'c++':
-                    found_skills.append('C++')
-                elif skill == 'rest api':
-                    found_skills.append('REST API')
-                elif skill == 'socket.io':
-                    found_skills.append('Socket.IO')
-                elif skill == 'canvas api':
-                    found_skills.append('Canvas API')
-                elif skill == 'real-time':
-                    found_skills.append('Real-time')
-                elif skill == 'machine learning':
-                    found_skills.append('Machine Learning')
-                elif skill == 'data structures':
-                    found_skills.append('Data Structures')
-                elif skill == 'competitive programming':
-                    found_skills.append('Competitive Programming')
-                elif skill == 'responsive design':
-                    found_skills.append('Responsive Design')
-                elif skill == 'voice search':
-                    found_skills.append('Voice Search')
-                elif skill == 'image upload':
-                    found_skills.append('Image Upload')
-                elif skill == 'text manipulation':
-                    found_skills.append('Text Manipulation')
-                elif skill == 'sticky notes':
-                    found_skills.append('Sticky Notes')
-                elif skill == 'genai':
-                    found_skills.append('GenAI')
-                elif skill == 'langchain':
-                    found_skills.append('LangChain')
-                elif skill == 'sql server':
-                    found_skills.append('SQL Server')
-                elif skill == 'ux/ui':
-                    found_skills.append('UX/UI')
-                else:
-                    found_skills.append(skill.title())
-        
-        # Remove duplicates and sort alphabetically
-        unique_skills = sorted(list(set(found_skills)))
-        
-        if unique_skills:
-            return f"Skills found: {', '.join(unique_skills)}"
+        skills = self.skill_matcher.find_labels(content)
+        if skills:
+            return f"Skills found: {', '.join(skills)}"
         else:
             return content
     
+    def _skills_for(self, doc: Document) -> str:
+        """Skills tagged at ingest, or matched now for chunks tagged with another taxonomy"""
+        if doc.metadata.get("skills_taxonomy") == self.skill_matcher.fingerprint:
+            return doc.metadata.get("skills", "")
+        return ", ".join(self.skill_matcher.find_labels(doc.page_content))
+    
     def search_by_keyword(self, keyword: str, k: int = 2) -> Dict[str, Any]:
         """
         Search for specific keywords in the document
         """
         try:
-            # Use the keyword as the search query
-            relevant_docs = self.vector_store.similarity_search(keyword, k=k)
+            # Exact term matches come straight from the inverted index
+            started = time.perf_counter()
+            relevant_docs = [doc for doc, _ in self.vector_store.keyword_search(keyword, k=k)]
+            keyword_ms = round((time.perf_counter() - started) * 1000, 2)
             
             if not relevant_docs:
                 return {
@@ -347,7 +292,8 @@ class VectorSearchService:
                     "citations": [],
                     "source_documents": [],
                     "keyword": keyword,
-                    "method": "keyword_search"
+                    "method": "keyword_search",
+                    "timings": {"keyword_ms": keyword_ms}
                 }
             
             # Format the response
@@ -361,7 +307,8 @@ class VectorSearchService:
                 "citations": citations,
                 "source_documents": relevant_docs,
                 "keyword": keyword,
-                "method": "keyword_search"
+                "method": "keyword_search",
+                "timings": {"keyword_ms": keyword_ms}
             }
             
         except Exception as e:
@@ -1,72 +1,357 @@
+import fcntl
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator
 from langchain.schema import Document
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.schema.retriever import BaseRetriever
 
 from config import Config
+from caching import LRUCache, normalize_query
+from embedding_cache import EmbeddingCache
+from keyword_index import KeywordIndex
+from document_registry import DocumentRegistry
+from vector_backends import create_backend
+from model_residency import module_bytes
+from inference_backends import create_embeddings
+from model_server import ModelServerClient, RemoteEmbeddings
+
+def _batched(documents: Iterable[Document], batch_size: int) -> Iterator[List[Document]]:
+    """Yield fixed-size lists of documents without materializing the input"""
+    batch = []
+    for doc in documents:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 class VectorStore:
     def __init__(self):
-        # Initialize embeddings model (using free HuggingFace model)
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
+        # Let the MiniLM encoder use every core we were given
+        self._configure_torch_threads()
+        
+        # Initialize embeddings model (using free HuggingFace model), or use the shared model server's
+        self.model_server = None
+        if Config.MODEL_SERVER_SOCKET:
+            self.model_server = ModelServerClient(Config.MODEL_SERVER_SOCKET)
+            self.model_server.wait_until_ready(Config.MODEL_SERVER_CONNECT_TIMEOUT_SECONDS)
+            self.embeddings = RemoteEmbeddings(self.model_server)
+        else:
+            self.embeddings = create_embeddings(Config.EMBEDDING_INFERENCE_BACKEND, Config)
+        
+        self.last_ingest_stats: Dict[str, Any] = {}
+        
+        # Chunk vectors survive re-ingestion and rebuilds
+        self.embedding_cache = None
+        if Config.EMBEDDING_CACHE_ENABLED:
+            self.embedding_cache = EmbeddingCache(Config.EMBEDDING_CACHE_DIR, self._embedding_cache_namespace())
+        
+        # Repeated questions skip the encoder entirely
+        self.query_embedding_cache = LRUCache(
+            max_size=Config.QUERY_CACHE_SIZE,
+            ttl_seconds=Config.QUERY_CACHE_TTL_SECONDS
         )
         
-        # Initialize ChromaDB
+        # Set by deletions, cleared once the backend has been compacted
+        self.pending_compaction = False
+        
+        # Bumped on every corpus change; result caches key on it instead of being flushed
+        self._version_lock = threading.Lock()
+        # Other workers bump the persisted version too; its stat tells when to re-read it
+        self._version_stat = None
+        self._collection_version = self._load_collection_version()
+        
+        # Initialize vector backend (Chroma by default)
+        self.backend = None
         self.vector_store = None
         self._initialize_vector_store()
+        
+        # BM25 index for exact keyword lookups, kept in step with the collection
+        self.keyword_index = KeywordIndex(Config.KEYWORD_INDEX_PATH, lambda ids: self.backend.get(ids=ids))
+        if len(self.keyword_index) == 0 and self.backend.count() > 0:
+            self._rebuild_keyword_index()
+        
+        # Per-file records, filled in by PDFProcessor and add_documents
+        self.registry = DocumentRegistry(Config.DOCUMENT_REGISTRY_PATH)
+        if len(self.registry) == 0 and self.backend.count() > 0:
+            self._rebuild_registry()
+    
+    def _configure_torch_threads(self):
+        """Set the process-wide torch intra-op thread count, sized for INGEST_MAX_WORKERS concurrent encoders"""
+        try:
+            import torch
+            torch.set_num_threads(Config.EMBEDDING_NUM_THREADS)
+        except Exception as e:
+            print(f"Could not set torch thread count: {e}")
+    
+    def _embedding_cache_namespace(self) -> str:
+        """Cache key prefix; int8 backends produce different vectors, so they get their own entries"""
+        backend = Config.EMBEDDING_INFERENCE_BACKEND
+        if backend in ("int8", "onnx_int8"):
+            return f"{Config.EMBEDDING_MODEL_NAME}#{backend}"
+        return Config.EMBEDDING_MODEL_NAME
     
     def _initialize_vector_store(self):
-        """Initialize or load existing vector store"""
+        """Initialize or load the configured vector backend"""
         try:
-            if os.path.exists(Config.CHROMA_PERSIST_DIRECTORY):
-                # Load existing vector store
-                self.vector_store = Chroma(
-                    persist_directory=Config.CHROMA_PERSIST_DIRECTORY,
-                    embedding_function=self.embeddings
-                )
-                print(f"Loaded existing vector store from {Config.CHROMA_PERSIST_DIRECTORY}")
-            else:
-                # Create new vector store
-                self.vector_store = Chroma(
-                    persist_directory=Config.CHROMA_PERSIST_DIRECTORY,
-                    embedding_function=self.embeddings
-                )
-                print(f"Created new vector store at {Config.CHROMA_PERSIST_DIRECTORY}")
+            self.backend = create_backend(Config.VECTOR_BACKEND, self.embeddings, Config)
+            # LangChain Chroma object, kept for retriever-based chains (None for in-process indexes)
+            self.vector_store = getattr(self.backend, "store", None)
         except Exception as e:
             print(f"Error initializing vector store: {e}")
             raise
     
-    def add_documents(self, documents: List[Document]) -> List[str]:
-        """Add documents to vector store"""
+    @staticmethod
+    def _version_file_stat() -> Optional[tuple]:
         try:
-            if not documents:
-                return []
+            st = os.stat(Config.COLLECTION_VERSION_PATH)
+        except OSError:
+            return None
+        # os.replace() gives every write a new inode, so this changes even within one mtime tick
+        return (st.st_ino, st.st_mtime_ns)
+    
+    @staticmethod
+    def _read_version_file() -> Optional[int]:
+        try:
+            with open(Config.COLLECTION_VERSION_PATH) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+    
+    def _load_collection_version(self) -> int:
+        """Read the persisted collection version"""
+        self._version_stat = self._version_file_stat()
+        version = self._read_version_file()
+        if version is None:
+            # Start from a timestamp so a lost version file cannot match old cache entries
+            return int(time.time() * 1000)
+        return version
+    
+    @property
+    def collection_version(self) -> int:
+        """Current corpus version, re-read whenever another process has persisted a newer one"""
+        if self._version_file_stat() != self._version_stat:
+            with self._version_lock:
+                self._version_stat = self._version_file_stat()
+                version = self._read_version_file()
+                if version is not None:
+                    self._collection_version = max(self._collection_version, version)
+        return self._collection_version
+    
+    def bump_collection_version(self) -> int:
+        """Mark the corpus as changed and persist the new version"""
+        directory = os.path.dirname(Config.COLLECTION_VERSION_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The file lock keeps two workers from both bumping to the same version
+        with self._version_lock, open(f"{Config.COLLECTION_VERSION_PATH}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._collection_version = max(self._collection_version, self._read_version_file() or 0) + 1
+            tmp_path = f"{Config.COLLECTION_VERSION_PATH}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(str(self._collection_version))
+            os.replace(tmp_path, Config.COLLECTION_VERSION_PATH)
+            self._version_stat = self._version_file_stat()
+            return self._collection_version
+    
+    def _rebuild_keyword_index(self, page_size: int = 1000):
+        """Index chunks that were stored before the keyword index existed"""
+        print("Rebuilding keyword index from vector store...")
+        offset = 0
+        while True:
+            page = self.backend.get(limit=page_size, offset=offset, include=("documents", "metadatas"))
+            if not page["ids"]:
+                break
+            self.keyword_index.add(page["ids"], page["documents"])
+            offset += len(page["ids"])
+        print(f"Keyword index rebuilt with {len(self.keyword_index)} chunks")
+    
+    def _rebuild_registry(self, page_size: int = 1000):
+        """Register files whose chunks were stored before the registry existed"""
+        print("Rebuilding document registry from vector store...")
+        files: Dict[str, Dict[str, Any]] = {}
+        offset = 0
+        while True:
+            page = self.backend.get(limit=page_size, offset=offset, include=("metadatas",))
+            if not page["ids"]:
+                break
+            for metadata in page["metadatas"]:
+                file_id = metadata.get("file_id")
+                if not file_id:
+                    continue
+                record = files.setdefault(file_id, {
+                    "filename": metadata.get("filename"),
+                    "file_path": metadata.get("file_path"),
+                    "file_hash": metadata.get("file_hash"),
+                    "pages": 0,
+                    "num_chunks": 0
+                })
+                record["pages"] = max(record["pages"], int(metadata.get("page") or 0))
+                record["num_chunks"] += 1
+            offset += len(page["ids"])
+        
+        for file_id, record in files.items():
+            file_path = record.get("file_path") or ""
+            size = os.path.getsize(file_path) if file_path and os.path.exists(file_path) else 0
+            self.registry.register(file_id, **record, file_size=size, chunks_stored=record["num_chunks"], status="ready")
+        print(f"Document registry rebuilt with {len(files)} files")
+    
+    def add_documents(
+        self,
+        documents: Iterable[Document],
+        progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> List[str]:
+        """Embed and insert documents in fixed-size batches"""
+        try:
+            ids: List[str] = []
+            started = time.perf_counter()
+            embed_seconds = 0.0
+            
+            seen_ids = set()
+            duplicates_skipped = 0
+            # file_id -> chunks newly stored, for the document registry
+            stored_by_file: Dict[str, int] = {}
             
-            # Add documents to vector store
-            ids = self.vector_store.add_documents(documents)
+            # Only one batch of texts and vectors is held in memory at a time
+            for batch in _batched(documents, Config.EMBEDDING_BATCH_SIZE):
+                # Text repeated within a file is stored once; each file keeps its own copy of
+                # text it shares with other files (the embedding cache avoids re-encoding it)
+                unique = {}
+                for doc in batch:
+                    file_id = doc.metadata.get("file_id")
+                    if file_id:
+                        stored_by_file.setdefault(file_id, 0)
+                    chunk_id = self._chunk_id(doc.metadata)
+                    if chunk_id in seen_ids or chunk_id in unique:
+                        duplicates_skipped += 1
+                        continue
+                    unique[chunk_id] = doc
+                seen_ids.update(unique)
+                
+                if unique:
+                    for chunk_id in self.backend.existing_ids(list(unique)):
+                        unique.pop(chunk_id, None)
+                        duplicates_skipped += 1
+                
+                if unique:
+                    batch_ids = list(unique)
+                    texts = [doc.page_content for doc in unique.values()]
+                    metadatas = [doc.metadata for doc in unique.values()]
+                    
+                    embed_started = time.perf_counter()
+                    embeddings = self.embed_documents(texts)
+                    embed_seconds += time.perf_counter() - embed_started
+                    
+                    self.backend.add(batch_ids, embeddings, texts, metadatas)
+                    self.keyword_index.add(batch_ids, texts)
+                    ids.extend(batch_ids)
+                    for metadata in metadatas:
+                        if metadata.get("file_id"):
+                            stored_by_file[metadata["file_id"]] += 1
+                
+                # Heartbeat: a "processing" record that stops being touched was abandoned
+                for file_id in stored_by_file:
+                    self.registry.update(file_id)
+                
+                if progress_callback:
+                    progress_callback("embedded", {
+                        "chunks_embedded": len(ids),
+                        "duplicates_skipped": duplicates_skipped
+                    })
+            
+            if not ids:
+                if duplicates_skipped:
+                    print(f"All {duplicates_skipped} chunks already stored, nothing to embed")
+                self._record_file_chunks(stored_by_file, {"ingest_seconds": round(time.perf_counter() - started, 3)})
+                return []
             
             # Persist the vector store
-            self.vector_store.persist()
+            self.backend.persist()
+            self.bump_collection_version()
+            if progress_callback:
+                progress_callback("persisted", {})
             
-            print(f"Added {len(documents)} documents to vector store")
+            elapsed = time.perf_counter() - started
+            self.last_ingest_stats = {
+                "chunks": len(ids),
+                "duplicates_skipped": duplicates_skipped,
+                "batch_size": Config.EMBEDDING_BATCH_SIZE,
+                "seconds": round(elapsed, 3),
+                "embed_seconds": round(embed_seconds, 3),
+                "chunks_per_second": round(len(ids) / elapsed, 2) if elapsed > 0 else None
+            }
+            
+            self._record_file_chunks(stored_by_file, {
+                "embed_seconds": round(embed_seconds, 3),
+                "ingest_seconds": round(elapsed, 3)
+            })
+            
+            print(f"Added {len(ids)} documents to vector store "
+                  f"({self.last_ingest_stats['chunks_per_second']} chunks/sec)")
             return ids
             
         except Exception as e:
             print(f"Error adding documents to vector store: {e}")
             raise
     
+    @staticmethod
+    def _chunk_id(metadata: Dict[str, Any]) -> str:
+        """Vector store id of a chunk: its content hash, scoped to the file it belongs to"""
+        chunk_hash = metadata.get("chunk_hash")
+        if not chunk_hash:
+            return str(uuid.uuid4())
+        file_id = metadata.get("file_id")
+        return f"{file_id}:{chunk_hash}" if file_id else chunk_hash
+    
+    def _record_file_chunks(self, stored_by_file: Dict[str, int], timings: Dict[str, float]):
+        """Record chunk counts and timings for every file whose chunks were just added"""
+        # Status is set by the ingestion pipeline, which also sees files with no chunks
+        for file_id, chunks_stored in stored_by_file.items():
+            try:
+                self.registry.update(file_id, chunks_stored=chunks_stored, timings=timings)
+            except Exception as e:
+                print(f"Error updating document registry for {file_id}: {e}")
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed chunk texts, only running the encoder for uncached ones"""
+        if self.embedding_cache is None:
+            return self.embeddings.embed_documents(texts)
+        
+        embeddings = self.embedding_cache.get_many(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = self.embeddings.embed_documents([texts[i] for i in missing])
+            self.embedding_cache.put_many([texts[i] for i in missing], computed)
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+        return embeddings
+    
+    def get_model_bytes(self) -> Optional[int]:
+        """Bytes held by the embedding model's weights (the model file for ONNX backends)"""
+        if hasattr(self.embeddings, "model_bytes"):
+            return self.embeddings.model_bytes
+        return module_bytes(getattr(self.embeddings, "client", None))
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing cached vectors for normalized repeats"""
+        key = normalize_query(query)
+        embedding = self.query_embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(key)
+            self.query_embedding_cache.set(key, embedding)
+        return embedding
+    
     def similarity_search(self, query: str, k: int = 4) -> List[Document]:
         """Search for similar documents"""
         try:
-            if not self.vector_store:
+            if not self.backend:
                 raise Exception("Vector store not initialized")
             
-            results = self.vector_store.similarity_search(query, k=k)
+            embedding = self.embed_query(query)
+            results = [doc for doc, _ in self.backend.search(embedding, k=k)]
             return results
             
         except Exception as e:
@@ -76,29 +361,56 @@ class VectorStore:
     def similarity_search_with_score(self, query: str, k: int = 4) -> List[tuple]:
         """Search for similar documents with similarity scores"""
         try:
-            if not self.vector_store:
+            if not self.backend:
                 raise Exception("Vector store not initialized")
             
-            results = self.vector_store.similarity_search_with_score(query, k=k)
+            embedding = self.embed_query(query)
+            results = self.backend.search(embedding, k=k)
             return results
             
         except Exception as e:
             print(f"Error in similarity search with score: {e}")
             raise
     
+    def keyword_search(self, query: str, k: int = 4) -> List[tuple]:
+        """BM25 keyword search served from the inverted index (no encoder call)"""
+        return self.keyword_index.search(query, k=k)
+    
+    def find_document_by_hash(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the registry record of an already ingested file with this content hash"""
+        try:
+            return self.registry.find_by_hash(file_hash)
+        except Exception as e:
+            print(f"Error looking up file hash: {e}")
+            return None
+    
+    def get_documents(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        include: tuple = ("documents", "metadatas")
+    ) -> Dict[str, Any]:
+        """Read stored chunks (Chroma-style result dict)"""
+        return self.backend.get(where=where, limit=limit, offset=offset, include=include)
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store"""
         try:
-            if not self.vector_store:
+            if not self.backend:
                 return {"error": "Vector store not initialized"}
             
-            collection = self.vector_store._collection
-            count = collection.count()
+            count = self.backend.count()
             
             return {
                 "total_documents": count,
-                "collection_name": collection.name,
-                "persist_directory": Config.CHROMA_PERSIST_DIRECTORY
+                "collection_version": self.collection_version,
+                **self.backend.get_stats(),
+                "last_ingest": self.last_ingest_stats,
+                "query_embedding_cache": self.query_embedding_cache.get_stats(),
+                "embedding_cache": self.embedding_cache.get_stats() if self.embedding_cache else None,
+                "keyword_index": self.keyword_index.get_stats(),
+                "documents": self.registry.get_stats()
             }
             
         except Exception as e:
@@ -106,22 +418,51 @@ class VectorStore:
     
     def clear_collection(self):
         """Clear all documents from the vector store"""
+        if not self.backend:
+            return
         try:
-            if self.vector_store:
-                self.vector_store._collection.delete(where={})
-                self.vector_store.persist()
-                print("Cleared all documents from vector store")
+            self.backend.clear()
+            self.backend.persist()
         except Exception as e:
             print(f"Error clearing collection: {e}")
             raise
+        finally:
+            # Reset everything derived from the chunks even if the backend kept some
+            self.keyword_index.clear()
+            self.registry.clear()
+            self.bump_collection_version()
+        print("Cleared all documents from vector store")
     
-    def delete_documents_by_metadata(self, metadata_filter: Dict[str, Any]):
-        """Delete documents based on metadata filter"""
+    def delete_documents_by_metadata(self, metadata_filter: Dict[str, Any]) -> int:
+        """Delete documents based on metadata filter, a bounded batch of ids at a time"""
         try:
-            if self.vector_store:
-                self.vector_store._collection.delete(where=metadata_filter)
-                self.vector_store.persist()
-                print(f"Deleted documents with metadata filter: {metadata_filter}")
+            if not self.backend:
+                return 0
+            deleted = 0
+            while True:
+                # Deleted rows drop out of the filter, so the next batch starts at offset 0
+                batch = self.backend.get(where=metadata_filter, limit=Config.DELETE_BATCH_SIZE, include=())
+                ids = batch.get("ids") or []
+                if not ids:
+                    break
+                self.backend.delete(ids=ids)
+                self.keyword_index.remove(ids)
+                deleted += len(ids)
+            self.backend.persist()
+            self.bump_collection_version()
+            if deleted:
+                self.pending_compaction = True
+            print(f"Deleted {deleted} documents with metadata filter: {metadata_filter}")
+            return deleted
         except Exception as e:
             print(f"Error deleting documents: {e}")
-            raise 
\ No newline at end of file
+            raise
+    
+    def compact(self) -> bool:
+        """Reclaim space left by deletions, if there were any since the last compaction"""
+        if not self.pending_compaction:
+            return False
+        self.pending_compaction = False
+        self.backend.compact()
+        self.backend.persist()
+        return True